@@ -244,6 +244,10 @@ public static void Main()
             string testCaseName = testCase + "2019SUM_2013Series_Updated_forLocalVoltageControl_BenchMark_test.sav";
             string configurationPathName = inputdatafolder + "Configurations.xml";
 
+            // keep one python process alive for all frames instead of one per frame
+            bool usePythonWorker = true;
+            int pythonWorkerPort = 50100;
+
             VoltVarControllerAdapter VCAdapter = new VoltVarControllerAdapter();
             ReadInputAdapter ReadIn = new ReadInputAdapter();
             VoltVarController Frame = new VoltVarController();
@@ -254,6 +258,9 @@ public static void Main()
 
             Python.CleanCmd(pythonCmdPath + "CleanData.py", inputdatafolder, logsfolder, pythonCmdPath, caseName, testCaseName); // clean the inputd data, delete the logs, and copy the benchmark model
 
+            if (usePythonWorker)
+                Python.StartWorker(pythonCmdPath + "DVPScaleLoad.py", pythonWorkerPort);
+
             VCAdapter.ConfigurationPathName = configurationPathName;
             VCAdapter.Initialize();
             PreviousFrame = VoltVarController.DeserializeFromXml(configurationPathName);
@@ -285,7 +292,10 @@ public static void Main()
                 try
                 {
 
-                    Python.RunCmd(pythonCmdPath + "DVPScaleLoad.py", VCAdapter.LogMessage,inputdatafolder, VCAdapter.InputFrame.SubstationInformation, testCaseName, VCAdapter.InputFrame.ControlCapacitorBanks[0], VCAdapter.InputFrame.ControlCapacitorBanks[1]);
+                    if (usePythonWorker)
+                        Python.RunWorkerCmd(VCAdapter.LogMessage, inputdatafolder, VCAdapter.InputFrame.SubstationInformation, testCaseName, VCAdapter.InputFrame.ControlCapacitorBanks[0], VCAdapter.InputFrame.ControlCapacitorBanks[1]);
+                    else
+                        Python.RunCmd(pythonCmdPath + "DVPScaleLoad.py", VCAdapter.LogMessage,inputdatafolder, VCAdapter.InputFrame.SubstationInformation, testCaseName, VCAdapter.InputFrame.ControlCapacitorBanks[0], VCAdapter.InputFrame.ControlCapacitorBanks[1]);
                     //Console.ReadLine();
                     //if (i == 0)
                     //{
@@ -303,6 +313,9 @@ public static void Main()
 
             }
 
+            // save the final case and shut the worker down
+            Python.StopWorker();
+
             #endregion
         }
     }
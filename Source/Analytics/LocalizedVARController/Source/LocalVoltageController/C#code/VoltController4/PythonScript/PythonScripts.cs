@@ -5,6 +5,7 @@
 using System.Threading.Tasks;
 using System.Diagnostics;
 using System.IO;
+using System.Net.Sockets;
 using VoltController.VcControlDevice;
 
 
@@ -12,6 +13,11 @@ namespace VoltController.PythonScript
 {
     public class PythonScripts
     {
+        private TcpClient m_workerClient;
+        private NetworkStream m_workerStream;
+        private StreamReader m_workerReader;
+        private StreamWriter m_workerWriter;
+
         public void RunCmd(string cmd, string args, string folder, VcSubstationInfomation subInformation, string testCaseName, VcCapacitorBank capacitorbank1, VcCapacitorBank capacitorbank2)
         {
             ProcessStartInfo start = new ProcessStartInfo();
@@ -29,6 +35,58 @@ public void RunCmd(string cmd, string args, string folder, VcSubstationInfomatio
             }
         }
 
+        public Process StartWorker(string cmd, int port)
+        {
+            ProcessStartInfo start = new ProcessStartInfo();
+            start.FileName = @"C:\Python27\python.exe";
+            start.Arguments = string.Format("{0} --worker {1}", cmd, port);
+            start.UseShellExecute = false;
+            Process worker = Process.Start(start);
+
+            // wait until the worker has initialized PSS\E and is listening
+            for (int attempt = 0; attempt < 300; attempt++)
+            {
+                try
+                {
+                    m_workerClient = new TcpClient("127.0.0.1", port);
+                    m_workerStream = m_workerClient.GetStream();
+                    m_workerReader = new StreamReader(m_workerStream, Encoding.UTF8);
+                    m_workerWriter = new StreamWriter(m_workerStream, new UTF8Encoding(false));
+                    m_workerWriter.AutoFlush = true;
+                    return worker;
+                }
+                catch (SocketException)
+                {
+                    System.Threading.Thread.Sleep(100);
+                }
+            }
+
+            throw new Exception("The python worker did not start listening on port " + port);
+        }
+
+        public void RunWorkerCmd(string args, string folder, VcSubstationInfomation subInformation, string testCaseName, VcCapacitorBank capacitorbank1, VcCapacitorBank capacitorbank2)
+        {
+            // same arguments as RunCmd, one tab separated line per frame
+            List<string> fields = new List<string>();
+            if (args != null)
+                fields.AddRange(args.Split(new char[] { ' ' }, StringSplitOptions.RemoveEmptyEntries));
+            fields.AddRange(new string[] { folder, subInformation.ConsecTap.ToString(), subInformation.ConsecCap.ToString(), subInformation.Ncdel.ToString(), subInformation.Ntdel.ToString(), testCaseName, capacitorbank1.NcTrip.ToString(), capacitorbank2.NcTrip.ToString(), capacitorbank1.NcClose.ToString(), capacitorbank2.NcClose.ToString() });
+
+            m_workerWriter.WriteLine(string.Join("\t", fields));
+            Console.WriteLine(m_workerReader.ReadLine());
+        }
+
+        public void StopWorker()
+        {
+            if (m_workerClient == null)
+                return;
+
+            m_workerWriter.WriteLine("STOP");
+            Console.WriteLine(m_workerReader.ReadLine());
+            m_workerClient.Close();
+            m_workerClient = null;
+        }
+
         public void CleanCmd(string cmd, string folder1, string folder2,string folder3, string caseName, string testCaseName)
         {
             ProcessStartInfo start = new ProcessStartInfo();
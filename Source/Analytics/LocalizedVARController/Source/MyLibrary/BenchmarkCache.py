@@ -0,0 +1,117 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,json,hashlib
+
+import RunReset
+
+#endregion
+
+#region [ Benchmark Cache ]
+
+MaxEntries = 32
+
+# content hashes of the source cases, so a case is only read again once it changed
+_digests = {}
+
+def fileDigest(fileName, blockSize=1 << 20):
+    status = os.stat(fileName)
+    memo = (os.path.abspath(fileName), status.st_size, status.st_mtime)
+    if memo not in _digests:
+        digest = hashlib.sha1()
+        with open(fileName, 'rb') as ReadFile:
+            block = ReadFile.read(blockSize)
+            while block:
+                digest.update(block)
+                block = ReadFile.read(blockSize)
+        _digests[memo] = digest.hexdigest()
+    return _digests[memo]
+
+class BenchmarkCache(object):
+    """
+    Solved benchmark cases on disk, one file per key, named after the sha1
+    of the source case's content and the parameters the benchmark was
+    derived with. Hits refresh the modification time of their file and the
+    least recently used files are removed beyond maxEntries.
+
+    Several processes can share a folder: a case is stored under a
+    temporary name and renamed, and whoever renames first wins.
+    """
+
+    def __init__(self, folder, maxEntries=MaxEntries):
+        self.folder = folder
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if not os.path.isdir(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                pass # created by another process in the meantime
+
+    def key(self, caseName, parameters):
+        digest = hashlib.sha1()
+        digest.update(fileDigest(RunReset.caseFile(caseName)).encode('ascii'))
+        digest.update(json.dumps(parameters, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def fetch(self, key, testCaseName):
+        """
+        Copy the cached case of key as testCaseName. Returns False on a miss.
+        """
+        entry = os.path.join(self.folder, key + os.path.splitext(testCaseName)[1])
+        fileName = RunReset.caseFile(entry)
+        if not os.path.isfile(fileName):
+            self.misses += 1
+            return False
+        try:
+            os.utime(fileName, None)
+            RunReset.copyCase(entry, testCaseName)
+        except (IOError, OSError):
+            self.misses += 1 # evicted by another process in the meantime
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, testCaseName):
+        """
+        Keep a copy of the solved case testCaseName under key.
+        """
+        fileName = RunReset.caseFile(testCaseName)
+        entry = os.path.join(self.folder, key + os.path.splitext(fileName)[1])
+        temporary = '%s.%d.tmp' % (entry, os.getpid())
+        RunReset.cloneFile(fileName, temporary)
+        try:
+            os.rename(temporary, entry)
+        except OSError:
+            os.remove(temporary) # stored by another process
+        self.evict()
+
+    def entries(self):
+        fileNames = [os.path.join(self.folder, name) for name in os.listdir(self.folder) if not name.endswith('.tmp')]
+        return [fileName for fileName in fileNames if os.path.isfile(fileName)]
+
+    def evict(self):
+        entries = self.entries()
+        if len(entries) <= self.maxEntries:
+            return
+        entries.sort(key=lambda fileName: os.path.getmtime(fileName))
+        for fileName in entries[:len(entries) - self.maxEntries]:
+            try:
+                os.remove(fileName)
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def report(self):
+        entries = self.entries()
+        return {
+            'hits' : self.hits,
+            'misses' : self.misses,
+            'evictions' : self.evictions,
+            'entries' : len(entries),
+            'bytes' : sum(os.path.getsize(fileName) for fileName in entries),
+            }
+
+#endregion
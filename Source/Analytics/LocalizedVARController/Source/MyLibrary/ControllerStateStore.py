@@ -0,0 +1,116 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,csv
+from timeit import default_timer
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+#endregion
+
+#region [ Defined Functions ]
+
+def readLastRow(fileName, blockSize=4096):
+    """
+    Return the last csv row of a file by seeking backwards from its end, so
+    the cost does not depend on how many rows the file already holds.
+    """
+    with open(fileName, 'rb') as ReadFile:
+        ReadFile.seek(0, os.SEEK_END)
+        end = ReadFile.tell()
+
+        # skip the line terminators at the end of the file
+        while end > 0:
+            ReadFile.seek(end - 1)
+            if ReadFile.read(1) not in (b'\n', b'\r'):
+                break
+            end -= 1
+
+        # read blocks backwards until the start of the last line is found
+        position = end
+        data = b''
+        while position > 0:
+            step = min(blockSize, position)
+            position -= step
+            ReadFile.seek(position)
+            data = ReadFile.read(step) + data
+            newline = data.rfind(b'\n')
+            if newline >= 0:
+                data = data[newline + 1:]
+                break
+
+    if not data:
+        return None
+    return next(csv.reader([data.decode('utf-8')]))
+
+def formatRow(row):
+    """
+    Format a row exactly as csv.writer writes it to the device files.
+    """
+    output = StringIO()
+    w = csv.writer(output,delimiter = ',',lineterminator = '\n')
+    w.writerow(row)
+    return output.getvalue()
+
+#endregion
+
+#region [ Controller State Store ]
+
+class ControllerStateStore(object):
+    """
+    Keeps the last row of each device csv file of an input data folder and
+    buffers the rows appended during a step, so that a step costs the same
+    whether the run has 30 frames or 100,000.
+
+    lastRow() returns a copy of the cached last row (read from the end of
+    the file the first time), append() queues a new row and flush() writes
+    all rows queued for a file with a single write.
+    """
+
+    def __init__(self, inputDataFolder):
+        self.inputDataFolder = inputDataFolder
+        self.lastRows = {}
+        self.fileSizes = {}
+        self.pending = {}
+
+    def fileName(self, name):
+        return os.path.join(self.inputDataFolder, name + ".csv")
+
+    def lastRow(self, name):
+        fileName = self.fileName(name)
+        size = os.path.getsize(fileName)
+
+        # the cache is only trusted while nobody else has touched the file
+        if name not in self.lastRows or self.fileSizes.get(name) != size:
+            self.lastRows[name] = readLastRow(fileName)
+            self.fileSizes[name] = size
+
+        if name in self.pending:
+            return list(self.pending[name][-1][1])
+        return list(self.lastRows[name])
+
+    def append(self, name, row):
+        text = formatRow(row)
+        self.pending.setdefault(name, []).append((text, next(csv.reader([text]))))
+
+    def flush(self, timer=None):
+        for name, rows in self.pending.items():
+            fileName = self.fileName(name)
+            started = default_timer()
+            with open(fileName, 'a') as WriteFile:
+                WriteFile.write(''.join([text for text, row in rows]))
+            if timer is not None:
+                timer.add('append ' + name, default_timer() - started)
+            self.lastRows[name] = rows[-1][1]
+            self.fileSizes[name] = os.path.getsize(fileName)
+        self.pending = {}
+
+    def reset(self):
+        self.lastRows = {}
+        self.fileSizes = {}
+        self.pending = {}
+
+#endregion
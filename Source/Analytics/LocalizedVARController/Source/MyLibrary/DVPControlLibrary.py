@@ -0,0 +1,410 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+from contextlib import contextmanager
+import os,sys,pdb
+
+import psspy # the caller is responsible for putting PSS\E (or a compatible backend) on the path
+from psspy import _i,_f # importing the default integer and float values used by PSS\E(every API uses them)
+from ControllerStateStore import ControllerStateStore
+from NetworkSnapshot import NetworkMonitor
+from StepTimer import StepTimer, TimingFileName
+from VoltageSensitivity import VoltageSensitivity, TapControl, ShuntControl
+
+#endregion
+
+#region [ Farmville Model ]
+
+# the elements the controller works on; useModel puts those of another case in their place
+FarmvilleModel = {
+    'ScaleLoadAtBuses' : [314691,314692,314693,314694,314695],
+    'bus_num' : [314691,314692],
+    'gen_bus' : [315153,315154],
+    'shunt_bus' : [314521,314519],
+    'transformers' : [(314692,314691,'1'),(314692,314691,'2')], # (metered bus, other bus, circuit), the tap is on the metered side
+    }
+TransformerRatioChangeStep = 0.007
+CapBankMvar = 24.38 # This value is given by PSSE which is different from the design document
+ltcNames = ["TX4LTC_CTL","TX5LTC_CTL"] # the LTCs of transformers, in the same order
+
+def useModel(model=None):
+    """
+    Make ScaleLoadAtBuses, bus_num, gen_bus, shunt_bus and transformers
+    those of model, a dict with some of the keys of FarmvilleModel; the
+    Farmville elements stand in for the keys it leaves out.
+    """
+    global ScaleLoadAtBuses, bus_num, gen_bus, shunt_bus, transformers
+    model = dict(FarmvilleModel, **(model or {}))
+    ScaleLoadAtBuses = list(model['ScaleLoadAtBuses'])
+    bus_num = list(model['bus_num'])
+    gen_bus = list(model['gen_bus'])
+    shunt_bus = list(model['shunt_bus'])
+    transformers = [(int(metered), int(other), str(ckt)) for metered, other, ckt in model['transformers']]
+
+def currentModel():
+    return {'ScaleLoadAtBuses' : ScaleLoadAtBuses, 'bus_num' : bus_num, 'gen_bus' : gen_bus, 'shunt_bus' : shunt_bus, 'transformers' : transformers}
+
+useModel()
+
+#endregion
+
+#region[ Defined Functions ]
+
+@contextmanager
+def silence(file_object=None):
+    """
+    Discard stdout (i.e. write to null device) or
+    optionally write to given file-like object.
+    """
+    if file_object is None:
+        file_object = open(os.devnull, 'w')
+
+    old_stdout = sys.stdout
+    try:
+        sys.stdout = file_object
+        yield
+    finally:
+        sys.stdout = old_stdout
+
+def silencePsse():
+    """
+    Send the progress, alert and prompt output of PSS\E to the null device,
+    e.g. in pool processes nobody reads.
+    """
+    psspy.progress_output(6,'',[0,0])
+    psspy.alert_output(6,'',[0,0])
+    psspy.prompt_output(6,'',[0,0])
+
+def change_load(load_bus,percentage):
+    psspy.bsys(0,0,[0.0,0.0],0,[],len(load_bus),load_bus,0,[],0,[])
+    psspy.scal(sid = 0,all = 0, apiopt = 0,status1 = 2, status3 = 1, status4 = 1, scalval1 = percentage)
+
+def changeTxTap(TransformerNumber, ratio):
+    if TransformerNumber in (4, 5):
+        metered, other, ckt = transformers[TransformerNumber - 4]
+        psspy.two_winding_chng_4(other,metered,ckt,[_i,_i,_i,_i,_i,_i,_i,_i,other,_i,_i,1,_i,_i,_i],[_f,_f,_f,_f,_f,_f,ratio,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f],["",""])
+    else:
+        print("-------------------------------------------------------------")
+        print("Cannot change Tx Ratio")
+        print("Function: dscn")
+        print("-------------------------------------------------------------")
+        pdb.set_trace()
+
+def aloadreal(sid,flag,string):
+    ierr, iarray = psspy.aloadreal(sid,flag,string)
+    if ierr:
+      print("-------------------------------------------------------------")
+      print("Cannot get load real values")
+      print("Function: aloadreal")
+      print("Error Code: " + str(ierr))
+      print("-------------------------------------------------------------")
+      pdb.set_trace()
+    return iarray
+
+def brnflo(ibus,jbus,ck):
+    ierr, cmpval = psspy.brnflo(ibus,jbus,ck)
+    if ierr == 3:
+      return cmpval
+    if ierr:
+      print("-------------------------------------------------------------")
+      print("Cannot get branch flow data.")
+      print("Function: brnflo")
+      print("Error Code: " + str(ierr))
+      print("-------------------------------------------------------------")
+      pdb.set_trace()
+    return cmpval
+
+def amachreal(sid,flag,string):
+    ierr, iarray = psspy.amachreal(sid,flag,string)
+    if ierr:
+      print("-------------------------------------------------------------")
+      print("Cannot get machine real values")
+      print("Function: amachreal")
+      print("Error Code: " + str(ierr))
+      print("-------------------------------------------------------------")
+      pdb.set_trace()
+    return iarray
+
+def switchOffCap(shunt_bus_num):
+    psspy.shunt_data(shunt_bus_num,r"""1""",1,[_f, 0])
+
+def switchOnCap(shunt_bus_num):
+    psspy.shunt_data(shunt_bus_num,r"""1""",1,[_f, CapBankMvar])
+
+def parseControlArguments(argv):
+    """
+    Read the control variables sent by the C# adapter. argv has the same
+    layout as sys.argv of DVPScaleLoad.py (script name first).
+    """
+    controls = {
+        'SubstationName' : [],
+        'TransformerToControl' : [],
+        'Control' : [],
+        'CapSubstationName' : [],
+        'CapbankToControl' : [],
+        'CapControl' : [],
+        'NcTrip' : [0]*2,
+        'NcClose' : [0]*2,
+        }
+
+    for i in range(0,len(argv)):
+        if argv[i] == "Decision":
+            controls['SubstationName'].append(argv[i+1])
+            controls['TransformerToControl'].append(argv[i+2]) ## example: TransformerToControl.append("TX4LTC_CTL")
+            controls['Control'].append(argv[i+3]) ##Control.append("RAISE")
+
+        if argv[i] == "|CapControl":
+            controls['CapSubstationName'] = argv[i+1]
+            controls['CapbankToControl'] = argv[i+2]
+            controls['CapControl'] = argv[i+3]
+
+    controls['inputDataFolder'] = argv[-10]
+    controls['ConsecTap'] = argv[-9]
+    controls['ConsecCap'] = argv[-8]
+    controls['Ncdel'] = argv[-7]
+    controls['Ntdel'] = argv[-6]
+    controls['testCaseName'] = argv[-5]
+    controls['NcTrip'][0] = argv[-4]
+    controls['NcTrip'][1] = argv[-3]
+    controls['NcClose'][0] = argv[-2]
+    controls['NcClose'][1] = argv[-1]
+    return controls
+
+def createNetworkMonitor():
+    # the ends of the transformers are monitored too, the Farmville ones are both in bus_num
+    buses = bus_num + shunt_bus
+    for metered, other, ckt in transformers:
+        buses += [bus for bus in (metered, other) if bus not in buses]
+    return NetworkMonitor(buses, gen_bus, transformers)
+
+def createVoltageSensitivity(monitor, capSubstationNames):
+    """
+    Sensitivities of the monitored voltages to the two LTCs (per unit ratio)
+    and the capbanks at shunt_bus (per MVAr).
+    """
+    controls = []
+    for i in range(0,len(transformers)):
+        controls.append(TapControl(ltcNames[i], monitor, transformers[i], TransformerRatioChangeStep))
+    for i in range(0,len(shunt_bus)):
+        controls.append(ShuntControl(capSubstationNames[i], shunt_bus[i], CapBankMvar))
+    return VoltageSensitivity(monitor, controls)
+
+def candidateActions(capSubstationNames):
+    """
+    The decisions the controller can send, as {action: {control: change}},
+    with the same direction conventions as runControlStep.
+    """
+    actions = {}
+    for transformer in ltcNames:
+        actions[transformer + " RAISE"] = {transformer : -TransformerRatioChangeStep}
+        actions[transformer + " LOWER"] = {transformer : TransformerRatioChangeStep}
+    for name in capSubstationNames:
+        actions[name + " CLOSE"] = {name : CapBankMvar}
+        actions[name + " TRIP"] = {name : -CapBankMvar}
+    return actions
+
+def lookaheadActions(capSubstationNames):
+    """
+    Every action a frame can take, named as in candidateActions, plus NONE.
+    """
+    return ["NONE"] + sorted(candidateActions(capSubstationNames))
+
+def applyAction(action, ratio, capSubstationNames):
+    """
+    Apply one action of lookaheadActions to the case in memory; ratio holds
+    the present ratios of the LTCs.
+    """
+    if action == "NONE":
+        return
+    device, control = action.rsplit(" ", 1)
+    if device in ltcNames:
+        index = ltcNames.index(device)
+        if control == "RAISE":
+            changeTxTap(4 + index, ratio[index] - TransformerRatioChangeStep)
+        else:
+            changeTxTap(4 + index, ratio[index] + TransformerRatioChangeStep)
+    elif control == "CLOSE":
+        switchOnCap(shunt_bus[capSubstationNames.index(device)])
+    else:
+        switchOffCap(shunt_bus[capSubstationNames.index(device)])
+
+def runControlStep(controls, percentage, capSubstationNames, loadCase=True, saveCase=True, store=None, monitor=None, timer=None):
+    """
+    Apply one frame of controller decisions to the PSS\E case, solve it and
+    record the measurements in the csv files of the input data folder.
+
+    With loadCase/saveCase set to False the case already in memory is used
+    and left unsaved, which is how the persistent worker runs the frames.
+    A ControllerStateStore kept between calls saves re-reading the last row
+    of each device file, and a NetworkMonitor kept between calls lets the
+    measurements of the previous solve stand in for the ones read before
+    the decisions are applied (only the load was scaled since). Returns a dict of the measurements, or None if the
+    system collapses.
+
+    The time of each phase goes to timer (a StepTimer, by default the one
+    of TimingFileName in the input data folder), which writes the record of
+    the frame before returning.
+    """
+    inputDataFolder = controls['inputDataFolder']
+    if store is None or store.inputDataFolder != inputDataFolder:
+        store = ControllerStateStore(inputDataFolder)
+    if monitor is None:
+        monitor = createNetworkMonitor()
+    if timer is None:
+        timer = StepTimer(os.path.join(inputDataFolder, TimingFileName))
+    testCaseName = controls['testCaseName']
+    TransformerToControl = controls['TransformerToControl']
+    Control = controls['Control']
+    CapSubstationName = controls['CapSubstationName']
+    CapControl = controls['CapControl']
+    NcTrip = controls['NcTrip']
+    NcClose = controls['NcClose']
+
+    # Load the PSSE save case
+    savecase = (testCaseName)
+    if loadCase:
+        with timer.phase('case'):
+            psspy.case(testCaseName)
+            psspy.save(savecase)
+        monitor.reset()
+
+    # determine the ratio and power flow of transformers
+    with timer.phase('extract'):
+        snapshot = monitor.lastSnapshot
+        if snapshot is None:
+            snapshot = monitor.takeSnapshot()
+        ratio = snapshot['ratio'].tolist()
+        fromflow = snapshot['flow'].tolist()
+
+        # Determine the Load Buses to scale up the load
+        psspy.bsys(0,0,[ 0.2, 999.],0,[],len(ScaleLoadAtBuses),ScaleLoadAtBuses,0,[],0,[])
+        ierr,load_bus = psspy.alodbusint(0,1,['NUMBER'])
+        load_bus = load_bus[0]
+
+    def lastRow(name):
+        with timer.phase('read ' + name):
+            return store.lastRow(name)
+
+    # determine which transformer should be controlled and how to control.
+    tapChangeDirection = []
+    for i in range(0,2):
+        tapChangeDirection.append(0)
+    if TransformerToControl:
+        for i in range(0,len(TransformerToControl)):
+           if TransformerToControl[i] == "TX4LTC_CTL":
+               TransformerToControlIndex = 4
+               TransformerRatioIndex = 0
+           elif TransformerToControl[i] == "TX5LTC_CTL":
+               TransformerToControlIndex = 5
+               TransformerRatioIndex = 1
+           if Control[i] == "RAISE":
+               ratio[TransformerRatioIndex] = ratio[TransformerRatioIndex] - TransformerRatioChangeStep
+               tapChangeDirection[TransformerRatioIndex] = 1
+           else:
+               ratio[TransformerRatioIndex] = ratio[TransformerRatioIndex] + TransformerRatioChangeStep
+               tapChangeDirection[TransformerRatioIndex] = -1
+           with timer.phase('control'):
+               changeTxTap(TransformerToControlIndex,ratio[TransformerRatioIndex])
+
+    # determine which Capbank should be controlled and how to control.
+    SubstationIndex = []
+    if CapSubstationName in capSubstationNames:
+        SubstationIndex = capSubstationNames.index(CapSubstationName)
+        with timer.phase('control'):
+            if CapControl == "CLOSE":
+                switchOnCap(shunt_bus[SubstationIndex])
+            else:
+                switchOffCap(shunt_bus[SubstationIndex])
+
+    # write down the new tap ratio into csv files
+    store.append("transformerRatio", ratio)
+
+    # run load flow
+    with timer.phase('fdns'):
+        psspy.fdns()
+    N = psspy.solved()
+    solution = {'solved' : N, 'iterations' : psspy.iterat(), 'totalMismatch' : abs(psspy.sysmsm())} # total system mismatch, MVA
+
+    if N != 0:
+        monitor.lastSnapshot = None
+        store.flush(timer)
+        timer.record(**solution)
+        return None
+
+    # measure the voltages at Farm and capbank buses and the Gen output in one go
+    with timer.phase('measure'):
+        snapshot = monitor.takeSnapshot()
+    bus_voltage = [monitor.busVoltage(snapshot, bus) for bus in bus_num]
+    shunt_bus_voltage = [monitor.busVoltage(snapshot, bus) for bus in shunt_bus]
+    Pgen = snapshot['pgen'].tolist()
+    Qgen = snapshot['qgen'].tolist()
+
+    # save measurements to Transformer files
+    for i in range(0,len(bus_num)):
+
+        # copy the previous line and modify the parameters need to be changed
+        k = i + 1
+        newLine = lastRow("transformer" + str(k))
+        newLine[10] = str(int(newLine[10]) + tapChangeDirection[i])  # add or minus the number of tap
+        newLine[13] = fromflow[i].real  # updates real power flow
+        newLine[15] = fromflow[i].imag  # updates reactive power flow
+        newLine[18] = bus_voltage[0]*115 # updates voltage
+        store.append("transformer" + str(k), newLine)
+
+    # save measurements to Capbank file
+    for i in range(0,len(bus_num)):
+        k = i + 1
+        newLine = lastRow("CapBank" + str(k))  # copy a new line of data
+        if i == SubstationIndex:
+            newLine[14] = CapControl
+        newLine[21] = shunt_bus_voltage[i]*115
+        newLine[28] = NcTrip[i]
+        newLine[29] = NcClose[i]
+        store.append("CapBank" + str(k), newLine)
+
+    # save the Delay information into Substation Information File
+    newLine = lastRow("SubInformation")  # copy a new line of data
+    newLine[8] = Pgen[0]
+    newLine[9] = Qgen[0]
+    newLine[10] = Pgen[1]
+    newLine[11] = Qgen[1]
+    newLine[12] = controls['ConsecTap']
+    newLine[13] = controls['ConsecCap']
+    newLine[14] = controls['Ncdel']
+    newLine[15] = controls['Ntdel']
+    store.append("SubInformation", newLine)
+
+    # save the power flow difference into a new file
+    newLine = []
+    for i in range(0,len(bus_num)):
+        newLine.append(fromflow[i].real)
+        newLine.append(fromflow[i].imag)
+    newLine.append(newLine[0] - newLine[2])
+    newLine.append(newLine[1] - newLine[3])
+    store.append("pfDifference", newLine)
+
+    # one write per file for the whole step
+    store.flush(timer)
+
+    # scale up the load
+    with timer.phase('scal'):
+        change_load(load_bus,percentage)
+    if saveCase:
+        with timer.phase('save'):
+            psspy.save(savecase)
+    with timer.phase('extract'):
+        load = aloadreal(0,1,'TOTALACT')
+        load = load[0]
+    timer.record(**solution)
+
+    return {
+        'ratio' : list(ratio),
+        'fromflow' : [[flow.real, flow.imag] for flow in fromflow],
+        'bus_voltage' : list(bus_voltage),
+        'shunt_bus_voltage' : shunt_bus_voltage,
+        'Pgen' : list(Pgen),
+        'Qgen' : list(Qgen),
+        'load' : load,
+        }
+
+#endregion
@@ -0,0 +1,225 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,sys,json,shutil,socket,tempfile,traceback
+
+import psspy # the caller is responsible for putting PSS\E (or a compatible backend) on the path
+import DVPControlLibrary as dvplib
+from ControllerStateStore import ControllerStateStore
+from LookaheadEvaluator import LookaheadEvaluator
+from StepTimer import StepTimer
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+#endregion
+
+#region [ Persistent Worker ]
+
+# Protocol (one request per line, utf-8, over a local TCP socket):
+#   <arg1>\t<arg2>\t...\t<argN>  run one frame; the fields are the arguments
+#                                 DVPScaleLoad.py would receive on its command line
+#   SCORE                         predicted monitored voltages for every candidate
+#                                 LTC/capbank action at the case in memory, from the
+#                                 cached voltage sensitivities
+#   LOOKAHEAD[\t<seconds>]        simulate every candidate action of the next frame
+#                                 in parallel processes; the ones not done within
+#                                 the given frame period are answered with null and
+#                                 their processes restarted
+#   SAVE                          save the in-memory case back to the test case file
+#   RELOAD                        reload the test case file on the next frame
+#   STOP                          save the case and shut the worker down
+# Every request is answered with one line of JSON.
+
+DEFAULT_ADDRESS = ('127.0.0.1', 50100)
+
+class DVPControlWorker(object):
+    """
+    Long-lived simulation worker for the Localized VAR Controller. PSS\E is
+    initialized and the test case is loaded once; each frame then only
+    applies the decisions, solves and records the measurements.
+
+    As the one-shot script, which reloads the last saved case, a frame that
+    collapses leaves the case as it was before its decisions: the case is
+    saved to a scratch file before a frame's decisions are applied (only if
+    a frame solved since) and reloaded from it on a collapse.
+    """
+
+    def __init__(self, percentage, capSubstationNames):
+        self.percentage = percentage
+        self.capSubstationNames = capSubstationNames
+        self.testCaseName = None
+        self.store = None
+        self.timer = None
+        self.monitor = dvplib.createNetworkMonitor()
+        self.sensitivity = dvplib.createVoltageSensitivity(self.monitor, capSubstationNames)
+        self.lookahead = None
+        self.folder = tempfile.mkdtemp(prefix='worker')
+        self.restoreCase = None # the case as it was before the decisions of this frame
+
+    def runFrame(self, argv):
+        controls = dvplib.parseControlArguments(argv)
+
+        # the device files stay cached between frames, the timings are kept with them
+        if self.store is None or self.store.inputDataFolder != controls['inputDataFolder']:
+            self.store = ControllerStateStore(controls['inputDataFolder'])
+            self.timer = StepTimer(os.path.join(controls['inputDataFolder'], dvplib.TimingFileName))
+        self.timer.reset() # the time between frames is not part of the frame
+
+        # load the case only when the run starts or the test case changes
+        loadCase = controls['testCaseName'] != self.testCaseName
+        if loadCase:
+            self.testCaseName = None
+            with self.timer.phase('case'):
+                ierr = psspy.case(controls['testCaseName'])
+            if ierr:
+                raise IOError("Cannot open the test case %s (error code %d)" % (controls['testCaseName'], ierr))
+            self.testCaseName = controls['testCaseName']
+            self.restoreCase = self.testCaseName
+            self.monitor.reset()
+            self.sensitivity.reset()
+        elif self.restoreCase is None:
+            with self.timer.phase('save'):
+                self.restoreCase = os.path.join(self.folder, 'lastSolved' + os.path.splitext(self.testCaseName)[1])
+                psspy.save(self.restoreCase)
+
+        output = StringIO()
+        with dvplib.silence(output):
+            measurements = dvplib.runControlStep(controls, self.percentage, self.capSubstationNames, loadCase=False, saveCase=False, store=self.store, monitor=self.monitor, timer=self.timer)
+
+        if measurements is None:
+            self.restore()
+            return {'solved' : False, 'message' : '### system collapses ###'}
+        self.restoreCase = None # the load was scaled, the next frame saves the case first
+        measurements['solved'] = True
+        return measurements
+
+    def restore(self):
+        """
+        Reload the case as it was before the decisions of the frame that
+        collapsed; the measurements of the monitor and the sensitivities
+        belong to the diverged case.
+        """
+        ierr = psspy.case(self.restoreCase)
+        if ierr:
+            self.testCaseName = None # the next frame loads the test case again
+        self.monitor.reset()
+        self.sensitivity.reset()
+
+    def score(self):
+        if self.testCaseName is None:
+            return {'error' : 'no test case loaded, run a frame first'}
+
+        # only the columns the case has drifted away from are recomputed
+        output = StringIO()
+        with dvplib.silence(output):
+            refreshed = self.sensitivity.refresh()
+        if refreshed is None:
+            return {'solved' : False, 'message' : '### system collapses ###'}
+
+        candidates = dvplib.candidateActions(self.capSubstationNames)
+        return {
+            'solved' : True,
+            'buses' : self.monitor.buses,
+            'voltages' : self.sensitivity.voltages,
+            'refreshed' : refreshed,
+            'actions' : self.sensitivity.score(self.sensitivity.voltages, candidates),
+            }
+
+    def evaluateActions(self, timeout=None):
+        if self.testCaseName is None:
+            return {'error' : 'no test case loaded, run a frame first'}
+
+        # the ratios the next frame starts from, as in runControlStep
+        snapshot = self.monitor.lastSnapshot
+        if snapshot is None:
+            snapshot = self.monitor.takeSnapshot()
+
+        if self.lookahead is None:
+            self.lookahead = LookaheadEvaluator(self.capSubstationNames)
+        output = StringIO()
+        with dvplib.silence(output):
+            results = self.lookahead.evaluate(self.testCaseName, snapshot['ratio'].tolist(), timeout)
+        return {'buses' : self.monitor.buses, 'machineBuses' : self.monitor.machineBuses, 'actions' : results}
+
+    def close(self):
+        if self.lookahead is not None:
+            self.lookahead.close()
+            self.lookahead = None
+        shutil.rmtree(self.folder, True)
+
+    def save(self):
+        if self.testCaseName is not None:
+            psspy.save(self.testCaseName)
+            self.restoreCase = self.testCaseName
+
+    def handle(self, line):
+        if line == 'SAVE':
+            self.save()
+            return {'saved' : self.testCaseName}
+        if line.split('\t')[0] == 'LOOKAHEAD':
+            fields = line.split('\t')
+            return self.evaluateActions(float(fields[1]) if len(fields) > 1 else None)
+        if line == 'SCORE':
+            return self.score()
+        if line == 'RELOAD':
+            self.testCaseName = None
+            self.store = None
+            return {'reloaded' : True}
+        if line == 'STOP':
+            self.save()
+            return {'stopped' : True}
+
+        # the script name keeps the layout identical to sys.argv
+        return self.runFrame(['DVPScaleLoad.py'] + line.split('\t'))
+
+    def serve(self, address=DEFAULT_ADDRESS):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(address)
+        listener.listen(1)
+
+        try:
+            stopped = False
+            while not stopped:
+                connection, client = listener.accept()
+                reader = connection.makefile('rb')
+                try:
+                    for raw in reader:
+                        line = raw.decode('utf-8').rstrip('\r\n')
+                        if not line:
+                            continue
+                        try:
+                            reply = self.handle(line)
+                        except Exception:
+                            reply = {'error' : traceback.format_exc()}
+                        connection.sendall((json.dumps(reply) + '\n').encode('utf-8'))
+                        if line == 'STOP':
+                            stopped = True
+                            break
+                finally:
+                    reader.close()
+                    connection.close()
+        finally:
+            listener.close()
+            self.close()
+
+def parseWorkerAddress(argv):
+    """
+    Return the address given after --worker on the command line, e.g.
+    --worker 50100 or --worker 127.0.0.1:50100, or None if not in worker mode.
+    """
+    if '--worker' not in argv:
+        return None
+    index = argv.index('--worker')
+    if index + 1 >= len(argv):
+        return DEFAULT_ADDRESS
+    value = argv[index + 1]
+    if ':' in value:
+        host, port = value.rsplit(':', 1)
+        return (host, int(port))
+    return (DEFAULT_ADDRESS[0], int(value))
+
+#endregion
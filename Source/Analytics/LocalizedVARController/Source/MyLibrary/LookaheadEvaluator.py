@@ -0,0 +1,137 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,shutil,tempfile,time,threading,multiprocessing
+
+import psspy # the caller is responsible for putting PSS\E (or a compatible backend) on the path
+import DVPControlLibrary as dvplib
+
+#endregion
+
+#region [ Worker Process ]
+
+# every process of the pool keeps its own monitor; the case it watches is
+# reloaded for each candidate
+_monitor = None
+
+def _startProcess(model):
+    global _monitor
+    dvplib.silencePsse()
+    dvplib.useModel(model)
+    _monitor = dvplib.createNetworkMonitor()
+
+def _evaluate(caseFile, action, ratio, capSubstationNames):
+    """
+    Load the copy of the case, apply one candidate action and solve it.
+    """
+    started = time.time()
+    with dvplib.silence():
+        psspy.case(caseFile)
+        _monitor.reset()
+        dvplib.applyAction(action, ratio, capSubstationNames)
+        psspy.fdns()
+        solved = psspy.solved() == 0
+        if solved:
+            snapshot = _monitor.takeSnapshot()
+
+    result = {'action' : action, 'solved' : solved, 'elapsed' : time.time() - started}
+    if solved:
+        result['bus_pu'] = snapshot['bus_pu'].tolist()
+        result['qgen'] = snapshot['qgen'].tolist()
+    return result
+
+def _terminate(pool):
+    pool.terminate()
+    pool.join()
+
+#endregion
+
+#region [ Lookahead Evaluator ]
+
+class LookaheadEvaluator(object):
+    """
+    Simulates every candidate action of a frame side by side: each LTC
+    raise/lower, each capbank close/trip and doing nothing. The case in
+    memory is saved once to a temporary file and the candidates are solved
+    from it by a pool of processes, each running its own PSS\E.
+
+    Under Windows the processes re-import the main script, so it has to
+    keep its frame code under if __name__ == '__main__'.
+    """
+
+    def __init__(self, capSubstationNames, processes=None):
+        self.capSubstationNames = capSubstationNames
+        self.actions = dvplib.lookaheadActions(capSubstationNames)
+        self.processes = processes or min(len(self.actions), multiprocessing.cpu_count())
+        self.pool = None
+        self.stopping = [] # threads terminating the pools replaced after a timeout
+        self.folder = tempfile.mkdtemp(prefix='lookahead')
+        self.frame = 0
+
+    def start(self):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes, _startProcess, (dvplib.currentModel(),))
+
+    def restart(self):
+        """
+        Replace the pool at once: the new processes start PSS\E while the
+        caller goes on with the frame, and the old pool, with the processes
+        of unfinished candidates, is terminated in the background.
+        """
+        pool, self.pool = self.pool, None
+        self.start()
+        self.stopping = [thread for thread in self.stopping if thread.is_alive()]
+        thread = threading.Thread(target=_terminate, args=(pool,))
+        thread.daemon = True
+        thread.start()
+        self.stopping.append(thread)
+
+    def evaluate(self, testCaseName, ratio, timeout=None):
+        """
+        Evaluate all candidates from the case in memory, whose LTC ratios
+        are ratio. Returns {action: result}; a result holds solved, bus_pu
+        and qgen (ordered as the NetworkMonitor buses and machines), or is
+        None if it did not finish within timeout seconds. The processes of
+        unfinished candidates are terminated and the pool is replaced before
+        returning (see restart), so no solve of this frame outlives it.
+        """
+        self.start()
+        deadline = None if timeout is None else time.time() + timeout
+
+        # the processes read the case from disk, the case in memory is not touched;
+        # every frame saves its own copy, a backend may write it under another extension
+        self.frame += 1
+        frameFolder = os.path.join(self.folder, str(self.frame))
+        os.mkdir(frameFolder)
+        caseFile = os.path.join(frameFolder, 'lookahead' + os.path.splitext(testCaseName)[1])
+        psspy.save(caseFile)
+
+        pending = [(action, self.pool.apply_async(_evaluate, (caseFile, action, list(ratio), self.capSubstationNames))) for action in self.actions]
+        results = {}
+        timedOut = False
+        for action, pending_result in pending:
+            wait = None if deadline is None else max(deadline - time.time(), 0.0)
+            try:
+                results[action] = pending_result.get(wait)
+            except multiprocessing.TimeoutError:
+                results[action] = None
+                timedOut = True
+
+        if timedOut:
+            self.restart()
+        shutil.rmtree(frameFolder, True)
+        return results
+
+    def stop(self):
+        if self.pool is not None:
+            _terminate(self.pool)
+            self.pool = None
+        for thread in self.stopping:
+            thread.join()
+        self.stopping = []
+
+    def close(self):
+        self.stop()
+        shutil.rmtree(self.folder, True)
+
+#endregion
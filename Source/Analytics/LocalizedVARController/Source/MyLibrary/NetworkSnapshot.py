@@ -0,0 +1,104 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import numpy
+
+import psspy # the caller is responsible for putting PSS\E (or a compatible backend) on the path
+
+#endregion
+
+#region [ Network Snapshot ]
+
+class NetworkMonitor(object):
+    """
+    Defines the monitored element set of a case once and reads all of its
+    measurements with a handful of PSS\E calls per step.
+
+    buses        - bus numbers whose voltage (PU) is recorded
+    machineBuses - buses whose machines' O_PGEN/O_QGEN are recorded
+    transformers - (metered bus, other bus, circuit id) of two-winding
+                   transformers whose RATIO2 and flow at the metered bus
+                   are recorded; both buses must be in buses
+
+    takeSnapshot() returns a 0-d NumPy structured record with the fields
+    bus_pu, pgen, qgen, ratio and flow, each ordered as given above.
+    """
+
+    def __init__(self, buses, machineBuses, transformers, busSid=10, machineSid=11):
+        self.buses = list(buses)
+        self.machineBuses = list(machineBuses)
+        self.transformers = [(ibus, jbus, str(ckt).strip()) for ibus, jbus, ckt in transformers]
+        self.busSid = busSid
+        self.machineSid = machineSid
+        self.dtype = numpy.dtype([
+            ('bus_pu', 'f8', (len(self.buses),)),
+            ('pgen', 'f8', (len(self.machineBuses),)),
+            ('qgen', 'f8', (len(self.machineBuses),)),
+            ('ratio', 'f8', (len(self.transformers),)),
+            ('flow', 'c16', (len(self.transformers),)),
+            ])
+        self.lastSnapshot = None
+        self.defined = False
+
+    def reset(self):
+        """
+        Forget the subsystems and element order, e.g. after a new case is loaded.
+        """
+        self.lastSnapshot = None
+        self.defined = False
+
+    def define(self):
+        """
+        Create the subsystems and work out where each monitored element sits
+        in the arrays PSS\E returns. Only needs to run once per loaded case.
+        """
+        psspy.bsys(sid = self.busSid,numbus = len(self.buses), buses = self.buses)
+        psspy.bsys(sid = self.machineSid,numbus = len(self.machineBuses), buses = self.machineBuses)
+
+        ierr,number = psspy.abusint(self.busSid,1,['NUMBER'])
+        number = list(number[0])
+        self.busIndex = numpy.array([number.index(bus) for bus in self.buses])
+
+        ierr,number = psspy.amachint(self.machineSid,1,['NUMBER'])
+        number = list(number[0])
+        self.machineIndex = numpy.array([number.index(bus) for bus in self.machineBuses])
+
+        # ratios are read once per transformer, flows from both ends
+        ierr,ends = psspy.atrnint(self.busSid,2,1,2,1,['FROMNUMBER','TONUMBER'])
+        ierr,ids = psspy.atrnchar(self.busSid,2,1,2,1,['ID'])
+        keys = [(min(f, t), max(f, t), ckt.strip()) for f, t, ckt in zip(ends[0], ends[1], ids[0])]
+        self.ratioIndex = numpy.array([keys.index((min(i, j), max(i, j), ckt)) for i, j, ckt in self.transformers])
+
+        ierr,ends = psspy.atrnint(self.busSid,2,1,2,2,['FROMNUMBER','TONUMBER'])
+        ierr,ids = psspy.atrnchar(self.busSid,2,1,2,2,['ID'])
+        keys = [(f, t, ckt.strip()) for f, t, ckt in zip(ends[0], ends[1], ids[0])]
+        self.flowIndex = numpy.array([keys.index(key) for key in self.transformers])
+
+        self.defined = True
+
+    def takeSnapshot(self):
+        if not self.defined:
+            self.define()
+
+        snapshot = numpy.zeros((), dtype = self.dtype)
+
+        ierr,bus_voltage = psspy.abusreal(self.busSid,1,['PU'])
+        snapshot['bus_pu'] = numpy.asarray(bus_voltage[0])[self.busIndex]
+
+        ierr,machine_pq = psspy.amachreal(self.machineSid,1,['O_PGEN','O_QGEN'])
+        snapshot['pgen'] = numpy.asarray(machine_pq[0])[self.machineIndex]
+        snapshot['qgen'] = numpy.asarray(machine_pq[1])[self.machineIndex]
+
+        ierr,ratio = psspy.atrnreal(self.busSid,2,1,2,1,['RATIO2'])
+        snapshot['ratio'] = numpy.asarray(ratio[0])[self.ratioIndex]
+
+        ierr,flow = psspy.atrncplx(self.busSid,2,1,2,2,['PQ'])
+        snapshot['flow'] = numpy.asarray(flow[0])[self.flowIndex]
+
+        self.lastSnapshot = snapshot
+        return snapshot
+
+    def busVoltage(self, snapshot, bus):
+        return float(snapshot['bus_pu'][self.buses.index(bus)])
+
+#endregion
@@ -0,0 +1,120 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,csv,json
+import numpy
+
+import DVPControlLibrary as dvplib
+import ScenarioRunner
+
+#endregion
+
+#region [ Comparison ]
+
+# the run records of a data folder and the rows before the first frame
+RecordedFiles = [("transformer1",2),("transformer2",2),("CapBank1",2),("CapBank2",2),("SubInformation",2),("pfDifference",0),("transformerRatio",0)]
+
+def readRows(fileName):
+    with open(fileName) as ReadFile:
+        return [row for row in csv.reader(ReadFile)]
+
+def compareFile(recordedFile, replayedFile, skipRows, tolerance=1e-6):
+    """
+    Compare the frame rows of a recorded and a replayed device file cell by
+    cell. Returns the number of rows compared and, for every column that
+    differs, its largest numeric difference and how many rows differ.
+    """
+    recorded = readRows(recordedFile)
+    replayed = readRows(replayedFile)
+    header = recorded[0] if skipRows else []
+    rows = list(zip(recorded[skipRows:], replayed[skipRows:]))
+
+    columns = {}
+    for recordedRow, replayedRow in rows:
+        for index in range(0,min(len(recordedRow), len(replayedRow))):
+            try:
+                difference = abs(float(recordedRow[index]) - float(replayedRow[index]))
+                differs = difference > tolerance
+            except ValueError:
+                difference = 0.0
+                differs = recordedRow[index] != replayedRow[index]
+            if not differs:
+                continue
+            name = header[index] if index < len(header) else str(index)
+            column = columns.setdefault(name, {'max' : 0.0, 'rows' : 0})
+            column['max'] = max(column['max'], difference)
+            column['rows'] += 1
+    return {'rows' : len(rows), 'recorded' : len(recorded) - skipRows, 'replayed' : len(replayed) - skipRows, 'columns' : columns}
+
+def compareRecorded(recordedFolder, replayedFolder):
+    comparison = {}
+    for name, skipRows in RecordedFiles:
+        recordedFile = os.path.join(recordedFolder, name + ".csv")
+        replayedFile = os.path.join(replayedFolder, name + ".csv")
+        if os.path.isfile(recordedFile) and os.path.isfile(replayedFile):
+            comparison[name] = compareFile(recordedFile, replayedFile, skipRows)
+    return comparison
+
+#endregion
+
+#region [ Replay Benchmark ]
+
+def readTimings(fileName):
+    with open(fileName) as ReadFile:
+        return [json.loads(line) for line in ReadFile if line.strip()]
+
+def replay(scenario, outputFolder, repeat=1):
+    """
+    Replay the recorded decisions of a scenario repeat times through
+    runControlStep with the psspy backend in use, then compare the device
+    files of the last run with the recorded ones of the scenario's data
+    folder. Throughput counts the frames only; wall adds the preparation
+    of the data folder and the benchmark model.
+    """
+    records = []
+    elapsed = 0.0
+    frames = 0
+    benchmarks = []
+    for run in range(0,repeat):
+        summary = ScenarioRunner.runScenario(scenario, outputFolder, os.path.join(outputFolder, 'BenchmarkCache'))
+        benchmarks.append(summary['benchmark'])
+        inputDataFolder = os.path.join(outputFolder, scenario['name'], "Data")
+        records += readTimings(os.path.join(inputDataFolder, dvplib.TimingFileName))
+        elapsed += summary['elapsed']
+        frames += summary['frames']
+
+    report = {
+        'scenario' : scenario['name'],
+        'runs' : repeat,
+        'frames' : frames,
+        'collapsed' : summary['collapsed'],
+        'wall_fps' : frames / elapsed if elapsed else None,
+        'benchmark_hits' : benchmarks.count('hit'),
+        'benchmark_misses' : benchmarks.count('miss'),
+        }
+    if records:
+        totals = [record['total_ms'] for record in records]
+        report['fps'] = len(totals) / (sum(totals) / 1000.0)
+        report['latency_ms'] = dict(('p%d' % q, float(numpy.percentile(totals, q))) for q in (50, 90, 99))
+        report['latency_ms']['max'] = max(totals)
+        report['phases_p50_ms'] = dict((name, float(numpy.percentile([record['phases_ms'].get(name, 0.0) for record in records], 50))) for name in records[-1]['phases_ms'])
+        report['iterations_p50'] = float(numpy.percentile([record['iterations'] for record in records], 50))
+    report['comparison'] = compareRecorded(scenario['data'], inputDataFolder)
+    return report
+
+def printReport(report):
+    print('%s : %d frames in %d runs%s' % (report['scenario'], report['frames'], report['runs'], '' if report['collapsed'] is None else ', ### system collapses ### in frame %d' % report['collapsed']))
+    if 'fps' in report:
+        print('  throughput  %.1f frames/s (%.1f frames/s wall, benchmark model cache %d hits %d misses)' % (report['fps'], report['wall_fps'], report['benchmark_hits'], report['benchmark_misses']))
+        print('  latency     p50 %.2f ms  p90 %.2f ms  p99 %.2f ms  max %.2f ms' % (report['latency_ms']['p50'], report['latency_ms']['p90'], report['latency_ms']['p99'], report['latency_ms']['max']))
+        print('  fdns        p50 %.2f ms, %g iterations' % (report['phases_p50_ms'].get('fdns', 0.0), report['iterations_p50']))
+    for name, _ in RecordedFiles:
+        if name not in report['comparison']:
+            continue
+        comparison = report['comparison'][name]
+        print('  %-18s %d of %d recorded rows replayed' % (name, comparison['replayed'], comparison['recorded']))
+        for column in sorted(comparison['columns']):
+            difference = comparison['columns'][column]
+            print('      %-16s differs in %d rows, max %g' % (column, difference['rows'], difference['max']))
+
+#endregion
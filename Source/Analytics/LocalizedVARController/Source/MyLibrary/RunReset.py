@@ -0,0 +1,123 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,re,shutil
+from multiprocessing.pool import ThreadPool
+
+from StepTimer import TimingFileName
+
+#endregion
+
+#region [ Run Files ]
+
+# the device files keep their header row and the row of the initial state,
+# the other records of a run are removed
+DeviceFiles = ["transformer1.csv","transformer2.csv","CapBank1.csv","CapBank2.csv","SubInformation.csv"]
+RunFiles = ["pfDifference.csv","transformerRatio.csv",TimingFileName]
+HeaderRows = 2
+
+# frame files of the data folder (..._12.xml) and of the logs folder (..._12 Logs.xml)
+FramePattern = re.compile(r'_\d+( Logs)?\.xml$')
+
+FICLONE = 0x40049409 # Linux ioctl cloning a file on copy-on-write file systems (btrfs, xfs)
+
+#endregion
+
+#region [ Defined Functions ]
+
+def headerLength(fileName, rows=HeaderRows):
+    """
+    Byte offset of the end of the first rows of a file; only those rows are
+    read, whatever the size of the file.
+    """
+    length = 0
+    with open(fileName, 'rb') as ReadFile:
+        for i in range(0,rows):
+            length += len(ReadFile.readline())
+    return length
+
+def truncateDeviceFiles(inputDataFolder):
+    for name in DeviceFiles:
+        fileName = os.path.join(inputDataFolder, name)
+        if os.path.isfile(fileName):
+            length = headerLength(fileName)
+            with open(fileName, 'r+b') as WriteFile:
+                WriteFile.truncate(length)
+
+def frameFiles(folder):
+    return [os.path.join(folder, name) for name in os.listdir(folder) if FramePattern.search(name)]
+
+def removeFiles(fileNames, threads=8):
+    """
+    Remove files with a few threads, the deletes of a large folder mostly
+    wait on the file system.
+    """
+    if len(fileNames) < 2 * threads:
+        for fileName in fileNames:
+            os.remove(fileName)
+        return
+    pool = ThreadPool(threads)
+    try:
+        pool.map(os.remove, fileNames)
+    finally:
+        pool.close()
+        pool.join()
+
+def caseFile(caseName):
+    """
+    The file holding a case. The pure-Python backend keeps a case named
+    *.sav in the *.raw file next to it.
+    """
+    root, extension = os.path.splitext(caseName)
+    if extension.lower() == '.sav' and not os.path.isfile(caseName) and os.path.isfile(root + '.raw'):
+        return root + '.raw'
+    return caseName
+
+def cloneFile(source, target):
+    """
+    Copy a file, sharing its blocks with the source where the file system
+    supports it. A hard link is not used: PSS\E saves the test case in
+    place and would overwrite the benchmark through it.
+    """
+    if os.path.isfile(target):
+        os.remove(target)
+    try:
+        import fcntl
+        with open(source, 'rb') as ReadFile:
+            with open(target, 'wb') as WriteFile:
+                fcntl.ioctl(WriteFile.fileno(), FICLONE, ReadFile.fileno())
+        return
+    except (ImportError, IOError, OSError):
+        pass
+    shutil.copyfile(source, target)
+
+def copyCase(caseName, testCaseName):
+    """
+    Copy the benchmark case as the test case at file level. Returns False
+    if they are not of the same format, the copy then has to go through
+    PSS\E.
+    """
+    source = caseFile(caseName)
+    target = testCaseName
+    if source != caseName:
+        target = os.path.splitext(testCaseName)[0] + '.raw'
+    if os.path.splitext(source)[1].lower() != os.path.splitext(target)[1].lower():
+        return False
+    if os.path.abspath(source) != os.path.abspath(target):
+        cloneFile(source, target)
+    return True
+
+def resetRun(inputDataFolder, logsDataFolder, caseName, testCaseName):
+    """
+    Do what CleanData.py does without reading the records of the last run:
+    truncate the device files after their header rows, remove the frame,
+    log and run files and copy the benchmark case as the test case.
+    Returns False if the case still has to be copied through PSS\E.
+    """
+    truncateDeviceFiles(inputDataFolder)
+    fileNames = frameFiles(inputDataFolder) + frameFiles(logsDataFolder)
+    fileNames += [os.path.join(inputDataFolder, name) for name in RunFiles if os.path.isfile(os.path.join(inputDataFolder, name))]
+    removeFiles(fileNames)
+    return copyCase(caseName, testCaseName)
+
+#endregion
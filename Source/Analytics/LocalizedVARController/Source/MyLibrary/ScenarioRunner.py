@@ -0,0 +1,277 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,re,csv,glob,time,shutil,multiprocessing
+import xml.etree.ElementTree as ElementTree
+
+import psspy # the caller is responsible for putting PSS\E (or a compatible backend) on the path
+import DVPControlLibrary as dvplib
+from ControllerStateStore import ControllerStateStore
+from StepTimer import StepTimer
+from RunReset import DeviceFiles, RunFiles, headerLength, caseFile
+from BenchmarkCache import BenchmarkCache
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+#endregion
+
+#region [ Scenario Table ]
+
+# Columns of the scenario table (csv, one scenario per row, paths relative
+# to the table):
+#   name                 folder name of the scenario in the output folder
+#   data                 input data folder the device csv files are taken from
+#   benchmarkCase        case the benchmark model is created from
+#   benchmarkPercentage  load scaling (%) applied to create the benchmark model
+#   capsOff              1 to switch the capbanks off in the benchmark model
+#   percentage           load scaling (%) after every frame
+#   frames               number of frames to run
+#   capSubstationNames   the capbanks at shunt_bus, separated by ;
+#   decisions            Logs folder of a recorded run whose controller
+#                        decisions are replayed, empty for none
+# and, for a case other than the Farmville one (empty or left out for the
+# Farmville elements, see DVPControlLibrary.useModel):
+#   loadBuses            buses whose load is scaled, separated by ;
+#   buses                the two buses whose voltage goes to the device files
+#   genBuses             the two machine buses recorded in SubInformation
+#   capBuses             the buses of the capbanks of capSubstationNames
+#   transformers         the two LTCs TX4LTC_CTL;TX5LTC_CTL, each as
+#                        metered bus, other bus and circuit, e.g. 5 8 1
+
+ModelColumns = [('loadBuses','ScaleLoadAtBuses'),('buses','bus_num'),('genBuses','gen_bus'),('capBuses','shunt_bus'),('transformers','transformers')]
+
+def readModel(row):
+    model = {}
+    for column, key in ModelColumns:
+        value = (row.get(column) or '').strip()
+        if not value:
+            continue
+        items = [item.split() for item in value.split(';')]
+        if column == 'transformers':
+            model[key] = [(int(item[0]), int(item[1]), item[2]) for item in items]
+        else:
+            model[key] = [int(item[0]) for item in items]
+    return model
+
+def readScenarios(fileName):
+    folder = os.path.dirname(os.path.abspath(fileName))
+
+    def path(value):
+        value = value.strip()
+        if not value:
+            return None
+        return os.path.normpath(os.path.join(folder, value))
+
+    scenarios = []
+    with open(fileName) as ReadFile:
+        for row in csv.DictReader(ReadFile):
+            if not row['name'] or row['name'].startswith('#'):
+                continue
+            scenarios.append({
+                'name' : row['name'].strip(),
+                'data' : path(row['data']),
+                'benchmarkCase' : path(row['benchmarkCase']),
+                'benchmarkPercentage' : float(row['benchmarkPercentage']),
+                'capsOff' : row['capsOff'].strip() == '1',
+                'percentage' : float(row['percentage']),
+                'frames' : int(row['frames']),
+                'capSubstationNames' : [name.strip() for name in row['capSubstationNames'].split(';')],
+                'decisions' : path(row.get('decisions') or ''),
+                'model' : readModel(row),
+                })
+    return scenarios
+
+def readDecisions(logsDataFolder):
+    """
+    The arguments the C# adapter passed to DVPScaleLoad.py in each frame of
+    a recorded run, i.e. the LogMessage of its Logs files split on spaces,
+    in frame order.
+    """
+    frames = []
+    for fileName in glob.glob(os.path.join(logsDataFolder, "*Logs.xml")):
+        match = re.search(r'_(\d+) Logs\.xml$', fileName)
+        if match:
+            message = ElementTree.parse(fileName).getroot().get('LogMessage') or ''
+            frames.append((int(match.group(1)), message.split()))
+    frames.sort()
+    return [arguments for frame, arguments in frames]
+
+def readCounters(inputDataFolder):
+    """
+    The counters the C# adapter passed with each frame of a recorded run
+    (ConsecTap, ConsecCap, Ncdel, Ntdel, then NcTrip and NcClose of both
+    capbanks), from the frame files of its data folder, in frame order.
+    """
+    frames = []
+    for fileName in glob.glob(os.path.join(inputDataFolder, "*.xml")):
+        match = re.search(r'_(\d+)\.xml$', fileName)
+        if match:
+            root = ElementTree.parse(fileName).getroot()
+            information = root.find('SubstationInformation').attrib
+            capbanks = [capbank.attrib for capbank in root.find('ControlCapacitorBanks')]
+            counters = [information['ConsecTap'], information['ConsecCap'], information['Ncdel'], information['Ntdel']]
+            counters += [capbanks[0]['NcTrip'], capbanks[1]['NcTrip'], capbanks[0]['NcClose'], capbanks[1]['NcClose']]
+            frames.append((int(match.group(1)), counters))
+    frames.sort()
+    return [counters for frame, counters in frames]
+
+#endregion
+
+#region [ Scenario Runner ]
+
+def prepareData(sourceFolder, inputDataFolder):
+    """
+    Copy the device files of a data folder with only their header rows,
+    as CleanData.py leaves them.
+    """
+    os.makedirs(inputDataFolder)
+    for fileName in glob.glob(os.path.join(sourceFolder, "*.csv")):
+        name = os.path.basename(fileName)
+        if name in RunFiles:
+            continue
+        target = os.path.join(inputDataFolder, name)
+        if name in DeviceFiles:
+            with open(fileName, 'rb') as ReadFile:
+                header = ReadFile.read(headerLength(fileName))
+            with open(target, 'wb') as WriteFile:
+                WriteFile.write(header)
+        else:
+            shutil.copy(fileName, target)
+
+def createBenchmark(scenario, testCaseName):
+    """
+    Create the benchmark model as DVPScaleLoad_CreateBenchMarkModel.py does
+    and save it as the test case. Returns False if it does not solve.
+    """
+    ierr = psspy.case(scenario['benchmarkCase'])
+    if ierr:
+        raise IOError("Cannot open the benchmark case %s (error code %d)" % (scenario['benchmarkCase'], ierr))
+    dvplib.change_load(dvplib.ScaleLoadAtBuses, scenario['benchmarkPercentage'])
+    if scenario['capsOff']:
+        for shunt_bus_num in dvplib.shunt_bus:
+            dvplib.switchOffCap(shunt_bus_num)
+    psspy.fdns()
+    if psspy.solved() != 0:
+        return False
+    psspy.save(testCaseName)
+    return True
+
+def benchmarkParameters(scenario):
+    """
+    Everything besides the source case that createBenchmark depends on.
+    """
+    return {
+        'benchmarkPercentage' : scenario['benchmarkPercentage'],
+        'capsOff' : scenario['capsOff'],
+        'ScaleLoadAtBuses' : dvplib.ScaleLoadAtBuses,
+        'shunt_bus' : dvplib.shunt_bus,
+        'solution' : 'fdns',
+        }
+
+def runScenario(scenario, outputFolder, cacheFolder=None):
+    """
+    Run one scenario in its own folder of outputFolder, holding its copy of
+    the device files (Data) and of the case. Returns a summary of the run.
+    With a cacheFolder the benchmark model is taken from a BenchmarkCache
+    there when it was derived before.
+    """
+    started = time.time()
+    dvplib.useModel(scenario.get('model'))
+    scenarioFolder = os.path.join(outputFolder, scenario['name'])
+    inputDataFolder = os.path.join(scenarioFolder, "Data")
+    if os.path.isdir(scenarioFolder):
+        shutil.rmtree(scenarioFolder)
+    prepareData(scenario['data'], inputDataFolder)
+    testCaseName = os.path.join(scenarioFolder, scenario['name'] + os.path.splitext(scenario['benchmarkCase'])[1])
+
+    summary = {'name' : scenario['name'], 'frames' : 0, 'collapsed' : None, 'measurements' : None, 'benchmark' : None}
+    output = StringIO()
+    with dvplib.silence(output):
+        cache = None if cacheFolder is None else BenchmarkCache(cacheFolder)
+        if cache is not None:
+            # the key hashes the case, a missing one fails as in createBenchmark
+            if not os.path.isfile(caseFile(scenario['benchmarkCase'])):
+                raise IOError("Cannot open the benchmark case %s (no such file)" % scenario['benchmarkCase'])
+            key = cache.key(scenario['benchmarkCase'], benchmarkParameters(scenario))
+        if cache is not None and cache.fetch(key, testCaseName):
+            summary['benchmark'] = 'hit'
+        else:
+            if not createBenchmark(scenario, testCaseName):
+                summary['collapsed'] = 0
+                summary['elapsed'] = time.time() - started
+                return summary
+            if cache is not None:
+                cache.store(key, testCaseName)
+                summary['benchmark'] = 'miss'
+
+        store = ControllerStateStore(inputDataFolder)
+        monitor = dvplib.createNetworkMonitor()
+        timer = StepTimer(os.path.join(inputDataFolder, dvplib.TimingFileName))
+
+        # a recorded run is replayed with the decisions and counters the C# adapter sent,
+        # otherwise the counters stay at their values in the device files
+        decisions = []
+        recordedCounters = []
+        if scenario['decisions']:
+            decisions = readDecisions(scenario['decisions'])
+            recordedCounters = readCounters(scenario['data'])
+        information = store.lastRow("SubInformation")[12:16]
+        capbanks = [store.lastRow("CapBank1"), store.lastRow("CapBank2")]
+        counters = information + [capbanks[0][28], capbanks[1][28], capbanks[0][29], capbanks[1][29]]
+
+        for frame in range(0,scenario['frames']):
+            arguments = decisions[frame] if frame < len(decisions) else []
+            if frame < len(recordedCounters):
+                counters = recordedCounters[frame]
+            controls = dvplib.parseControlArguments(['DVPScaleLoad.py'] + arguments + [inputDataFolder] + counters[:4] + [testCaseName] + counters[4:])
+            measurements = dvplib.runControlStep(controls, scenario['percentage'], scenario['capSubstationNames'], loadCase=(frame == 0), saveCase=False, store=store, monitor=monitor, timer=timer)
+            if measurements is None:
+                summary['collapsed'] = frame + 1
+                break
+            summary['frames'] = frame + 1
+            summary['measurements'] = measurements
+        psspy.save(testCaseName)
+
+    summary['elapsed'] = time.time() - started
+    return summary
+
+def _runScenario(arguments):
+    return runScenario(*arguments)
+
+def runScenarios(scenarios, outputFolder, processes=None, cacheFolder=None):
+    """
+    Run the scenarios side by side in a pool of processes, each with its own
+    PSS\E. Returns the summaries in the order of the scenarios. The
+    benchmark models are cached in cacheFolder, by default the
+    BenchmarkCache folder of outputFolder.
+    """
+    if not os.path.isdir(outputFolder):
+        os.makedirs(outputFolder)
+    processes = processes or min(len(scenarios), multiprocessing.cpu_count())
+    pool = multiprocessing.Pool(processes, dvplib.silencePsse)
+    try:
+        summaries = pool.map(_runScenario, [(scenario, outputFolder, cacheFolder or os.path.join(outputFolder, 'BenchmarkCache')) for scenario in scenarios], 1)
+    finally:
+        pool.close()
+        pool.join()
+    return summaries
+
+def writeSummary(summaries, fileName):
+    """
+    One row per scenario with the measurements of its last solved frame.
+    """
+    WriteFile = open(fileName, 'w')
+    w = csv.writer(WriteFile,delimiter = ',',lineterminator = '\n')
+    w.writerow(['name','benchmark','frames','collapsed','elapsed','ratio1','ratio2','bus_voltage1','bus_voltage2','load'])
+    for summary in summaries:
+        newLine = [summary['name'], summary['benchmark'], summary['frames'], summary['collapsed'], round(summary['elapsed'], 3)]
+        measurements = summary['measurements']
+        if measurements is not None:
+            newLine += measurements['ratio'] + measurements['bus_voltage'] + [sum(measurements['load'])]
+        w.writerow(newLine)
+    WriteFile.close()
+
+#endregion
@@ -0,0 +1,128 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+from contextlib import contextmanager
+from timeit import default_timer
+import os,sys,json
+import numpy
+
+#endregion
+
+#region [ Step Timer ]
+
+TimingFileName = "StepTimings.jsonl" # one record per frame, written to the input data folder
+
+class StepTimer(object):
+    """
+    Times the phases of a frame and appends one JSON line per frame to
+    fileName (nothing is written if it is None):
+
+        {"frame": 12, "total_ms": ..., "phases_ms": {"fdns": ..., ...},
+         "iterations": 3, "totalMismatch": 0.02}
+
+    The frames are numbered on from the last record of the file, also one
+    written by an earlier process. The p50/p99 roll-ups are computed from
+    the file afterwards (see summarize), so a frame only appends its own
+    record whether a process runs one frame or thousands.
+    """
+
+    def __init__(self, fileName=None):
+        self.fileName = fileName
+        self.frame = 0
+        if fileName is not None and os.path.isfile(fileName):
+            for record in readLastRecords(fileName, 1, 4096):
+                self.frame = record.get('frame', 0)
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.started = default_timer()
+
+    @contextmanager
+    def phase(self, name):
+        started = default_timer()
+        try:
+            yield
+        finally:
+            self.add(name, default_timer() - started)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record(self, **fields):
+        """
+        Close the frame: write its record and start the next one.
+        Additional fields (e.g. iterations, totalMismatch) are stored as given.
+        """
+        total = default_timer() - self.started
+        self.frame += 1
+        record = {
+            'frame' : self.frame,
+            'total_ms' : total * 1000.0,
+            'phases_ms' : dict((name, seconds * 1000.0) for name, seconds in self.phases.items()),
+            }
+        record.update(fields)
+
+        if self.fileName is not None:
+            with open(self.fileName, 'a') as WriteFile:
+                WriteFile.write(json.dumps(record, sort_keys=True) + '\n')
+        self.reset()
+        return record
+
+def readLastRecords(fileName, count, blockSize=65536):
+    """
+    The last count records of a JSONL file, read backwards from its end.
+    """
+    with open(fileName, 'rb') as ReadFile:
+        ReadFile.seek(0, os.SEEK_END)
+        position = ReadFile.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(blockSize, position)
+            position -= step
+            ReadFile.seek(position)
+            data = ReadFile.read(step) + data
+
+    lines = data.split(b'\n')
+    if position > 0:
+        lines = lines[1:] # the first one is cut
+    records = []
+    for line in lines[-count - 1:]:
+        line = line.strip()
+        if line:
+            records.append(json.loads(line.decode('utf-8')))
+    return records[-count:]
+
+def readRecords(fileName):
+    with open(fileName) as ReadFile:
+        for line in ReadFile:
+            if line.strip():
+                yield json.loads(line)
+
+def summarize(fileName, window=None):
+    """
+    p50/p99/max of every phase over a whole timing file, or over its last
+    window frames, in ms.
+    """
+    values = {}
+    records = readRecords(fileName) if window is None else readLastRecords(fileName, window)
+    for record in records:
+        phases = dict(record['phases_ms'])
+        phases['total'] = record['total_ms']
+        for name, value in phases.items():
+            values.setdefault(name, []).append(value)
+    return dict((name, (numpy.percentile(v, 50), numpy.percentile(v, 99), max(v), len(v))) for name, v in values.items())
+
+#endregion
+
+#region [ Main ]
+
+# usage: StepTimer.py StepTimings.jsonl [frames]
+# frames: only the last frames of the file, e.g. 1000
+if __name__ == '__main__':
+    summary = summarize(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print('%-28s %10s %10s %10s %8s' % ('phase', 'p50 ms', 'p99 ms', 'max ms', 'frames'))
+    for name in sorted(summary, key=lambda name: -summary[name][0]):
+        print('%-28s %10.3f %10.3f %10.3f %8d' % ((name,) + summary[name]))
+
+#endregion
@@ -0,0 +1,172 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import numpy
+
+import psspy # the caller is responsible for putting PSS\E (or a compatible backend) on the path
+from psspy import _i,_f # importing the default integer and float values used by PSS\E(every API uses them)
+
+#endregion
+
+#region [ Controls ]
+
+class TapControl(object):
+    """
+    Off-nominal ratio (RATIO2) of a two-winding transformer monitored by a
+    NetworkMonitor. Sensitivities are per unit of ratio.
+    """
+
+    def __init__(self, name, monitor, transformer, step):
+        self.name = name
+        self.monitor = monitor
+        self.transformer = transformer
+        self.index = monitor.transformers.index(transformer)
+        self.step = step
+
+    def ratio(self, snapshot):
+        return float(snapshot['ratio'][self.index])
+
+    def setRatio(self, ratio):
+        ibus, jbus, ckt = self.transformer
+        psspy.two_winding_chng_4(jbus,ibus,ckt,[_i,_i,_i,_i,_i,_i,_i,_i,jbus,_i,_i,1,_i,_i,_i],[_f,_f,_f,_f,_f,_f,ratio,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f,_f],["",""])
+
+    def apply(self, snapshot, delta):
+        self.setRatio(self.ratio(snapshot) + delta)
+
+    def revert(self, snapshot):
+        self.setRatio(self.ratio(snapshot))
+
+class ShuntControl(object):
+    """
+    Reactive injection of a capacitor bank, perturbed with a temporary fixed
+    shunt so the bank itself is never touched. Sensitivities are per MVAr.
+    """
+
+    def __init__(self, name, bus, step, shuntId='SE'):
+        self.name = name
+        self.bus = bus
+        self.step = step
+        self.shuntId = shuntId
+
+    def apply(self, snapshot, delta):
+        psspy.shunt_data(self.bus,self.shuntId,1,[0.0, delta])
+
+    def revert(self, snapshot):
+        psspy.purgshunt(self.bus,self.shuntId)
+
+#endregion
+
+#region [ Voltage Sensitivity ]
+
+class VoltageSensitivity(object):
+    """
+    Cached sensitivities of the monitored bus voltages to the controller's
+    actions, so candidate actions can be scored with a matrix-vector product
+    instead of a power flow.
+
+    Column j of matrix holds dV/du_j for control j, found by solving once
+    with the control moved by its step. Every column remembers the operating
+    point (monitored voltages and total load) it was computed at and is only
+    recomputed once the case has drifted away from it by more than
+    voltageTolerance (pu) or loadTolerance (fraction of the load); at most
+    columnsPerRefresh stale columns are recomputed per call so the cost is
+    spread over several frames. The prediction is linear, so machines that
+    reach their var limits because of an action are not foreseen.
+    """
+
+    def __init__(self, monitor, controls, voltageTolerance=0.005, loadTolerance=0.05, columnsPerRefresh=None):
+        self.monitor = monitor
+        self.controls = list(controls)
+        self.names = [control.name for control in self.controls]
+        self.voltageTolerance = voltageTolerance
+        self.loadTolerance = loadTolerance
+        self.columnsPerRefresh = columnsPerRefresh or len(self.controls)
+        self.matrix = numpy.zeros((len(monitor.buses), len(self.controls)))
+        self.references = [None] * len(self.controls)
+        self.voltages = None # monitored voltages of the last refresh, before any action
+
+    def reset(self):
+        """
+        Forget all columns, e.g. after a new case is loaded.
+        """
+        self.matrix[:] = 0.0
+        self.references = [None] * len(self.controls)
+        self.voltages = None
+
+    def operatingPoint(self, snapshot):
+        ierr,load = psspy.aloadreal(-1,1,'TOTALACT')
+        return snapshot['bus_pu'].copy(), sum(load[0])
+
+    def isStale(self, column, voltages, load):
+        reference = self.references[column]
+        if reference is None:
+            return True
+        referenceVoltages, referenceLoad = reference
+        if numpy.max(numpy.abs(voltages - referenceVoltages)) > self.voltageTolerance:
+            return True
+        return abs(load - referenceLoad) > self.loadTolerance * max(abs(referenceLoad), 1.0)
+
+    def staleColumns(self, snapshot):
+        voltages, load = self.operatingPoint(snapshot)
+        stale = [column for column in range(len(self.controls)) if self.isStale(column, voltages, load)]
+
+        # the columns never computed go first
+        stale.sort(key=lambda column: -1 if self.references[column] is None else 0)
+        return stale[:self.columnsPerRefresh]
+
+    def refresh(self, force=False):
+        """
+        Recompute the stale columns (all of them with force) at the case in
+        memory. Takes one power flow per column plus two, and leaves the case
+        solved with all controls back where they were. Returns the names of
+        the refreshed controls, or None if the case does not solve.
+        """
+        lastSnapshot = self.monitor.lastSnapshot
+        try:
+            psspy.fdns()
+            if psspy.solved() != 0:
+                return None
+            base = self.monitor.takeSnapshot()
+            self.voltages = base['bus_pu'].tolist()
+            columns = range(len(self.controls)) if force else self.staleColumns(base)
+            if not columns:
+                return []
+
+            point = self.operatingPoint(base)
+            for column in columns:
+                control = self.controls[column]
+                control.apply(base, control.step)
+                psspy.fdns()
+                solved = psspy.solved() == 0
+                if solved:
+                    moved = self.monitor.takeSnapshot()
+                control.revert(base)
+                if not solved:
+                    continue
+                self.matrix[:, column] = (moved['bus_pu'] - base['bus_pu']) / control.step
+                self.references[column] = point
+            psspy.fdns()
+            return [self.names[column] for column in columns]
+        finally:
+            # the measurements taken before the decisions stay those of the frame
+            self.monitor.lastSnapshot = lastSnapshot
+
+    def change(self, changes):
+        """
+        Predicted change of the monitored voltages for {control name: change
+        in control units}.
+        """
+        delta = numpy.zeros(len(self.controls))
+        for name, value in changes.items():
+            delta[self.names.index(name)] += value
+        return self.matrix.dot(delta)
+
+    def score(self, voltages, candidates):
+        """
+        Predicted monitored voltages for every candidate action, given as
+        {action: {control name: change}}.
+        """
+        voltages = numpy.asarray(voltages)
+        return dict((action, (voltages + self.change(changes)).tolist()) for action, changes in candidates.items())
+
+#endregion
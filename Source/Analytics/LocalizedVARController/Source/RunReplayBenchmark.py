@@ -0,0 +1,57 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,sys,json
+
+PSSE_LOCATION_34 = r"""C:\Program Files (x86)\PTI\PSSE34\PSSPY27"""
+PSSE_LOCATION_33 = r"""C:\Program Files (x86)\PTI\PSSE33\PSSBIN"""
+if os.path.isdir(PSSE_LOCATION_34):
+    sys.path.append(PSSE_LOCATION_34)
+    import psse34, psspy
+    DefaultScenario = 'Test1'
+    
+elif os.path.isdir(PSSE_LOCATION_33):
+    os.environ['PATH'] = PSSE_LOCATION_33 + ';' + os.environ['PATH']
+    sys.path.append(PSSE_LOCATION_33)
+    import psspy
+    DefaultScenario = 'Test1'
+    
+else:
+    # no PSS\E on this machine: use the pure-Python backend, cases are read from *.raw
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'TransmissionLineImpedanceCalculator', 'Source', 'Step_1_VI Acquisition'))
+    import SparsePsspy as psspy
+    sys.modules['psspy'] = psspy
+    DefaultScenario = 'IEEE118' # the Farmville cases of Test1-4 are only available as *.sav
+    
+MyLibraryLocation = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MyLibrary')
+sys.path.append(MyLibraryLocation)
+
+psspy.psseinit(80000)
+import ScenarioRunner
+import ReplayBenchmark
+
+#endregion
+
+#region [ Main ]
+
+# usage: RunReplayBenchmark.py [scenario] [case] [runs] [output folder]
+# replays the recorded controller frames of a scenario of Scenarios.csv
+# (Test1 by default, IEEE118 without PSS\E), optionally from another
+# benchmark case (an empty case keeps that of the scenario)
+
+if __name__ == '__main__':
+
+    sourceFolder = os.path.dirname(os.path.abspath(__file__))
+    name = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] else DefaultScenario
+    scenario = [scenario for scenario in ScenarioRunner.readScenarios(os.path.join(sourceFolder, 'Scenarios.csv')) if scenario['name'] == name][0]
+    if len(sys.argv) > 2 and sys.argv[2]:
+        scenario['benchmarkCase'] = os.path.abspath(sys.argv[2])
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    outputFolder = sys.argv[4] if len(sys.argv) > 4 else os.path.join(sourceFolder, 'ReplayBenchmark')
+
+    report = ReplayBenchmark.replay(scenario, outputFolder, runs)
+    ReplayBenchmark.printReport(report)
+    with open(os.path.join(outputFolder, scenario['name'] + 'Report.json'), 'w') as WriteFile:
+        json.dump(report, WriteFile, indent=1, sort_keys=True)
+
+#endregion
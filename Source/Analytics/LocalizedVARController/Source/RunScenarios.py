@@ -0,0 +1,54 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,sys
+
+PSSE_LOCATION_34 = r"""C:\Program Files (x86)\PTI\PSSE34\PSSPY27"""
+PSSE_LOCATION_33 = r"""C:\Program Files (x86)\PTI\PSSE33\PSSBIN"""
+if os.path.isdir(PSSE_LOCATION_34):
+    sys.path.append(PSSE_LOCATION_34)
+    import psse34, psspy
+    
+elif os.path.isdir(PSSE_LOCATION_33):
+    os.environ['PATH'] = PSSE_LOCATION_33 + ';' + os.environ['PATH']
+    sys.path.append(PSSE_LOCATION_33)
+    import psspy
+    
+else:
+    # no PSS\E on this machine: use the pure-Python backend, cases are read from *.raw
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'TransmissionLineImpedanceCalculator', 'Source', 'Step_1_VI Acquisition'))
+    import SparsePsspy as psspy
+    sys.modules['psspy'] = psspy
+    
+MyLibraryLocation = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MyLibrary')
+sys.path.append(MyLibraryLocation)
+
+psspy.psseinit(80000)
+import ScenarioRunner
+
+#endregion
+
+#region [ Main ]
+
+# usage: RunScenarios.py [scenario table] [output folder] [processes]
+# runs every scenario of the table side by side, one PSS\E per process
+
+if __name__ == '__main__':
+
+    scenarioTable = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Scenarios.csv')
+    outputFolder = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(os.path.abspath(scenarioTable)), 'ScenarioRuns')
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    scenarios = ScenarioRunner.readScenarios(scenarioTable)
+    summaries = ScenarioRunner.runScenarios(scenarios, outputFolder, processes)
+    ScenarioRunner.writeSummary(summaries, os.path.join(outputFolder, 'Summary.csv'))
+
+    for summary in summaries:
+        if summary['collapsed'] is None:
+            print('%s : %d frames in %.1f s' % (summary['name'], summary['frames'], summary['elapsed']))
+        else:
+            print('%s : ### system collapses ### in frame %d' % (summary['name'], summary['collapsed']))
+    benchmarks = [summary['benchmark'] for summary in summaries]
+    print('benchmark models : %d from the cache, %d derived' % (benchmarks.count('hit'), benchmarks.count('miss')))
+
+#endregion
@@ -1,47 +1,45 @@
 #region [ Environmental Setup ]
 from __future__ import with_statement
 from __future__ import division
-from contextlib import contextmanager
-import os,sys,glob,csv,pdb,pprint
+import os,sys
 
-PSSE_LOCATION_34 = r"""C:\Program Files (x86)\PTI\PSSE34\PSSPY27"""
-PSSE_LOCATION_33 = r"""C:\Program Files (x86)\PTI\PSSE33\PSSBIN"""
-if os.path.isdir(PSSE_LOCATION_34):
-    sys.path.append(PSSE_LOCATION_34)
-    import psse34, psspy
-    
-else:
-    os.environ['PATH'] = PSSE_LOCATION_33 + ';' + os.environ['PATH']
-    sys.path.append(PSSE_LOCATION_33)
-    import psspy
-    
-MyLibraryLocation = r"""C:\Users\niezj\Desktop\16a_Fall\openECA_proj\LocalVoltageControl20161110\Test1\pythonCode\MyLibrary"""
+MyLibraryLocation = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'MyLibrary')
 sys.path.append(MyLibraryLocation)
+import RunReset
 
-from psspy import _i,_f # importing the default integer and float values used by PSS\E(every API uses them)
-import PowerSystemPsseLibrary as powerlib
-import redirect,StringIO
-redirect.psse2py()
-psspy.psseinit(80000)
+#endregion
 
+#region[ Defined Functions ]
 
-@contextmanager
-def silence(file_object=None):
+def copyCaseWithPsse(caseName, testCaseName):
     """
-    Discard stdout (i.e. write to null device) or
-    optionally write to given file-like object.
+    Copy the benchmark case as the test case by loading and saving it in
+    PSS\E, only needed when the two are not of the same format.
     """
-    if file_object is None:
-        file_object = open(os.devnull, 'w')
-
-    old_stdout = sys.stdout
-    try:
-        sys.stdout = file_object
-        yield
-    finally:
-        sys.stdout = old_stdout
-
-
+    PSSE_LOCATION_34 = r"""C:\Program Files (x86)\PTI\PSSE34\PSSPY27"""
+    PSSE_LOCATION_33 = r"""C:\Program Files (x86)\PTI\PSSE33\PSSBIN"""
+    if os.path.isdir(PSSE_LOCATION_34):
+        sys.path.append(PSSE_LOCATION_34)
+        import psse34, psspy
+        
+    elif os.path.isdir(PSSE_LOCATION_33):
+        os.environ['PATH'] = PSSE_LOCATION_33 + ';' + os.environ['PATH']
+        sys.path.append(PSSE_LOCATION_33)
+        import psspy
+        
+    else:
+        # no PSS\E on this machine: use the pure-Python backend, cases are read from *.raw
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'TransmissionLineImpedanceCalculator', 'Source', 'Step_1_VI Acquisition'))
+        import SparsePsspy as psspy
+        sys.modules['psspy'] = psspy
+
+    psspy.psseinit(80000)
+    psspy.case(caseName)
+    psspy.save(testCaseName)
+
+#endregion
+
+#region [ Main ]
 
 # Read the C# information
 inputDataFolder = sys.argv[1]
@@ -49,69 +47,9 @@ logsDataFolder = sys.argv[2]
 caseName = sys.argv[-2]
 testCaseName = sys.argv[-1]
 
-# copy benchmark case as the test case
-psspy.case(caseName)
-savecase = (testCaseName)
-psspy.save(savecase)
-
-
-
-os.chdir(inputDataFolder)
-for file in glob.glob("2016*.xml"):
-        os.remove(file)
-
-os.chdir(logsDataFolder)
-for file in glob.glob("2016*.xml"):
-        os.remove(file)
-
-# delete all the transformers' input data files starts from the THIRD row
-for i in range(0,2):
-    k = i + 1
-    InputTransformerFile = (inputDataFolder +"\\transformer" + str(k) + ".csv")
-    ReadFile = open(InputTransformerFile)
-    r = csv.reader(ReadFile)
-    lines = [line for line in r]
-    ReadFile.close()
-    os.remove(InputTransformerFile)
-
-    WriteFile = open(InputTransformerFile,'a')
-    w = csv.writer(WriteFile,delimiter = ',',lineterminator = '\n')
-    for rownumber in range(0,2):
-        w.writerow(lines[rownumber])
-    WriteFile.close()
-
-# delete all the capbank' input data files starts from the THIRD row
-for i in range(0,2):
-    k = i + 1
-    InputCapbankFile = (inputDataFolder +"\\CapBank" + str(k) + ".csv")
-    ReadFile = open(InputCapbankFile)
-    r = csv.reader(ReadFile)
-    lines = [line for line in r]
-    ReadFile.close()
-    os.remove(InputCapbankFile)
-
-    WriteFile = open(InputCapbankFile,'a')
-    w = csv.writer(WriteFile,delimiter = ',',lineterminator = '\n')
-    for rownumber in range(0,2):
-        w.writerow(lines[rownumber])
-    WriteFile.close()
-
-# delete all the subInformation s' input data files starts from the THIRD row
-InputInformationFile = (inputDataFolder +"\\SubInformation.csv")
-ReadFile = open(InputInformationFile)
-r = csv.reader(ReadFile)
-lines = [line for line in r]
-ReadFile.close()
-os.remove(InputInformationFile)
-
-WriteFile = open(InputInformationFile,'a')
-w = csv.writer(WriteFile,delimiter = ',',lineterminator = '\n')
-for rownumber in range(0,2):
-    w.writerow(lines[rownumber])
-WriteFile.close()
-
-# remove the pfDifference
-os.remove(inputDataFolder + "\\pfDifference.csv")
+# keep the first two rows of the transformer, capbank and substation information files,
+# delete the frame, log and run files and copy the benchmark case as the test case
+if not RunReset.resetRun(inputDataFolder, logsDataFolder, caseName, testCaseName):
+    copyCaseWithPsse(caseName, testCaseName)
 
-# remove the TxRatio Files
-os.remove(inputDataFolder +"\\transformerRatio" + ".csv")
+#endregion
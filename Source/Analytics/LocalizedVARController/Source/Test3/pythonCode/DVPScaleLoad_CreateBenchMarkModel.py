@@ -10,11 +10,17 @@ if os.path.isdir(PSSE_LOCATION_34):
     sys.path.append(PSSE_LOCATION_34)
     import psse34, psspy
     
-else:
+elif os.path.isdir(PSSE_LOCATION_33):
     os.environ['PATH'] = PSSE_LOCATION_33 + ';' + os.environ['PATH']
     sys.path.append(PSSE_LOCATION_33)
     import psspy
     
+else:
+    # no PSS\E on this machine: use the pure-Python backend, cases are read from *.raw
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'TransmissionLineImpedanceCalculator', 'Source', 'Step_1_VI Acquisition'))
+    import SparsePsspy as psspy
+    sys.modules['psspy'] = psspy
+    
 from psspy import _i,_f # importing the default integer and float values used by PSS\E(every API uses them)
 from pprint import pprint
 psspy.psseinit(80000)
@@ -0,0 +1,210 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,csv,math,time,multiprocessing
+
+import psspy # the calling script puts PSS\E (or SparsePsspy registered as psspy) on the path
+import PowerSystemPsseLibrary as pssepylib
+import SolvedStates
+
+#endregion
+
+#region [ Ladder ]
+
+LadderReportName = "%s_ladder.csv" # the solution of every rung, next to the cases
+CoarseStep = 10.0 # a rung is solved at most 10% of the base case load from the case before it
+FineStep = 1.0    # and a rung that diverged is solved again in 1% steps before it counts as collapsed
+
+def ladderPercentages(start, stop, step):
+    """
+    The load levels of a ladder from start to stop (both in % of the base
+    case) every step %, e.g. 100, 99.5, ..., 20.
+    """
+    count = int(round(abs(start - stop) / step))
+    direction = -1 if stop < start else 1
+    return [round(start + direction * index * step, 6) for index in range(0, count + 1)]
+
+def rungCaseName(prefix, percentage):
+    return "%s_%s.sav" % (prefix, "%g" % percentage) # IEEE_118_95.sav, IEEE_118_99.5.sav
+
+def ladderChunks(percentages, chunks, base=100.0):
+    """
+    Split the rungs into about chunks runs of neighbouring rungs, each
+    ordered away from the base case, so that every rung of a run can start
+    from the solution of the one before it.
+    """
+    below = sorted([p for p in percentages if p <= base], reverse=True)
+    above = sorted([p for p in percentages if p > base])
+    size = max(1, -(-len(percentages) // max(1, chunks)))
+    return [side[index:index + size] for side in (below, above) for index in range(0, len(side), size)]
+
+def scaleLoadLevel(load_bus, gen_bus, percentage, fromPercentage):
+    """
+    Scale the load of the case in memory from fromPercentage to percentage
+    of the base case; the generation takes up the load change.
+    """
+    if fromPercentage <= 0:
+        raise ValueError('a case at %g%% of the base case load cannot be scaled to %g%%' % (fromPercentage, percentage))
+    change = (percentage - fromPercentage) / fromPercentage * 100
+    if change:
+        increment = pssepylib.LoadIncreaseMW(load_bus, change)
+        pssepylib.change_load(load_bus, change)
+        pssepylib.change_gen(gen_bus, increment)
+
+#endregion
+
+#region [ Worker Process ]
+
+def _startProcess():
+    psspy.psseinit(80000)
+
+def _solveRung(load_bus, gen_bus, percentage, fromPercentage):
+    """
+    Bring the case in memory, solved at fromPercentage, to percentage and
+    solve it from the voltages in memory.
+    """
+    scaleLoadLevel(load_bus, gen_bus, percentage, fromPercentage)
+    psspy.fdns()
+    return psspy.solved(), psspy.iterat(), abs(psspy.sysmsm())
+
+def _walkRung(load_bus, gen_bus, percentage, fromPercentage, step):
+    """
+    Bring the case in memory, solved at fromPercentage, to percentage in
+    equal solutions at most step % apart, stopping at the first that does
+    not solve. Returns its solved, the iterations of all of them and its
+    mismatch.
+    """
+    count = max(1, int(math.ceil(round(abs(percentage - fromPercentage) / step, 6))))
+    level, iterations = fromPercentage, 0
+    for index in range(1, count + 1):
+        nextLevel = percentage if index == count else fromPercentage + (percentage - fromPercentage) * index / count
+        N, more, mismatch = _solveRung(load_bus, gen_bus, nextLevel, level)
+        iterations += more
+        if N != 0:
+            break
+        level = nextLevel
+    return N, iterations, mismatch
+
+def _restoreRung(baseCase, load_bus, gen_bus, bus_num, base, solved):
+    """
+    Bring the base case back to the last solved rung, with its voltages;
+    the base case itself if no rung has solved yet.
+    """
+    psspy.case(baseCase)
+    if solved is not None:
+        scaleLoadLevel(load_bus, gen_bus, solved['percentage'], base)
+        SolvedStates.setVoltages(bus_num, solved['vm'], solved['va'])
+
+def _buildChunk(arguments):
+    """
+    Solve a run of rungs one after the other, each warm-started from the
+    nearest rung solved before it and at most CoarseStep % away from it, so
+    the first rung is reached from the base case in several solutions. A
+    rung that diverges is solved again from the last solved rung in FineStep
+    % steps; only if that diverges too it counts as collapsed and is not
+    saved. Returns the bus numbers and the rung results, solved ones with
+    their voltages.
+    """
+    baseCase, prefix, percentages, base, saveCases = arguments
+    results = []
+    with pssepylib.silence():
+        psspy.case(baseCase)
+        ierr, all_bus = psspy.abusint(-1, 1, ['NUMBER'])
+        bus_num = all_bus[0]
+        psspy.bsys(sid=1, numbus=len(bus_num), buses=bus_num)
+        ierr, load_bus = psspy.alodbusint(1, 1, ['NUMBER'])
+        load_bus = load_bus[0]
+        psspy.bsys(sid=1, numbus=len(bus_num), buses=bus_num)
+        ierr, gen_bus = psspy.agenbusint(1, 1, ['NUMBER'])
+        gen_bus = gen_bus[0]
+
+        solved, solvedPercentage = None, base
+        for percentage in percentages:
+            started = time.time()
+            N, iterations, mismatch = _walkRung(load_bus, gen_bus, percentage, solvedPercentage, CoarseStep)
+            if N != 0 and abs(percentage - solvedPercentage) > FineStep:
+                _restoreRung(baseCase, load_bus, gen_bus, bus_num, base, solved)
+                N, more, mismatch = _walkRung(load_bus, gen_bus, percentage, solvedPercentage, FineStep)
+                iterations += more
+            caseName = rungCaseName(prefix, percentage)
+            results.append({
+                'percentage' : percentage,
+                'case' : caseName if N == 0 and saveCases else '',
+                'solved' : N,
+                'from' : solvedPercentage,
+                'iterations' : iterations,
+                'mismatch' : mismatch,
+                'elapsed' : time.time() - started,
+                })
+            if N == 0:
+                ierr, (vm, va) = psspy.abusreal(-1, 1, ['PU', 'ANGLED'])
+                results[-1]['vm'], results[-1]['va'] = vm, va
+                if saveCases:
+                    psspy.save(caseName)
+                solved, solvedPercentage = results[-1], percentage
+            else:
+                _restoreRung(baseCase, load_bus, gen_bus, bus_num, base, solved)
+    return bus_num, results
+
+#endregion
+
+#region [ Ladder Builder ]
+
+def buildLadder(baseCase, percentages, prefix=None, processes=None, base=100.0, saveCases=True):
+    """
+    Solve the case at every load level of percentages (in % of the base
+    case load, generation following the load). The voltages of the solved
+    levels go to the state store <prefix>_states.npy (see SolvedStates),
+    the solution of every rung to <prefix>_ladder.csv and, if saveCases,
+    each solved case to <prefix>_<percentage>.sav. Returns the rung
+    results ordered as percentages; a rung whose solved is not 0 collapsed
+    and has no case.
+
+    The rungs are split into runs of neighbours solved by a pool of
+    processes, each running its own PSS\E; under Windows the calling
+    script has to keep its code under if __name__ == '__main__'.
+    """
+    if prefix is None:
+        prefix = os.path.splitext(baseCase)[0]
+    processes = processes or multiprocessing.cpu_count()
+    chunks = [(baseCase, prefix, chunk, base, saveCases) for chunk in ladderChunks(percentages, processes, base)]
+
+    if processes == 1 or len(chunks) == 1:
+        runs = [_buildChunk(chunk) for chunk in chunks]
+    else:
+        pool = multiprocessing.Pool(min(processes, len(chunks)), _startProcess)
+        try:
+            runs = pool.map(_buildChunk, chunks, 1)
+        finally:
+            pool.close()
+            pool.join()
+
+    solved = dict((result['percentage'], result) for buses, run in runs for result in run)
+    results = [solved[percentage] for percentage in percentages]
+    writeLadderReport(results, LadderReportName % prefix)
+    levels = [(result['percentage'], result['vm'], result['va']) for result in results if result['solved'] == 0]
+    if levels:
+        SolvedStates.writeStates(SolvedStates.StatesFileName % prefix, runs[0][0], levels)
+    return results
+
+def writeLadderReport(results, fileName):
+    with open(fileName, 'w') as WriteFile:
+        writer = csv.writer(WriteFile, delimiter=',', lineterminator='\n')
+        writer.writerow(['percentage', 'case', 'solved', 'from', 'iterations', 'mismatch', 'elapsed'])
+        for result in results:
+            writer.writerow(['%g' % result['percentage'], result['case'], result['solved'], '%g' % result['from'], result['iterations'], '%.6g' % result['mismatch'], '%.3f' % result['elapsed']])
+
+def readLadderCases(fileName):
+    """
+    The rung cases a ladder report lists as solved and saved, by
+    percentage; none if there is no report.
+    """
+    cases = {}
+    if os.path.isfile(fileName):
+        with open(fileName) as ReadFile:
+            for row in csv.DictReader(ReadFile):
+                if row['case'] and int(row['solved']) == 0:
+                    cases[float(row['percentage'])] = row['case']
+    return cases
+
+#endregion
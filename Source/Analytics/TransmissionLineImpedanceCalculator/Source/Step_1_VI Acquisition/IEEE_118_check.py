@@ -0,0 +1,54 @@
+from __future__ import with_statement
+import os,sys
+
+import SparsePsspy as psspy # always the pure-Python backend, this script checks it
+sys.modules['psspy'] = psspy
+
+
+####################################### main #############################################################
+
+# usage: IEEE_118_check.py
+# checks that SparsePsspy returns an error code while no case is loaded and that it
+# solves IEEE_118.sav (read from IEEE_118.raw) from a flat start back to the solution
+# saved in the case; exits with 1 on the first failed check
+
+if __name__ == '__main__':
+
+    ######input######
+
+    PSSE_CASE = r"IEEE_118.sav"
+    SWING_BUS = 69
+    tolerance = 1e-4      # pu
+    angle_tolerance = 0.05 # degrees, the case was solved to the PSS\E default of 0.1 MW
+
+    ######input######
+
+    def check(condition, msg):
+        if not condition:
+            print('FAILED: ' + msg)
+            sys.exit(1)
+
+    ierr, values = psspy.aloadreal(-1, 1, 'TOTALACT')
+    check(ierr != 0 and values is None, 'aloadreal returned data without a case')
+    check(psspy.fnsl() != 0, 'fnsl solved without a case')
+    check(psspy.case('missing.sav') != 0, 'case loaded a missing file')
+    check(psspy.abusreal(-1, 1, 'PU')[0] != 0, 'abusreal returned data after a failed case')
+
+    check(psspy.case(PSSE_CASE) == 0, 'cannot load ' + PSSE_CASE)
+    ierr, (buses,) = psspy.abusint(-1, 1, 'NUMBER')
+    ierr, (saved_vm, saved_va) = psspy.abusreal(-1, 1, ['PU', 'ANGLED'])
+    check(len(buses) == 118, '%d buses in the case' % len(buses))
+
+    psspy.fnsl([0, 0, 0, 1, 1, 1, 0, 0]) # flat start
+    check(psspy.solved() == 0, 'flat start did not converge (solved %d)' % psspy.solved())
+    ierr, (vm, va) = psspy.abusreal(-1, 1, ['PU', 'ANGLED'])
+
+    # angles are compared relative to the swing bus, a flat start does not keep its angle
+    swing = buses.index(SWING_BUS)
+    vm_error = max([abs(vm[k] - saved_vm[k]) for k in range(len(buses))])
+    va_error = max([abs((va[k] - va[swing]) - (saved_va[k] - saved_va[swing])) for k in range(len(buses))])
+    check(vm_error < tolerance, 'voltage magnitudes differ from the case by %g pu' % vm_error)
+    check(va_error < angle_tolerance, 'voltage angles differ from the case by %g degrees' % va_error)
+
+    msg = 'IEEE 118: solved from a flat start in %d iterations, within %.1e pu and %.1e degrees of the case'
+    print(msg % (psspy.iterat(), vm_error, va_error))
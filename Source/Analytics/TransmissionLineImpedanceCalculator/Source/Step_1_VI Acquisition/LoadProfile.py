@@ -0,0 +1,185 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,itertools
+import numpy
+
+#endregion
+
+#region [ Load Profile ]
+
+Columns = ('peak', 'valley') # the series of a profile, its columns in this order
+ChunkLength = 65536 # time stamps read or computed at a time
+
+def _matProfile(fileName, variable):
+    """
+    The samples x series array of a .mat file: variable, or its only
+    variable. A MATLAB 7.3 file (HDF5) is read lazily through h5py, which
+    stores it transposed; an older one is read whole by scipy.
+    """
+    import scipy.io
+    try:
+        contents = scipy.io.loadmat(fileName)
+    except NotImplementedError:
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError('%s is a MATLAB 7.3 file, which needs h5py; save it with -v7 or as .npy' % fileName)
+        contents = h5py.File(fileName, 'r')
+        names = [name for name in contents if not name.startswith('#')]
+        return _TransposedDataset(contents[variable or _onlyVariable(fileName, names)])
+    names = [name for name in contents if not name.startswith('__')]
+    return contents[variable or _onlyVariable(fileName, names)]
+
+def _onlyVariable(fileName, names):
+    if len(names) != 1:
+        raise ValueError('%s holds %s; name the variable of the load profile' % (fileName, ', '.join(sorted(names))))
+    return names[0]
+
+class _TransposedDataset(object):
+    """
+    An HDF5 dataset of series x samples seen as samples x series.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.shape = dataset.shape[::-1]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        rows, column = key
+        return self.dataset[column, rows]
+
+def _csvProfile(fileName, delimiter=','):
+    """
+    The samples x series array of a CSV file of one row of numbers a
+    sample, parsed ChunkLength rows at a time; a first row that is not
+    numbers is taken for the names of the columns and skipped.
+    """
+    with open(fileName, 'r') as ReadFile:
+        first = ReadFile.readline()
+        try:
+            [float(value) for value in first.split(delimiter)]
+            header = 0
+        except ValueError:
+            header = 1
+        rows = sum(1 for line in itertools.chain([first], ReadFile) if line.strip()) - header
+        ReadFile.seek(0)
+        for line in range(header):
+            ReadFile.readline()
+        values = None
+        start = 0
+        while start < rows:
+            lines = [line for line in itertools.islice(ReadFile, ChunkLength) if line.strip()]
+            chunk = numpy.loadtxt(lines, delimiter=delimiter, dtype=numpy.float64, ndmin=2)
+            if values is None:
+                values = numpy.empty((rows, chunk.shape[1]), dtype=numpy.float64)
+            values[start:start + len(chunk)] = chunk
+            start += len(chunk)
+    return values if values is not None else numpy.empty((0, len(Columns)), dtype=numpy.float64)
+
+class LoadProfile(object):
+    """
+    The peak and the valley load series of a load profile file, one row a
+    time stamp, each the change of the load in per unit of the base case
+    (0.05 for 105%):
+
+        .npy    a samples x 2 array, memory-mapped
+        .mat    the samples x 2 variable (the only one, or variable) of a
+                MATLAB file, as written by Load_scale_percent_change.m
+        .csv    a row of the two values a sample, after an optional header
+
+    Nothing is copied into Python lists: profile.percentages('peak') is a
+    ProfilePercentages of the load levels (in % of the base case) of the
+    peak series, computed ChunkLength time stamps at a time as it is
+    sliced, and profile.chunks('valley') iterates over the valley series in
+    chunks. A .mat or CSV profile is read into one array; save it as .npy
+    once to memory-map it.
+    """
+
+    def __init__(self, fileName, variable=None, delimiter=','):
+        self.fileName = fileName
+        extension = os.path.splitext(fileName)[1].lower()
+        if extension == '.npy':
+            self.values = numpy.load(fileName, mmap_mode='r')
+        elif extension == '.mat':
+            self.values = _matProfile(fileName, variable)
+        elif extension in ('.csv', '.txt'):
+            self.values = _csvProfile(fileName, delimiter)
+        else:
+            raise ValueError('%s is not a .npy, .mat or CSV load profile' % fileName)
+        if len(self.values.shape) != 2 or self.values.shape[1] < len(Columns):
+            raise ValueError('the load profile %s is %s, not samples x %d' % (fileName, ' x '.join(str(size) for size in self.values.shape), len(Columns)))
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def column(self, name):
+        if name not in Columns:
+            raise ValueError('the series of a load profile are %s, not %r' % (', '.join(Columns), name))
+        return Columns.index(name)
+
+    def series(self, name, start=0, stop=None):
+        """
+        The values of series name from time stamp start to stop, as a
+        float64 array.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        return numpy.asarray(self.values[start:stop, self.column(name)], dtype=numpy.float64)
+
+    def chunks(self, name, length=ChunkLength, stop=None):
+        """
+        Iterate over (start, values) of series name, length time stamps at a
+        time, up to time stamp stop.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for start in range(0, stop, length):
+            yield start, self.series(name, start, min(start + length, stop))
+
+    def percentages(self, name, stop=None):
+        return ProfilePercentages(self, name, stop)
+
+    def save(self, fileName):
+        """
+        Write the profile to a samples x 2 .npy file, chunk by chunk.
+        """
+        values = numpy.lib.format.open_memmap(fileName + '.tmp', mode='w+', dtype=numpy.float64, shape=(len(self), len(Columns)))
+        for column, name in enumerate(Columns):
+            for start, chunk in self.chunks(name):
+                values[start:start + len(chunk), column] = chunk
+        values.flush()
+        del values
+        if os.path.isfile(fileName):
+            os.remove(fileName) # os.rename does not replace a file under Windows
+        os.rename(fileName + '.tmp', fileName)
+
+class ProfilePercentages(object):
+    """
+    The load levels (in % of the base case) of a series of a load profile,
+    (1 + change) * 100, up to time stamp stop: len() and slices of it, as
+    float64 arrays, are computed from the profile when asked for, so that
+    ResidentCasePool.acquire never holds all of them.
+    """
+
+    def __init__(self, profile, name, stop=None):
+        self.profile = profile
+        self.name = name
+        self.stop = len(profile) if stop is None else min(stop, len(profile))
+        profile.column(name)
+
+    def __len__(self):
+        return self.stop
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError('the load levels of a profile are read in slices')
+        start, stop, step = key.indices(self.stop)
+        return ((1 + self.profile.series(self.name, start, stop)) * 100)[::step]
+
+    def chunks(self, length=ChunkLength):
+        for start in range(0, self.stop, length):
+            yield start, self[start:min(start + length, self.stop)]
+
+#endregion
@@ -0,0 +1,98 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,math
+import numpy
+
+import VIStore
+
+#endregion
+
+#region [ Ratio Error Model ]
+
+MeasuredStoreName = "%s_measured.vi" # the measured store of a VI measurement file, next to its store
+RatioErrorName = "%sRatioError" # the three-phase ratio errors of a quantity, in the measured store
+
+VoltageStep = math.floor(345000 / 2 ** 14 / math.sqrt(3)) # V, 14 bits over the 345 kV phase voltage
+CurrentStep = 0.65 # A
+
+_Rotation = numpy.exp(-2j * math.pi / 3 * numpy.arange(3)) # the phase A, B and C of a positive sequence phasor
+
+def quantize(values, step):
+    """
+    values rounded to a multiple of step, halves away from zero (quant of
+    MATLAB).
+    """
+    return numpy.sign(values) * numpy.floor(numpy.abs(values) / step + 0.5) * step
+
+class PmuErrorModel(object):
+    """
+    The ratio error model of Step 2 (Line_data_generation_IEEE_118.m),
+    applied to the true phasors of the time stamps as they are acquired.
+    Every phase of every voltage and current channel has a fixed ratio
+    error, its magnitude within magnitudeError (per unit) and its angle
+    within angleError (degrees), uniformly; the channel is measured by
+    splitting its positive sequence phasor into the three phases, applying
+    their ratio errors, quantizing the real and the imaginary part of each
+    to voltageStep or currentStep, and taking the positive sequence again.
+
+    The ratio errors are drawn from seed for every quantity of a store, in
+    the order of its elements, so that they only depend on the seed and
+    the topology: every process and every resumed run measures with the
+    same ones.
+    """
+
+    def __init__(self, magnitudeError=0.05, angleError=5, voltageStep=VoltageStep, currentStep=CurrentStep, seed=0):
+        self.magnitudeError = magnitudeError
+        self.angleError = angleError
+        self.voltageStep = voltageStep
+        self.currentStep = currentStep
+        self.seed = seed
+        self.topology = None
+        self.errors = None
+
+    def parameters(self):
+        return {
+            'magnitudeError' : self.magnitudeError,
+            'angleError' : self.angleError,
+            'voltageStep' : self.voltageStep,
+            'currentStep' : self.currentStep,
+            'seed' : self.seed,
+            }
+
+    def ratioErrors(self, topology):
+        """
+        The elements x 3 (phase A, B, C) complex ratio errors of every
+        quantity of the topology.
+        """
+        if self.topology is not None and all(numpy.array_equal(topology[name], self.topology[name]) for name in VIStore.Topology):
+            return self.errors
+        random = numpy.random.RandomState(self.seed)
+        errors = {}
+        for name in sorted(VIStore.Quantities):
+            shape = (len(topology[VIStore.Quantities[name]]), 3)
+            magnitude = 1 + 2 * self.magnitudeError * (random.random_sample(shape) - 0.5)
+            angle = 2 * self.angleError * (random.random_sample(shape) - 0.5) * math.pi / 180
+            errors[name] = magnitude * numpy.exp(1j * angle)
+        self.topology, self.errors = topology, errors
+        return errors
+
+    def measure(self, topology, name, values):
+        """
+        The measured phasors of the true ones values (time stamps x
+        elements) of quantity name; a time stamp that collapsed stays nan.
+        """
+        values = numpy.asarray(values)
+        step = self.voltageStep if name == 'voltage' else self.currentStep
+        phases = values[..., numpy.newaxis] * _Rotation * self.ratioErrors(topology)[name]
+        phases = quantize(phases.real, step) + 1j * quantize(phases.imag, step)
+        return numpy.sum(phases * numpy.conjugate(_Rotation), axis=-1) / 3
+
+    def save(self, folder, topology):
+        """
+        Record the ratio errors of the topology in the measured store folder.
+        """
+        for name, errors in self.ratioErrors(topology).items():
+            numpy.save(os.path.join(folder, RatioErrorName % name + '.npy'), errors)
+
+#endregion
@@ -0,0 +1,320 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import time,socket,select,struct
+import numpy
+
+import VIStore
+
+#endregion
+
+#region [ IEEE C37.118 Frames ]
+
+# frame types of IEEE C37.118-2005 (version 1)
+DataFrame = 0xAA01
+HeaderFrame = 0xAA11
+ConfigurationFrame1 = 0xAA21
+ConfigurationFrame2 = 0xAA31
+CommandFrame = 0xAA41
+
+# commands
+DataOff = 1
+DataOn = 2
+SendHeader = 3
+SendConfiguration1 = 4
+SendConfiguration2 = 5
+
+TimeBase = 1000000 # FRACSEC counts microseconds
+FloatFormat = 0x000E # FORMAT: bit 0 clear, rectangular phasors; bits 1-3 set, phasors, analogs and FREQ/DFREQ as floats
+DataInvalid = 0x8000 # STAT of a time stamp that collapsed
+
+def _crcTable():
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for bit in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+_CrcTable = _crcTable()
+
+def crcCCITT(data):
+    """
+    The CRC-CCITT (0xFFFF start) checksum that ends every frame.
+    """
+    crc = 0xFFFF
+    for byte in bytearray(data):
+        crc = ((crc << 8) & 0xFFFF) ^ _CrcTable[((crc >> 8) ^ byte) & 0xFF]
+    return crc
+
+def frame(sync, idcode, soc, fracsec, body):
+    """
+    A frame: the common header, body and checksum.
+    """
+    data = struct.pack('>HHHII', sync, 14 + len(body) + 2, idcode, soc, fracsec) + body
+    return data + struct.pack('>H', crcCCITT(data))
+
+def _name(name):
+    return name[:16].ljust(16).encode('ascii')
+
+class PmuFrameEncoder(object):
+    """
+    The frames of a stream of the measurements of a VI store topology: one
+    PMU for every 345 kV bus, with the phasors of its voltage and of the
+    currents of the lines, the transformers and the generators at it, all
+    in V and A, as floats in rectangular form.
+    """
+
+    def __init__(self, topology, idcode=1, dataRate=30, stationPrefix='BUS'):
+        self.idcode = idcode
+        self.dataRate = dataRate
+
+        # the phasor channels of every PMU: (quantity, column, current, name)
+        buses = topology['buses'].tolist()
+        position = dict((bus, index) for index, bus in enumerate(buses))
+        channels = [[('voltage', index, 0, 'V %d' % bus)] for index, bus in enumerate(buses)]
+        for column, line in enumerate(topology['lines'].tolist()):
+            from_bus, to_bus, ID = line[0], line[1], line[2].strip()
+            if from_bus in position:
+                channels[position[from_bus]].append(('lineCurrentFrom', column, 1, 'I %d-%d %s' % (from_bus, to_bus, ID)))
+            if to_bus in position:
+                channels[position[to_bus]].append(('lineCurrentTo', column, 1, 'I %d-%d %s' % (to_bus, from_bus, ID)))
+        for column, transformer in enumerate(topology['transformers'].tolist()):
+            from_bus, to_bus, ID, end = transformer[0], transformer[1], transformer[2].strip(), transformer[3]
+            if end == 1:
+                channels[position[from_bus]].append(('transformerCurrentFrom', column, 1, 'IT %d-%d %s' % (from_bus, to_bus, ID)))
+            else:
+                channels[position[to_bus]].append(('transformerCurrentTo', column, 1, 'IT %d-%d %s' % (to_bus, from_bus, ID)))
+        for column, bus in enumerate(topology['generators'].tolist()):
+            channels[position[bus]].append(('generatorCurrent', column, 1, 'IG %d' % bus))
+
+        # where the values of the channels are in the quantities of a time stamp
+        self.quantities = sorted(VIStore.Quantities)
+        offsets = {}
+        offset = 0
+        for name in self.quantities:
+            offsets[name] = offset
+            offset += len(topology[VIStore.Quantities[name]])
+        self.source = numpy.array([offsets[name] + column for pmu in channels for name, column, current, channelName in pmu], dtype=int)
+
+        # the configuration
+        body = struct.pack('>IH', TimeBase, len(buses))
+        for index, (bus, pmu) in enumerate(zip(buses, channels)):
+            body += _name('%s %d' % (stationPrefix, bus))
+            body += struct.pack('>HHHHH', index + 1, FloatFormat, len(pmu), 0, 0)
+            body += b''.join(_name(channelName) for name, column, current, channelName in pmu)
+            body += b''.join(struct.pack('>I', current << 24) for name, column, current, channelName in pmu)
+            body += struct.pack('>HH', 0, 0) # 60 Hz, configuration change count
+        self.configurationBody = body + struct.pack('>h', dataRate)
+
+        # the data body: STAT, phasors, FREQ and DFREQ of every PMU, with the
+        # positions of the bytes of the phasors and of the STATs in it
+        template = b''
+        phasorPositions = []
+        statPositions = []
+        for pmu in channels:
+            statPositions.extend([len(template), len(template) + 1])
+            template += struct.pack('>H', 0)
+            phasorPositions.extend(range(len(template), len(template) + 8 * len(pmu)))
+            template += b'\0' * (8 * len(pmu)) + struct.pack('>ff', 60.0, 0.0)
+        self.template = numpy.frombuffer(template, dtype=numpy.uint8).copy()
+        self.phasorPositions = numpy.array(phasorPositions, dtype=int)
+        self.statPositions = numpy.array(statPositions, dtype=int)
+        self.stations = len(buses)
+        self.channels = len(self.source)
+
+    def configuration(self, soc, fracsec=0, sync=ConfigurationFrame2):
+        return frame(sync, self.idcode, soc, fracsec, self.configurationBody)
+
+    def header(self, soc, text='IEEE 118-bus 345 kV synthetic PMU data'):
+        return frame(HeaderFrame, self.idcode, soc, 0, text.encode('ascii'))
+
+    def data(self, soc, fracsec, quantities, valid=True):
+        """
+        The data frame of a time stamp; quantities holds its row of every
+        VIStore quantity.
+        """
+        values = numpy.concatenate([numpy.asarray(quantities[name]) for name in self.quantities])[self.source]
+        body = self.template.copy()
+        body[self.phasorPositions] = values.astype('>c8').view(numpy.uint8)
+        if not valid:
+            body[self.statPositions] = numpy.tile(numpy.frombuffer(struct.pack('>H', DataInvalid), dtype=numpy.uint8), self.stations)
+        return frame(DataFrame, self.idcode, soc, fracsec, body.tobytes())
+
+#endregion
+
+#region [ Transports ]
+
+class UdpTransport(object):
+    """
+    Sends the frames to host:port; the configuration goes out once a
+    second, as the receiver cannot ask for it.
+    """
+
+    def __init__(self, host, port):
+        self.target = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def ready(self):
+        return True
+
+    def poll(self, encoder, soc, timeout=0):
+        if timeout > 0:
+            time.sleep(timeout)
+
+    def send(self, data, configuration=None):
+        if configuration is not None:
+            self.socket.sendto(configuration, self.target)
+        self.socket.sendto(data, self.target)
+
+    def close(self):
+        self.socket.close()
+
+class TcpTransport(object):
+    """
+    Listens on host:port like a PMU: a client (a PDC, or openECA's phasor
+    protocol adapter) asks for the header and the configuration frames and
+    turns the data on and off with command frames.
+    """
+
+    def __init__(self, host, port):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen(5)
+        self.clients = {} # socket: [received bytes, data on]
+
+    def ready(self):
+        return any(dataOn for received, dataOn in self.clients.values())
+
+    def poll(self, encoder, soc, timeout=0):
+        """
+        Accept the clients and answer their commands, waiting up to timeout
+        seconds for them.
+        """
+        readable, writable, failed = select.select([self.server] + list(self.clients), [], [], max(0, timeout))
+        for connection in readable:
+            if connection is self.server:
+                client, address = self.server.accept()
+                self.clients[client] = [b'', False]
+                continue
+            try:
+                received = connection.recv(4096)
+            except socket.error:
+                received = b''
+            if not received:
+                self.drop(connection)
+                continue
+            self.clients[connection][0] += received
+            self.answer(connection, encoder, soc)
+
+    def answer(self, connection, encoder, soc):
+        received = self.clients[connection][0]
+        while len(received) >= 4:
+            sync, size = struct.unpack('>HH', received[:4])
+            if sync != CommandFrame or size < 18:
+                received = b'' # not a command frame, drop what was received
+                break
+            if len(received) < size:
+                break
+            command = struct.unpack('>H', received[14:16])[0]
+            received = received[size:]
+            if command == DataOff:
+                self.clients[connection][1] = False
+            elif command == DataOn:
+                self.clients[connection][1] = True
+            elif command == SendHeader:
+                self.write(connection, encoder.header(soc))
+            elif command in (SendConfiguration1, SendConfiguration2):
+                self.write(connection, encoder.configuration(soc, sync=ConfigurationFrame1 if command == SendConfiguration1 else ConfigurationFrame2))
+        if connection in self.clients:
+            self.clients[connection][0] = received
+
+    def write(self, connection, data):
+        try:
+            connection.sendall(data)
+        except socket.error:
+            self.drop(connection)
+
+    def drop(self, connection):
+        self.clients.pop(connection, None)
+        connection.close()
+
+    def send(self, data, configuration=None):
+        for connection, (received, dataOn) in list(self.clients.items()):
+            if dataOn:
+                self.write(connection, data)
+
+    def close(self):
+        for connection in list(self.clients):
+            self.drop(connection)
+        self.server.close()
+
+#endregion
+
+#region [ Publisher ]
+
+class PmuFramePublisher(object):
+    """
+    Publishes the time stamps of an acquisition as IEEE C37.118 data
+    frames on a local socket, 'udp' to host:port or 'tcp' listening on
+    host:port. The frames are time-stamped dataRate a second from the time
+    the publisher started and paced at rate frames a second (None as fast
+    as possible). Over TCP the publisher waits for a client to turn the
+    data on before the first frame.
+    """
+
+    def __init__(self, transport, host, port, rate=30.0, dataRate=30, idcode=1):
+        if transport == 'udp':
+            self.transport = UdpTransport(host, port)
+        elif transport == 'tcp':
+            self.transport = TcpTransport(host, port)
+        else:
+            raise ValueError("the transport is 'udp' or 'tcp', not %r" % (transport,))
+        self.rate = rate
+        self.dataRate = dataRate
+        self.idcode = idcode
+        self.encoder = None
+        self.started = None
+        self.epoch = int(time.time())
+        self.published = 0
+
+    def timeStamp(self, index):
+        """
+        SOC and FRACSEC of time stamp index.
+        """
+        microseconds = int(round(index * TimeBase / self.dataRate))
+        return self.epoch + microseconds // TimeBase, microseconds % TimeBase
+
+    def publish(self, index, topology, quantities, valid=True):
+        """
+        Publish time stamp index, with its row of every quantity of a store
+        of the topology (see VIStore).
+        """
+        if topology is None:
+            return # nothing solved yet, so no configuration either
+        if self.encoder is None:
+            self.encoder = PmuFrameEncoder(topology, self.idcode, self.dataRate)
+        soc, fracsec = self.timeStamp(index)
+
+        while not self.transport.ready():
+            self.transport.poll(self.encoder, soc, 0.1)
+        if self.started is None:
+            self.started = time.time()
+        if self.rate:
+            deadline = self.started + self.published / self.rate
+            while True:
+                remaining = deadline - time.time()
+                self.transport.poll(self.encoder, soc, remaining)
+                if remaining <= 0:
+                    break
+
+        configuration = self.encoder.configuration(soc) if self.published % self.dataRate == 0 else None
+        self.transport.send(self.encoder.data(soc, fracsec, quantities, valid), configuration)
+        self.published += 1
+
+    def close(self):
+        self.transport.close()
+
+#endregion
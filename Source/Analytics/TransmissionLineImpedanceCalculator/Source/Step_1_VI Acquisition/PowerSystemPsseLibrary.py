@@ -11,10 +11,14 @@ PSSE_LOCATION = r"C:\Program Files (x86)\PTI\PSSE32\PSSBIN"
 sys.path.append(PSSE_LOCATION)
 os.environ['PATH'] = os.environ['PATH'] + ';' + PSSE_LOCATION
 
-import psspy       # importing python
+import psspy       # importing python (or SparsePsspy, registered as psspy by the calling script)
 from psspy import _i,_f # importing the default integer and float values used by PSS\E(every API uses them)
-import redirect, random, pdb, time
-redirect.psse2py() # redirecting PSS\E output to python)
+import random, pdb, time
+try:
+    import redirect
+    redirect.psse2py() # redirecting PSS\E output to python)
+except ImportError:
+    pass # SparsePsspy prints nothing to redirect
 
 import numpy
 import difflib
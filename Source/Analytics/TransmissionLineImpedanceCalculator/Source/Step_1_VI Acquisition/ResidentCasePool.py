@@ -0,0 +1,471 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,math,json,shutil,hashlib,multiprocessing
+import numpy
+
+import psspy # the calling script puts PSS\E (or SparsePsspy registered as psspy) on the path
+import PowerSystemPsseLibrary as pssepylib
+import CaseLadder
+import SolvedStates
+import VIAcquisition
+import VIStore
+import PmuErrorModel
+
+#endregion
+
+#region [ Resident Case ]
+
+RungStep = 5 # the time stamps of a 5% level start from its IEEE_118_<level>.sav, if the ladder report lists it
+NotAttempted = 8 # solved of a time stamp whose load level is not above 0%: no case can be scaled to it
+
+def rungPercentage(percentage, step=RungStep):
+    return math.ceil(percentage / step) * step
+
+class ResidentCase(object):
+    """
+    The case of one process, kept in memory between time stamps. A time
+    stamp only scales the load and the generation from the level solved
+    before it and starts from its solution. Only if that diverges, or for
+    the first time stamp, the base case is brought to the ladder rung of
+    the time stamp and warm-started from the state store, or the case of
+    the rung is loaded if the ladder report <prefix>_ladder.csv lists it
+    as solved (see CaseLadder). The measured elements (see
+    VIAcquisition.VITopology) are found once, with the first solved time
+    stamp.
+
+    Every compareEvery chained time stamps (0 never) the time stamp is
+    solved again from its rung, to compare the iterations.
+    """
+
+    def __init__(self, baseCase, prefix, statesFile=None, step=RungStep, compareEvery=0):
+        self.baseCase = baseCase
+        self.prefix = prefix
+        self.states = SolvedStates.SolvedStateStore(statesFile) if statesFile else None
+        self.cases = CaseLadder.readLadderCases(CaseLadder.LadderReportName % prefix)
+        self.step = step
+        self.compareEvery = compareEvery
+        self.level = None
+        self.load_bus = None
+        self.gen_bus = None
+        self.topology = None
+        self.chained = 0
+
+    def load(self, rung):
+        caseName = self.cases.get(rung)
+        if caseName and psspy.case(caseName) == 0:
+            if self.load_bus is None:
+                self.load_bus, self.gen_bus = VIAcquisition.caseBuses()
+            self.level = rung
+            return
+
+        psspy.case(self.baseCase)
+        if self.load_bus is None:
+            self.load_bus, self.gen_bus = VIAcquisition.caseBuses()
+        CaseLadder.scaleLoadLevel(self.load_bus, self.gen_bus, rung, 100.0)
+        if self.states is not None:
+            self.states.apply(rung)
+        self.level = rung
+
+    def solveLevel(self, percentage):
+        CaseLadder.scaleLoadLevel(self.load_bus, self.gen_bus, percentage, self.level)
+        psspy.fdns()
+        N = psspy.solved()
+        self.level = percentage if N == 0 else None
+        return N, psspy.iterat()
+
+    def solve(self, percentage):
+        """
+        Solve the case at percentage of the base case load. Returns the
+        solution status, the iterations and how the time stamp was solved:
+        chained (from the time stamp before), fallback (chained, diverged
+        and solved again from the rung) and ladderIterations (those from
+        the rung, if compared).
+        """
+        if not percentage > 0:
+            # recorded as collapsed; the case stays at the level solved before, for the next time stamp
+            return NotAttempted, 0, {'chained' : False, 'fallback' : False, 'ladderIterations' : None}
+
+        rung = rungPercentage(percentage, self.step)
+        chained = self.level is not None
+        if not chained:
+            self.load(rung)
+        N, iterations = self.solveLevel(percentage)
+        solution = {'chained' : chained, 'fallback' : False, 'ladderIterations' : None}
+
+        if N != 0 and chained:
+            solution['fallback'] = True
+            self.load(rung)
+            N, more = self.solveLevel(percentage)
+            iterations += more
+        elif N == 0 and chained:
+            self.chained += 1
+            if self.compareEvery and self.chained % self.compareEvery == 0:
+                self.load(rung)
+                ladderN, ladderIterations = self.solveLevel(percentage)
+                if ladderN == 0:
+                    solution['ladderIterations'] = ladderIterations
+        return N, iterations, solution
+
+def _solveTimeStamp(resident, percentage, baseKV):
+    with pssepylib.silence():
+        N, iterations, solution = resident.solve(percentage)
+        if N == 0 and resident.topology is None:
+            resident.topology = VIAcquisition.VITopology()
+        measurement = VIAcquisition.measureVI(baseKV, topology=resident.topology) if N == 0 else None
+    return N, iterations, measurement, solution
+
+#endregion
+
+#region [ Worker Process ]
+
+ShardLength = 200 # time stamps solved one after the other by a process, starting from their rung
+
+def shardRanges(count, length=ShardLength):
+    """
+    Split count time stamps into runs of length consecutive ones, as
+    (start, stop) ranges.
+    """
+    return [(start, min(count, start + length)) for start in range(0, count, length)]
+
+def _startProcess():
+    psspy.psseinit(80000)
+
+def _solveShard(arguments):
+    """
+    Solve a run of consecutive time stamps in time order, each starting
+    from the solution of the one before it, and write their measurements
+    to partFile, the bus numbers before the first, and to the store
+    storePart if given. Returns whether the bus numbers were written and
+    (solved, iterations, solution) of every time stamp.
+    """
+    baseCase, prefix, statesFile, baseKV, compareEvery, percentages, partFile, storePart = arguments
+    resident = ResidentCase(baseCase, prefix, statesFile, compareEvery=compareEvery)
+    store = VIStore.VIStoreWriter(storePart, len(percentages)) if storePart else None
+    header = False
+    results = []
+    with open(partFile, 'w') as f1:
+        for row, percentage in enumerate(percentages):
+            N, iterations, measurement, solution = _solveTimeStamp(resident, percentage, baseKV)
+            if N == 0:
+                VIAcquisition.writeMeasurement(f1, measurement, not header)
+                header = True
+            if store is not None:
+                store.write(row, percentage, N, measurement)
+            results.append((N, iterations, solution))
+    if store is not None:
+        store.close()
+    return header, results
+
+def percentageDigest(percentages, length=ShardLength):
+    """
+    The md5 digest of the load levels of a run, read length at a time.
+    """
+    digest = hashlib.md5()
+    for start, stop in shardRanges(len(percentages), length):
+        digest.update(numpy.asarray(percentages[start:stop], dtype=numpy.float64).tobytes())
+    return digest.hexdigest()
+
+#endregion
+
+#region [ Checkpoint ]
+
+CheckpointName = "%s.checkpoint" # the time stamps merged into a VI measurement file, next to it
+
+def readCheckpoint(fileName):
+    """
+    The checkpoint of the acquisition into fileName, None without one. A
+    checkpoint left as .tmp by a crash while replacing it is complete.
+    """
+    for checkpointFile in (CheckpointName % fileName, CheckpointName % fileName + '.tmp'):
+        if os.path.isfile(checkpointFile):
+            try:
+                with open(checkpointFile, 'r') as ReadFile:
+                    return json.load(ReadFile)
+            except ValueError:
+                continue
+    return None
+
+def writeCheckpoint(fileName, checkpoint):
+    checkpointFile = CheckpointName % fileName
+    with open(checkpointFile + '.tmp', 'w') as WriteFile:
+        json.dump(checkpoint, WriteFile)
+        WriteFile.flush()
+        os.fsync(WriteFile.fileno())
+    if os.path.isfile(checkpointFile):
+        os.remove(checkpointFile) # os.rename does not replace a file under Windows
+    os.rename(checkpointFile + '.tmp', checkpointFile)
+
+def removeCheckpoint(fileName):
+    for checkpointFile in (CheckpointName % fileName, CheckpointName % fileName + '.tmp'):
+        if os.path.isfile(checkpointFile):
+            os.remove(checkpointFile)
+
+#endregion
+
+#region [ Resident Case Pool ]
+
+def _newStats():
+    return {'solved' : 0, 'iterations' : 0, 'chained' : 0, 'fallbacks' : 0, 'compared' : 0, 'comparedIterations' : 0, 'ladderIterations' : 0, 'resumed' : 0}
+
+class _Acquisition(object):
+    """
+    The acquisition of one load profile into its own files (see
+    ResidentCasePool.acquire): its checkpoint, its stores, the shards left
+    to solve and the merging of their parts.
+    """
+
+    def __init__(self, pool, name, percentages, fileName, storeFolder=None, resume=True, publisher=None, errorModel=None):
+        if publisher is not None and not storeFolder:
+            raise ValueError('publishing the time stamps needs the store')
+        if errorModel is not None and not storeFolder:
+            raise ValueError('measuring the time stamps needs the store')
+        self.pool = pool
+        self.name = name
+        self.percentages = percentages
+        self.fileName = fileName
+        self.storeFolder = storeFolder
+        self.publisher = publisher
+        self.errorModel = errorModel
+        self.measuredFolder = PmuErrorModel.MeasuredStoreName % os.path.splitext(storeFolder)[0] if errorModel is not None else None
+        self.stats = _newStats()
+        run = {
+            'count' : len(percentages),
+            'shardLength' : pool.shardLength,
+            'digest' : percentageDigest(percentages, pool.shardLength),
+            'store' : storeFolder,
+            }
+        if errorModel is not None:
+            run['measured'] = dict(errorModel.parameters(), store=self.measuredFolder)
+        checkpoint = readCheckpoint(fileName) if resume else None
+        if checkpoint is not None and checkpoint['run'] != run:
+            raise ValueError('%s is the checkpoint of another run; remove it to start again' % (CheckpointName % fileName))
+        if checkpoint is None:
+            checkpoint = {'run' : run, 'next' : 0, 'size' : os.path.getsize(fileName) if os.path.isfile(fileName) else 0, 'header' : False}
+            self.store = VIStore.VIStoreWriter(storeFolder, len(percentages)) if storeFolder else None
+            self.measured = VIStore.VIStoreWriter(self.measuredFolder, len(percentages)) if self.measuredFolder else None
+            writeCheckpoint(fileName, checkpoint)
+        else:
+            self.store = VIStore.VIStoreWriter(storeFolder, len(percentages), resume=True) if storeFolder else None
+            self.measured = VIStore.VIStoreWriter(self.measuredFolder, len(percentages), resume=True) if self.measuredFolder else None
+            if os.path.getsize(fileName) > checkpoint['size']:
+                with open(fileName, 'r+b') as merged:
+                    merged.truncate(checkpoint['size'])
+        self.checkpoint = checkpoint
+        self.stats['resumed'] = checkpoint['next']
+        self.header = checkpoint['header']
+        self.index = checkpoint['next']
+        self.merged = open(fileName, 'ab')
+
+        self.ranges = [(start, stop) for start, stop in shardRanges(len(percentages), pool.shardLength) if start >= checkpoint['next']]
+        self.parts = [('%s.%d.part' % (fileName, start), '%s.%d.part' % (storeFolder, start) if storeFolder else None) for start, stop in self.ranges]
+
+    def shard(self, number):
+        """
+        The arguments of _solveShard for shard number of those left.
+        """
+        (start, stop), (partFile, storePart) = self.ranges[number], self.parts[number]
+        pool = self.pool
+        return (pool.baseCase, pool.prefix, pool.statesFile, pool.baseKV, pool.compareEvery,
+                numpy.asarray(self.percentages[start:stop], dtype=numpy.float64), partFile, storePart)
+
+    def mergeShard(self, number, shardHeader, results):
+        """
+        Merge the parts of shard number, checkpoint them and yield (index,
+        solved, iterations) of its time stamps.
+        """
+        (start, stop), (partFile, storePart) = self.ranges[number], self.parts[number]
+        self.pool.merge(partFile, self.merged, self.header and shardHeader)
+        self.header = self.header or shardHeader
+        if self.store is not None:
+            self.pool.mergeStore(storePart, self.store, start, self.measured, self.errorModel)
+            self.store.flush()
+            if self.measured is not None:
+                self.measured.flush()
+        self.merged.flush()
+        os.fsync(self.merged.fileno())
+        self.checkpoint.update({'next' : stop, 'size' : self.merged.tell(), 'header' : self.header})
+        writeCheckpoint(self.fileName, self.checkpoint)
+
+        for N, iterations, solution in results:
+            self.pool.count(self.stats, N, iterations, solution)
+            if self.publisher is not None:
+                self.publisher.publish(self.index, self.store.topology, self.store.row(self.index), N == 0)
+            yield self.index, N, iterations
+            self.index += 1
+
+    def finish(self):
+        self.merged.close()
+        if self.store is not None:
+            self.store.close()
+        if self.measured is not None:
+            if self.measured.topology is not None:
+                self.errorModel.save(self.measuredFolder, self.measured.topology)
+            self.measured.close()
+        removeCheckpoint(self.fileName)
+
+    def close(self):
+        if not self.merged.closed:
+            self.merged.close()
+
+class ResidentCasePool(object):
+    """
+    Solves the time stamps of load profiles in shards of ShardLength
+    consecutive ones, each solved by one process in time order with the
+    case kept in memory (see ResidentCase), so that a time stamp only
+    costs the load scaling, a solution from the one before it and the
+    measurement. Every shard writes its own part file; they are merged in
+    time order as they complete, and after each one a checkpoint records
+    the time stamps and the length of the file merged so far, so that an
+    interrupted run resumes after the last merged shard. The shards of
+    several profiles (acquireProfiles) are solved by the same processes.
+
+    The shards do not depend on the number of processes, so the merged
+    file is the same as that of the serial run (processes=1, solved in this
+    process). Under Windows the processes re-import the main script, so it
+    has to keep its code under if __name__ == '__main__'.
+    """
+
+    def __init__(self, baseCase, baseKV, processes=None, prefix='IEEE_118', statesFile=None, compareEvery=0, shardLength=ShardLength):
+        self.baseCase = baseCase
+        self.baseKV = baseKV
+        self.prefix = prefix
+        self.statesFile = statesFile
+        self.compareEvery = compareEvery
+        self.shardLength = shardLength
+        self.processes = processes or multiprocessing.cpu_count()
+        self.profiles = [] # (name, stats) of every profile acquired
+
+    def acquire(self, percentages, fileName, storeFolder=None, resume=True, publisher=None, errorModel=None):
+        """
+        Solve the case at every load level of percentages (in % of the base
+        case load, all above 0) and append the measurements of the solved
+        ones to fileName, the bus numbers before the first (see
+        VIAcquisition.writeMeasurement), and if storeFolder is given write
+        all of them to that columnar store (see VIStore). Yields (index,
+        solved, iterations) of every time stamp, in order, once its shard is
+        merged; a time stamp whose solved is not 0 collapsed and has no
+        measurement. percentages is only read a shard at a time, so it can
+        be a LoadProfile.ProfilePercentages as well as a list or an array.
+
+        With resume, a run of the same percentages into fileName that was
+        interrupted goes on after its last merged shard (see readCheckpoint):
+        what was written to fileName after it is cut off and the time stamps
+        before it are not yielded. The checkpoint is removed at the end.
+
+        A publisher (see PmuPublisher) is given every time stamp from the
+        store once merged, so it needs storeFolder.
+
+        With an errorModel (see PmuErrorModel) the time stamps are also
+        measured as they are merged, into the store of the same layout
+        <storeFolder without .vi>_measured.vi, with the ratio errors of its
+        channels; it needs storeFolder too.
+        """
+        profile = {'name' : None, 'percentages' : percentages, 'fileName' : fileName, 'storeFolder' : storeFolder,
+                   'publisher' : publisher, 'errorModel' : errorModel}
+        for name, index, N, iterations in self.acquireProfiles([profile], resume):
+            yield index, N, iterations
+
+    def acquireProfiles(self, profiles, resume=True):
+        """
+        Acquire several load profiles at once, e.g. the peak and the valley
+        one, each into its own files: profiles is a list of dicts of a name
+        and the arguments of acquire (percentages, fileName and optionally
+        storeFolder, publisher and errorModel). Their shards are solved in
+        turn by the same processes, so that the processes stay busy while
+        there is any shard left. Yields (name, index, solved, iterations) of
+        every time stamp, those of each profile in order.
+        """
+        acquisitions = []
+        pool = None
+        try:
+            for profile in profiles:
+                arguments = dict(profile)
+                name = arguments.pop('name')
+                acquisitions.append(_Acquisition(self, name, resume=resume, **arguments))
+                self.profiles.append((name, acquisitions[-1].stats))
+
+            # one shard of every profile in turn
+            order = []
+            for number in range(max([len(acquisition.ranges) for acquisition in acquisitions] + [0])):
+                order.extend((acquisition, number) for acquisition in acquisitions if number < len(acquisition.ranges))
+            shards = (acquisition.shard(number) for acquisition, number in order)
+
+            if self.processes == 1 or len(order) < 2:
+                runs = (_solveShard(shard) for shard in shards)
+            else:
+                pool = multiprocessing.Pool(min(self.processes, len(order)), _startProcess)
+                runs = pool.imap(_solveShard, shards, 1)
+
+            for position, (shardHeader, results) in enumerate(runs):
+                acquisition, number = order[position]
+                for index, N, iterations in acquisition.mergeShard(number, shardHeader, results):
+                    yield acquisition.name, index, N, iterations
+                if number == len(acquisition.ranges) - 1:
+                    acquisition.finish()
+            for acquisition in acquisitions:
+                if not acquisition.ranges:
+                    acquisition.finish() # resumed after its last shard
+        finally:
+            for acquisition in acquisitions:
+                acquisition.close()
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def merge(self, partFile, merged, skipHeader):
+        """
+        Append a part file to the merged file and remove it; skipHeader
+        drops its bus numbers, already written by an earlier part.
+        """
+        with open(partFile, 'rb') as part:
+            if skipHeader:
+                part.readline()
+            shutil.copyfileobj(part, merged)
+        os.remove(partFile)
+
+    def mergeStore(self, storePart, store, start, measured=None, errorModel=None):
+        """
+        Copy the time stamps of a part store to the store from row start on,
+        and their measurements by errorModel to the measured store if
+        given, and remove it.
+        """
+        part = VIStore.VIStore(storePart)
+        store.copy(start, part)
+        if measured is not None:
+            measured.copy(start, part, errorModel.measure)
+        part.close()
+        del part
+        shutil.rmtree(storePart)
+
+    def count(self, stats, N, iterations, solution):
+        if N == 0:
+            stats['solved'] += 1
+            stats['iterations'] += iterations
+        stats['chained'] += solution['chained'] and not solution['fallback']
+        stats['fallbacks'] += solution['fallback']
+        if solution['ladderIterations'] is not None:
+            stats['compared'] += 1
+            stats['comparedIterations'] += iterations
+            stats['ladderIterations'] += solution['ladderIterations']
+
+    def report(self):
+        """
+        How the time stamps of every profile acquired were solved, and the
+        iterations saved against starting from the ladder on the compared
+        ones.
+        """
+        lines = []
+        for name, stats in self.profiles:
+            prefix = '%s: ' % name if name is not None else ''
+            if stats['resumed']:
+                lines.append('%sresumed from the checkpoint at time stamp %d' % (prefix, stats['resumed'] + 1))
+            lines.append('%s%d time stamps solved, %.2f iterations each; %d started from the time stamp before, %d fell back to the ladder' % (
+                prefix, stats['solved'], stats['iterations'] / max(1, stats['solved']), stats['chained'], stats['fallbacks']))
+            if stats['compared']:
+                lines.append('%s%d compared: %.2f iterations from the time stamp before, %.2f from the ladder (%.0f%% fewer)' % (
+                    prefix, stats['compared'], stats['comparedIterations'] / stats['compared'], stats['ladderIterations'] / stats['compared'],
+                    100.0 * (1 - stats['comparedIterations'] / max(1, stats['ladderIterations']))))
+        return '\n'.join(lines)
+
+#endregion
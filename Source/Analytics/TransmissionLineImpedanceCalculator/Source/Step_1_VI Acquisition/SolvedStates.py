@@ -0,0 +1,87 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os
+import numpy
+
+import psspy # the calling script puts PSS\E (or SparsePsspy registered as psspy) on the path
+from psspy import _i,_f,_s
+
+#endregion
+
+#region [ Solved State Store ]
+
+StatesFileName = "%s_states.npy" # the solved load levels of a ladder, next to its base case
+
+def writeStates(fileName, buses, levels):
+    """
+    Write the solved states of a ladder to one float64 .npy array:
+
+        row 0       nan, bus numbers..., nan...
+        row 1 + k   percentage, voltage magnitudes (pu)..., angles (degrees)...
+
+    levels is a list of (percentage, vm, va), vm and va ordered as buses.
+    """
+    buses = list(buses)
+    n = len(buses)
+    levels = sorted(levels, key=lambda level: level[0])
+    states = numpy.lib.format.open_memmap(fileName + '.tmp', mode='w+', dtype=numpy.float64, shape=(1 + len(levels), 1 + 2 * n))
+    states[0, :] = numpy.nan
+    states[0, 1:1 + n] = buses
+    for row, (percentage, vm, va) in enumerate(levels):
+        states[1 + row, 0] = percentage
+        states[1 + row, 1:1 + n] = vm
+        states[1 + row, 1 + n:] = va
+    states.flush()
+    del states
+    if os.path.isfile(fileName):
+        os.remove(fileName) # os.rename does not replace a file under Windows
+    os.rename(fileName + '.tmp', fileName)
+
+def setVoltages(buses, vm, va):
+    """
+    Set the voltages of the buses of the case in memory; the next solution
+    starts from them.
+    """
+    for bus, magnitude, angle in zip(buses, vm, va):
+        psspy.bus_chng_3(bus, [_i, _i, _i, _i], [_f, float(magnitude), float(angle), _f, _f, _f, _f], _s)
+
+class SolvedStateStore(object):
+    """
+    The solved load levels of a ladder, memory-mapped. state(percentage)
+    interpolates the voltages of the two neighbouring levels to warm-start
+    the solution of any load level; beyond the ladder the nearest level is
+    used.
+    """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.states = numpy.load(fileName, mmap_mode='r')
+        self.n = (self.states.shape[1] - 1) // 2
+        self.buses = [int(bus) for bus in self.states[0, 1:1 + self.n]]
+        self.percentages = numpy.array(self.states[1:, 0])
+
+    def state(self, percentage):
+        """
+        The warm-start voltage magnitudes (pu) and angles (degrees) of the
+        buses at percentage.
+        """
+        upper = int(numpy.searchsorted(self.percentages, percentage))
+        if upper == 0 or upper == len(self.percentages):
+            row = 1 + min(upper, len(self.percentages) - 1)
+            return self.states[row, 1:1 + self.n], self.states[row, 1 + self.n:]
+        below, above = self.percentages[upper - 1], self.percentages[upper]
+        weight = (percentage - below) / (above - below)
+        lower, higher = self.states[upper], self.states[upper + 1]
+        state = lower[1:] + weight * (higher[1:] - lower[1:])
+        return state[:self.n], state[self.n:]
+
+    def apply(self, percentage):
+        """
+        Set the voltages of the case in memory to the warm-start state of
+        percentage; the next solution starts from them.
+        """
+        vm, va = self.state(percentage)
+        setVoltages(self.buses, vm, va)
+
+#endregion
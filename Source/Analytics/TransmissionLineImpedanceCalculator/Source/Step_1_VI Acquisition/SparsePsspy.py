@@ -0,0 +1,1630 @@
+# Pure-Python stand-in for the subset of the PSS\E psspy API used by the analytics.
+#
+# The network is kept in memory and solved with a scipy.sparse Newton-Raphson
+# (fnsl) or fast decoupled (fdns) power flow, so the PSS\E scripts can run
+# unchanged on machines without PSS\E:
+#
+#     import SparsePsspy as psspy
+#     sys.modules['psspy'] = psspy   # so that "from psspy import _i,_f" works
+#
+# Cases are read from and written to PSS\E RAW version 33 files. The binary
+# *.sav format is not documented, so a case name ending in .sav is mapped to
+# the RAW file next to it (IEEE_118.sav -> IEEE_118.raw, which is shipped);
+# convert other saved cases once with PSS\E, e.g.
+# psspy.writerawversion('33', 'IEEE_118.raw'). Until a case is loaded the
+# API functions return an error code rather than data.
+#
+# Modelling notes: three-winding transformers, dc lines and FACTS devices are
+# carried through case/save but are not part of the solution; switched shunts
+# are held at BINIT; generators regulate their own bus.
+from __future__ import with_statement
+from __future__ import division
+import os,sys,math,functools
+
+import numpy
+import scipy.sparse
+import scipy.sparse.linalg
+
+#region [ Default Values ]
+
+_i = -100000000 # default integer value
+_f = -1.0e+20   # default float value
+_s = '\xff'     # default string value
+
+#endregion
+
+#region [ Solver Settings ]
+
+# fdns keeps the B'/B'' factors between solves and applies later tap and
+# shunt changes as a low-rank correction; once the changes touch more than
+# this many buses the matrix is refactored. 0 refactors on every change.
+FACTOR_UPDATE_RANK = 20
+
+#endregion
+
+#region [ Case Data ]
+
+class Record(object):
+    """
+    One data record of the RAW file. The original fields are kept so that
+    the values this module does not model are written back unchanged.
+    """
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+
+def _splitRecord(line):
+    """
+    Split one RAW record into its fields, dropping the trailing / comment.
+    """
+    text = []
+    quoted = False
+    for char in line.rstrip('\r\n'):
+        if char == "'":
+            quoted = not quoted
+        elif char == '/' and not quoted:
+            break
+        text.append(char)
+    text = ''.join(text).strip()
+    if not text:
+        return []
+
+    # PSS\E writes comma separated records, hand edited files may use blanks
+    commaSeparated = ',' in ''.join(text.split("'")[0::2])
+    fields = []
+    current = []
+    quoted = False
+    for char in text:
+        if char == "'":
+            quoted = not quoted
+            current.append(char)
+        elif not quoted and ((commaSeparated and char == ',') or (not commaSeparated and char.isspace())):
+            if commaSeparated or current:
+                fields.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    fields.append(''.join(current).strip())
+    return fields
+
+def _string(fields, index, default=''):
+    if index < len(fields) and fields[index] != '':
+        return fields[index].strip().strip("'").strip()
+    return default
+
+def _int(fields, index, default=0):
+    if index < len(fields) and fields[index] != '':
+        return int(float(fields[index]))
+    return default
+
+def _float(fields, index, default=0.0):
+    if index < len(fields) and fields[index] != '':
+        return float(fields[index])
+    return default
+
+def _formatValue(value):
+    if isinstance(value, float):
+        return repr(float(value)) # numpy scalars print as np.float64(...) otherwise
+    return str(value)
+
+def _formatString(value, width):
+    return "'" + value.ljust(width) + "'"
+
+class Network(object):
+    """
+    In-memory power flow case read from a PSS\E RAW version 33 file.
+    """
+
+    SECTIONS = ['BUS', 'LOAD', 'FIXED SHUNT', 'GENERATOR', 'BRANCH', 'TRANSFORMER',
+                'AREA', 'TWO-TERMINAL DC', 'VSC DC LINE', 'IMPEDANCE CORRECTION',
+                'MULTI-TERMINAL DC', 'MULTI-SECTION LINE', 'ZONE', 'INTER-AREA TRANSFER',
+                'OWNER', 'FACTS DEVICE', 'SWITCHED SHUNT', 'GNE', 'INDUCTION MACHINE']
+
+    def __init__(self):
+        self.header = []
+        self.buses = []
+        self.loads = []
+        self.shunts = []
+        self.machines = []
+        self.branches = []
+        self.transformers = []
+        self.switchedShunts = []
+        self.verbatim = {}
+        self.sbase = 100.0
+        self.lookup = None
+
+    #region [ Read ]
+
+    @classmethod
+    def read(cls, fileName):
+        network = cls()
+        with open(fileName) as ReadFile:
+            lines = ReadFile.readlines()
+
+        network.header = lines[0:3]
+        fields = _splitRecord(lines[0])
+        network.sbase = _float(fields, 1, 100.0)
+        revision = _int(fields, 2, 33)
+        if revision != 33:
+            raise ValueError('RAW version %s is not supported, write the case with version 33' % revision)
+
+        # every section ends with a record starting with 0, the file with Q
+        position = 3
+        for section in cls.SECTIONS:
+            records = []
+            terminator = 'Q'
+            while position < len(lines):
+                fields = _splitRecord(lines[position])
+                position += 1
+                if not fields:
+                    continue
+                if fields[0] in ('0', 'Q'):
+                    terminator = fields[0]
+                    break
+                if section == 'TRANSFORMER':
+                    count = 4 if _int(fields, 2) == 0 else 5
+                    records.append([fields] + [_splitRecord(line) for line in lines[position:position + count - 1]])
+                    position += count - 1
+                else:
+                    records.append(lines[position - 1])
+            network.addSection(section, records)
+            if terminator == 'Q':
+                break
+        return network
+
+    def addSection(self, section, records):
+        if section == 'BUS':
+            for line in records:
+                bus = Record(_splitRecord(line))
+                f = bus.fields
+                bus.number = _int(f, 0)
+                bus.name = _string(f, 1)
+                bus.baskv = _float(f, 2)
+                bus.ide = _int(f, 3, 1)
+                bus.area = _int(f, 4, 1)
+                bus.zone = _int(f, 5, 1)
+                bus.owner = _int(f, 6, 1)
+                bus.vm = _float(f, 7, 1.0)
+                bus.va = _float(f, 8, 0.0)
+                self.buses.append(bus)
+        elif section == 'LOAD':
+            for line in records:
+                load = Record(_splitRecord(line))
+                f = load.fields
+                load.bus = _int(f, 0)
+                load.id = _string(f, 1, '1')
+                load.status = _int(f, 2, 1)
+                load.area = _int(f, 3, 1)
+                load.zone = _int(f, 4, 1)
+                load.pl = _float(f, 5)
+                load.ql = _float(f, 6)
+                load.ip = _float(f, 7)
+                load.iq = _float(f, 8)
+                load.yp = _float(f, 9)
+                load.yq = _float(f, 10)
+                load.owner = _int(f, 11, 1)
+                self.loads.append(load)
+        elif section == 'FIXED SHUNT':
+            for line in records:
+                shunt = Record(_splitRecord(line))
+                f = shunt.fields
+                shunt.bus = _int(f, 0)
+                shunt.id = _string(f, 1, '1')
+                shunt.status = _int(f, 2, 1)
+                shunt.gl = _float(f, 3)
+                shunt.bl = _float(f, 4)
+                self.shunts.append(shunt)
+        elif section == 'GENERATOR':
+            for line in records:
+                machine = Record(_splitRecord(line))
+                f = machine.fields
+                machine.bus = _int(f, 0)
+                machine.id = _string(f, 1, '1')
+                machine.pg = _float(f, 2)
+                machine.qg = _float(f, 3)
+                machine.qt = _float(f, 4, 9999.0)
+                machine.qb = _float(f, 5, -9999.0)
+                machine.vs = _float(f, 6, 1.0)
+                machine.ireg = _int(f, 7, 0)
+                machine.mbase = _float(f, 8, self.sbase)
+                machine.stat = _int(f, 14, 1)
+                machine.pt = _float(f, 16, 9999.0)
+                machine.pb = _float(f, 17, -9999.0)
+                self.machines.append(machine)
+        elif section == 'BRANCH':
+            for line in records:
+                branch = Record(_splitRecord(line))
+                f = branch.fields
+                branch.i = _int(f, 0)
+                branch.j = abs(_int(f, 1))
+                branch.ckt = _string(f, 2, '1')
+                branch.r = _float(f, 3)
+                branch.x = _float(f, 4)
+                branch.b = _float(f, 5)
+                branch.gi = _float(f, 9)
+                branch.bi = _float(f, 10)
+                branch.gj = _float(f, 11)
+                branch.bj = _float(f, 12)
+                branch.st = _int(f, 13, 1)
+                self.branches.append(branch)
+        elif section == 'TRANSFORMER':
+            for lines in records:
+                if _int(lines[0], 2) != 0:
+                    self.verbatim.setdefault('THREE WINDING', []).append(lines)
+                    continue
+                transformer = Record(lines[0])
+                transformer.lines = lines
+                f1, f2, f3, f4 = lines
+                transformer.i = _int(f1, 0)
+                transformer.j = abs(_int(f1, 1))
+                transformer.ckt = _string(f1, 3, '1')
+                transformer.cw = _int(f1, 4, 1)
+                transformer.cz = _int(f1, 5, 1)
+                transformer.cm = _int(f1, 6, 1)
+                transformer.mag1 = _float(f1, 7)
+                transformer.mag2 = _float(f1, 8)
+                transformer.name = _string(f1, 10)
+                transformer.stat = _int(f1, 11, 1)
+                transformer.r = _float(f2, 0)
+                transformer.x = _float(f2, 1)
+                transformer.sbase12 = _float(f2, 2, self.sbase)
+                transformer.windv1 = _float(f3, 0, 1.0)
+                transformer.nomv1 = _float(f3, 1)
+                transformer.ang1 = _float(f3, 2)
+                transformer.windv2 = _float(f4, 0, 1.0)
+                transformer.nomv2 = _float(f4, 1)
+                self.transformers.append(transformer)
+        elif section == 'SWITCHED SHUNT':
+            for line in records:
+                shunt = Record(_splitRecord(line))
+                f = shunt.fields
+                shunt.bus = _int(f, 0)
+                shunt.stat = _int(f, 3, 1)
+                shunt.binit = _float(f, 9)
+                self.switchedShunts.append(shunt)
+                self.verbatim.setdefault(section, []).append(line)
+        else:
+            self.verbatim[section] = records
+
+    def findElement(self, ibus, jbus, ckt):
+        """
+        The branch or two-winding transformer between two buses, in either
+        direction, or None.
+        """
+        if self.lookup is None:
+            self.lookup = {}
+            for element in self.branches + self.transformers:
+                self.lookup.setdefault((min(element.i, element.j), max(element.i, element.j), element.ckt.strip()), element)
+        return self.lookup.get((min(ibus, jbus), max(ibus, jbus), str(ckt).strip()))
+
+    #endregion
+
+    #region [ Write ]
+
+    def write(self, fileName):
+        out = []
+        out.extend(self.header)
+
+        for bus in self.buses:
+            f = bus.fields
+            f[7] = _formatValue(bus.vm)
+            f[8] = _formatValue(bus.va)
+            out.append(','.join(f) + '\n')
+        out.append('0 / END OF BUS DATA, BEGIN LOAD DATA\n')
+
+        for load in self.loads:
+            f = load.fields
+            f[2] = _formatValue(load.status)
+            f[5] = _formatValue(load.pl)
+            f[6] = _formatValue(load.ql)
+            f[7] = _formatValue(load.ip)
+            f[8] = _formatValue(load.iq)
+            f[9] = _formatValue(load.yp)
+            f[10] = _formatValue(load.yq)
+            out.append(','.join(f) + '\n')
+        out.append('0 / END OF LOAD DATA, BEGIN FIXED SHUNT DATA\n')
+
+        for shunt in self.shunts:
+            f = shunt.fields
+            f[2] = _formatValue(shunt.status)
+            f[3] = _formatValue(shunt.gl)
+            f[4] = _formatValue(shunt.bl)
+            out.append(','.join(f) + '\n')
+        out.append('0 / END OF FIXED SHUNT DATA, BEGIN GENERATOR DATA\n')
+
+        for machine in self.machines:
+            f = machine.fields
+            f[2] = _formatValue(machine.pg)
+            f[3] = _formatValue(machine.qg)
+            f[14] = _formatValue(machine.stat)
+            out.append(','.join(f) + '\n')
+        out.append('0 / END OF GENERATOR DATA, BEGIN BRANCH DATA\n')
+
+        for branch in self.branches:
+            f = branch.fields
+            f[13] = _formatValue(branch.st)
+            out.append(','.join(f) + '\n')
+        out.append('0 / END OF BRANCH DATA, BEGIN TRANSFORMER DATA\n')
+
+        for transformer in self.transformers:
+            f1, f2, f3, f4 = transformer.lines
+            f1[11] = _formatValue(transformer.stat)
+            f2[0] = _formatValue(transformer.r)
+            f2[1] = _formatValue(transformer.x)
+            f2[2] = _formatValue(transformer.sbase12)
+            f3[0] = _formatValue(transformer.windv1)
+            f3[1] = _formatValue(transformer.nomv1)
+            f3[2] = _formatValue(transformer.ang1)
+            f4[0] = _formatValue(transformer.windv2)
+            f4[1] = _formatValue(transformer.nomv2)
+            for f in transformer.lines:
+                out.append(','.join(f) + '\n')
+        for lines in self.verbatim.get('THREE WINDING', []):
+            for f in lines:
+                out.append(','.join(f) + '\n')
+
+        for index, section in enumerate(self.SECTIONS[6:]):
+            out.append('0 / END OF %s DATA, BEGIN %s DATA\n' % (self.SECTIONS[5 + index], section))
+            out.extend(self.verbatim.get(section, []))
+        out.append('0 / END OF %s DATA\n' % self.SECTIONS[-1])
+        out.append('Q\n')
+
+        with open(fileName, 'w') as WriteFile:
+            WriteFile.writelines(out)
+
+    #endregion
+
+#endregion
+
+#region [ Power Flow ]
+
+class UpdatedFactor(object):
+    """
+    Sparse LU factors of B' or B'' reduced to the solved buses, kept across
+    solves. Changes made since the factorization are applied with the
+    Woodbury identity instead of refactoring:
+
+        (A + E D E')^-1 = A^-1 - A^-1 E D (I + E' A^-1 E D)^-1 E' A^-1
+
+    where E selects the buses touched by the changes and D holds the sum of
+    the changes to their entries. Each touched bus costs one extra solve when
+    it is first seen; a solve then costs the LU solve plus a small dense
+    product.
+    """
+
+    def __init__(self, matrix, positions, applied, maxRank):
+        self.lu = scipy.sparse.linalg.splu(matrix.tocsc())
+        self.size = len(positions)
+        self.position = dict((bus, k) for k, bus in enumerate(positions.tolist()))
+        self.applied = applied
+        self.maxRank = maxRank
+        self.touched = []
+        self.delta = numpy.zeros((0, 0))
+        self.W = numpy.zeros((self.size, 0))
+        self.correction = None
+
+    def absorb(self, changes, kind):
+        """
+        Fold the changes logged since the last call into the correction.
+        Returns False when the matrix should be refactored instead.
+        """
+        for changeKind, buses, delta in changes[self.applied:]:
+            if changeKind != kind:
+                continue
+            keep = [k for k, bus in enumerate(buses) if bus in self.position]
+            if not keep:
+                continue
+            rows = [self.position[buses[k]] for k in keep]
+            new = [row for row in rows if row not in self.touched]
+            if len(self.touched) + len(new) > self.maxRank:
+                return False
+            if new:
+                E = numpy.zeros((self.size, len(new)))
+                E[new, numpy.arange(len(new))] = 1.0
+                self.W = numpy.hstack([self.W, self.lu.solve(E)])
+                grown = numpy.zeros((len(self.touched) + len(new),) * 2)
+                grown[:len(self.touched), :len(self.touched)] = self.delta
+                self.delta = grown
+                self.touched.extend(new)
+            index = [self.touched.index(row) for row in rows]
+            self.delta[numpy.ix_(index, index)] += delta[numpy.ix_(keep, keep)]
+        self.applied = len(changes)
+
+        if self.touched:
+            K = numpy.eye(len(self.touched)) + self.W[self.touched, :].dot(self.delta)
+            try:
+                self.correction = numpy.linalg.solve(K.T, self.delta.T).T # D K^-1
+            except numpy.linalg.LinAlgError:
+                return False
+        return True
+
+    def solve(self, b):
+        x = self.lu.solve(b)
+        if self.touched:
+            x = x - self.W.dot(self.correction.dot(x[self.touched]))
+        return x
+
+class CompiledNetwork(object):
+    """
+    Arrays describing the in-service network, rebuilt whenever the topology
+    changes. Tap and shunt changes are applied in place (updateElement,
+    updateShunt) so that the fast decoupled factors survive them; load and
+    generation changes only affect the injections.
+    """
+
+    def __init__(self, network):
+        self.network = network
+        buses = network.buses
+        self.n = len(buses)
+        self.busIndex = dict((bus.number, index) for index, bus in enumerate(buses))
+        self.baskv = numpy.array([bus.baskv for bus in buses])
+        self.ide = numpy.array([bus.ide for bus in buses])
+
+        # every in-service line and two-winding transformer as a pi model
+        elements = []
+        for branch in network.branches:
+            if branch.st != 1 or branch.i not in self.busIndex or branch.j not in self.busIndex:
+                continue
+            elements.append((branch, self.busIndex[branch.i], self.busIndex[branch.j]))
+        for transformer in network.transformers:
+            if transformer.stat == 0 or transformer.i not in self.busIndex or transformer.j not in self.busIndex:
+                continue
+            elements.append((transformer, self.busIndex[transformer.i], self.busIndex[transformer.j]))
+        self.elements = [element for element, f, t in elements]
+        self.elementIndex = dict((id(element), k) for k, element in enumerate(self.elements))
+        self.f = numpy.array([f for element, f, t in elements], dtype=int)
+        self.t = numpy.array([t for element, f, t in elements], dtype=int)
+
+        m = len(elements)
+        self.Yff = numpy.zeros(m, dtype=complex)
+        self.Yft = numpy.zeros(m, dtype=complex)
+        self.Ytf = numpy.zeros(m, dtype=complex)
+        self.Ytt = numpy.zeros(m, dtype=complex)
+        self.bx = numpy.zeros(m) # 1/x for the fast decoupled B'
+        self.shift = numpy.ones(m, dtype=complex)
+        for k, element in enumerate(self.elements):
+            self.Yff[k], self.Yft[k], self.Ytf[k], self.Ytt[k], self.bx[k], self.shift[k] = self.elementAdmittance(element)
+
+        # fixed and switched shunts in pu
+        self.shunt = numpy.zeros(self.n, dtype=complex)
+        for shunt in network.shunts:
+            if shunt.status == 1 and shunt.bus in self.busIndex:
+                self.shunt[self.busIndex[shunt.bus]] += complex(shunt.gl, shunt.bl) / network.sbase
+        for shunt in network.switchedShunts:
+            if shunt.stat == 1 and shunt.bus in self.busIndex:
+                self.shunt[self.busIndex[shunt.bus]] += complex(0.0, shunt.binit) / network.sbase
+
+        # fast decoupled factors by solved bus set, and the B'/B'' changes
+        # made since the last solve
+        self.factors = {}
+        self.changes = []
+
+    def elementAdmittance(self, element):
+        network = self.network
+        if not hasattr(element, 'windv1'):
+            z = complex(element.r, element.x)
+            y = 1.0 / z if z != 0 else complex(0.0, -1.0e6)
+            charging = complex(0.0, element.b / 2.0)
+            Yff = y + charging + complex(element.gi, element.bi)
+            Ytt = y + charging + complex(element.gj, element.bj)
+            bx = 1.0 / element.x if element.x != 0 else 1.0e6
+            return Yff, -y, -y, Ytt, bx, 1.0 + 0j
+
+        # impedance on system base
+        r, x = element.r, element.x
+        if element.cz == 2:
+            r, x = r * network.sbase / element.sbase12, x * network.sbase / element.sbase12
+        elif element.cz == 3:
+            r = element.r / (1.0e6 * element.sbase12)
+            x = math.sqrt(max(element.x ** 2 - r ** 2, 0.0))
+            r, x = r * network.sbase / element.sbase12, x * network.sbase / element.sbase12
+
+        # magnetizing admittance at the winding one bus
+        if element.cm == 1:
+            ymag = complex(element.mag1, element.mag2)
+        else:
+            g = element.mag1 / (1.0e6 * network.sbase)
+            ymag = complex(g, -math.sqrt(max(element.mag2 ** 2 - g ** 2, 0.0)) * element.sbase12 / network.sbase)
+
+        # off-nominal turns ratios in pu of the bus base voltages
+        t1 = self.windingRatio(element.cw, element.windv1, element.nomv1, self.network.buses[self.busIndex[element.i]].baskv)
+        t2 = self.windingRatio(element.cw, element.windv2, element.nomv2, self.network.buses[self.busIndex[element.j]].baskv)
+        shift = numpy.exp(1j * math.radians(element.ang1))
+
+        z = complex(r, x)
+        y = 1.0 / z if z != 0 else complex(0.0, -1.0e6)
+        Yff = y / (t1 * t1) + ymag
+        Yft = -y / (t1 * numpy.conj(shift) * t2)
+        Ytf = -y / (t1 * shift * t2)
+        Ytt = y / (t2 * t2)
+        bx = 1.0 / x if x != 0 else 1.0e6
+        return Yff, Yft, Ytf, Ytt, bx, shift
+
+    def windingRatio(self, cw, windv, nomv, baskv):
+        if cw == 2:
+            return windv / baskv if baskv else windv
+        if cw == 3:
+            nominal = nomv if nomv else baskv
+            return windv * nominal / baskv if baskv else windv
+        return windv
+
+    def updateElement(self, element):
+        """
+        Recompute the admittances of an in-service element after its
+        impedance or ratio changed and log the change to B' and B''.
+        """
+        k = self.elementIndex.get(id(element))
+        if k is None:
+            return
+        before = self.decoupledBlock(k)
+        bx = self.bx[k]
+        self.Yff[k], self.Yft[k], self.Ytf[k], self.Ytt[k], self.bx[k], self.shift[k] = self.elementAdmittance(element)
+        buses = [self.f[k], self.t[k]]
+        if self.bx[k] != bx:
+            d = self.bx[k] - bx
+            self.changes.append(('P', buses, numpy.array([[d, -d], [-d, d]])))
+        self.changes.append(('Q', buses, self.decoupledBlock(k) - before))
+
+    def decoupledBlock(self, k):
+        Yft = self.Yft[k] * numpy.conj(self.shift[k])
+        Ytf = self.Ytf[k] * self.shift[k]
+        return -numpy.array([[self.Yff[k].imag, Yft.imag], [Ytf.imag, self.Ytt[k].imag]])
+
+    def updateShunt(self, busNumber):
+        """
+        Recompute the shunt of a bus after its fixed shunts changed and log
+        the change to B''.
+        """
+        network = self.network
+        k = self.busIndex[busNumber]
+        shunt = 0j
+        for record in network.shunts:
+            if record.status == 1 and record.bus == busNumber:
+                shunt += complex(record.gl, record.bl) / network.sbase
+        for record in network.switchedShunts:
+            if record.stat == 1 and record.bus == busNumber:
+                shunt += complex(0.0, record.binit) / network.sbase
+        delta = -(shunt.imag - self.shunt[k].imag)
+        self.shunt[k] = shunt
+        if delta:
+            self.changes.append(('Q', [k], numpy.array([[delta]])))
+
+    def factor(self, kind, positions):
+        """
+        Solve function for B' (kind 'P') or B'' (kind 'Q') reduced to the
+        given buses, reusing the factors of an earlier solve when possible.
+        """
+        key = (kind, positions.tobytes())
+        factor = self.factors.get(key)
+        if factor is None or not factor.absorb(self.changes, kind):
+            Bp, Bpp = self.fastDecoupledMatrices()
+            matrix = Bp if kind == 'P' else Bpp
+            factor = UpdatedFactor(matrix[positions, :][:, positions], positions, len(self.changes), FACTOR_UPDATE_RANK)
+            self.factors[key] = factor
+        self.trimChanges()
+        return factor.solve
+
+    def trimChanges(self):
+        """
+        Fold the logged changes into every other factor kept (also those of
+        bus sets no longer solved) and clear the log; a factor that cannot
+        take them any more is dropped.
+        """
+        for key, factor in list(self.factors.items()):
+            if factor.applied < len(self.changes) and not factor.absorb(self.changes, key[0]):
+                del self.factors[key]
+        del self.changes[:]
+        for factor in self.factors.values():
+            factor.applied = 0
+
+    def admittanceMatrix(self, extraShunt=None):
+        n = self.n
+        f, t = self.f, self.t
+        rows = numpy.concatenate([f, f, t, t, numpy.arange(n)])
+        cols = numpy.concatenate([f, t, f, t, numpy.arange(n)])
+        diagonal = self.shunt if extraShunt is None else self.shunt + extraShunt
+        data = numpy.concatenate([self.Yff, self.Yft, self.Ytf, self.Ytt, diagonal])
+        return scipy.sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+
+    def fastDecoupledMatrices(self):
+        """
+        B' (1/x, no shunts, no taps) and B'' (full susceptance, no phase
+        shift) of the XB fast decoupled method.
+        """
+        n = self.n
+        f, t = self.f, self.t
+        rows = numpy.concatenate([f, f, t, t])
+        cols = numpy.concatenate([f, t, f, t])
+        bx = self.bx
+        Bp = scipy.sparse.csr_matrix((numpy.concatenate([bx, -bx, -bx, bx]), (rows, cols)), shape=(n, n))
+
+        # the transfer admittances without the phase shift
+        Yft = self.Yft * numpy.conj(self.shift)
+        Ytf = self.Ytf * self.shift
+        rows = numpy.concatenate([rows, numpy.arange(n)])
+        cols = numpy.concatenate([cols, numpy.arange(n)])
+        data = numpy.concatenate([self.Yff.imag, Yft.imag, Ytf.imag, self.Ytt.imag, self.shunt.imag])
+        Bpp = -scipy.sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+        return Bp, Bpp
+
+class SolutionState(object):
+    def __init__(self):
+        self.solved = 8 # solution not attempted
+        self.iterations = 0
+        self.mismatch = 0j
+        self.atMax = numpy.zeros(0, dtype=int) # buses held at their var limits
+        self.atMin = numpy.zeros(0, dtype=int)
+
+class PowerFlow(object):
+    """
+    Newton-Raphson and fast decoupled power flow over a compiled network.
+    """
+
+    def __init__(self, network, compiled, tolerance=0.1, maxIterations=20):
+        self.network = network
+        self.compiled = compiled
+        self.tolerance = tolerance / network.sbase # PSS\E TOLN is in MW/MVAr
+        self.maxIterations = maxIterations
+
+    def injections(self):
+        """
+        Scheduled generation, constant power and constant current load and
+        the constant admittance load (as a shunt), all in pu.
+        """
+        network = self.network
+        compiled = self.compiled
+        n = compiled.n
+        index = compiled.busIndex
+        sbase = network.sbase
+
+        generation = numpy.zeros(n, dtype=complex)
+        vset = numpy.ones(n)
+        hasMachine = numpy.zeros(n, dtype=bool)
+        qmax = numpy.zeros(n)
+        qmin = numpy.zeros(n)
+        for machine in network.machines:
+            if machine.stat != 1 or machine.bus not in index:
+                continue
+            k = index[machine.bus]
+            if not hasMachine[k]:
+                vset[k] = machine.vs
+            hasMachine[k] = True
+            generation[k] += complex(machine.pg, machine.qg) / sbase
+            qmax[k] += machine.qt / sbase
+            qmin[k] += machine.qb / sbase
+
+        # loads are summed per bus with bincount, cases have many more loads than machines
+        loads = [load for load in network.loads if load.status == 1 and load.bus in index]
+        bus = numpy.array([index[load.bus] for load in loads], dtype=int)
+        values = numpy.array([(load.pl, load.ql, load.ip, load.iq, load.yp, load.yq) for load in loads]).reshape(-1, 6) / sbase
+        total = [numpy.bincount(bus, values[:, column], n) for column in range(6)]
+        constantPower = total[0] + 1j * total[1]
+        constantCurrent = total[2] + 1j * total[3]
+        constantAdmittance = total[4] + 1j * total[5]
+
+        return generation, vset, hasMachine, qmax, qmin, constantPower, constantCurrent, constantAdmittance
+
+    def busTypes(self, hasMachine):
+        ide = self.compiled.ide
+        ref = numpy.where(ide == 3)[0]
+        pv = numpy.where((ide == 2) & hasMachine)[0]
+        pq = numpy.where((ide == 1) | ((ide == 2) & ~hasMachine))[0]
+        return ref, pv, pq
+
+    def solve(self, method='NR', flatStart=False, varLimits=True, previous=None):
+        """
+        Solve from the voltages of the case, or a flat start. previous is
+        the state of the last solution of this case: the PV buses it held
+        at a var limit start at that limit, so that a warm start does not
+        have to find them again.
+        """
+        network = self.network
+        compiled = self.compiled
+        state = SolutionState()
+
+        generation, vset, hasMachine, qmax, qmin, constantPower, constantCurrent, constantAdmittance = self.injections()
+        ref, pv, pq = self.busTypes(hasMachine)
+        Ybus = compiled.admittanceMatrix(constantAdmittance)
+
+        qgen = generation.imag.copy()
+        fixedQ = numpy.zeros(compiled.n, dtype=bool)
+        atMax = numpy.zeros(compiled.n, dtype=bool)
+        if varLimits and not flatStart and previous is not None and len(previous.atMax) + len(previous.atMin):
+            held = numpy.intersect1d(pv, numpy.concatenate([previous.atMax, previous.atMin]))
+            atMax[numpy.intersect1d(held, previous.atMax)] = True
+            generation[held] = generation[held].real + 1j * numpy.where(atMax[held], qmax[held], qmin[held])
+            fixedQ[held] = True
+            pq = numpy.sort(numpy.concatenate([pq, held]))
+            pv = numpy.setdiff1d(pv, held)
+
+        if flatStart:
+            Vm = numpy.ones(compiled.n)
+            Va = numpy.zeros(compiled.n)
+        else:
+            Vm = numpy.array([bus.vm for bus in network.buses])
+            Va = numpy.radians([bus.va for bus in network.buses])
+        Vm[pv] = vset[pv]
+        Vm[ref] = vset[ref]
+
+        # switch PV buses that violate their var limits to PQ, and buses held
+        # at a limit whose voltage has passed the setpoint back to PV, and re-solve
+        for limitPass in range(10):
+            if method == 'FD':
+                converged, Vm, Va, iterations = self.fastDecoupled(Ybus, generation, constantPower, constantCurrent, Vm, Va, ref, pv, pq)
+            else:
+                converged, Vm, Va, iterations = self.newtonRaphson(Ybus, generation, constantPower, constantCurrent, Vm, Va, ref, pv, pq)
+            state.iterations += iterations
+            if converged is not True or not varLimits:
+                break
+
+            V = Vm * numpy.exp(1j * Va)
+            S = V * numpy.conj(Ybus * V)
+            required = S.imag + constantPower.imag + constantCurrent.imag * Vm
+            over = pv[required[pv] > qmax[pv] + self.tolerance]
+            under = pv[required[pv] < qmin[pv] - self.tolerance]
+            held = numpy.where(fixedQ)[0]
+            back = held[numpy.where(atMax[held], Vm[held] > vset[held], Vm[held] < vset[held])]
+            if len(over) == 0 and len(under) == 0 and len(back) == 0:
+                break
+            generation[over] = generation[over].real + 1j * qmax[over]
+            generation[under] = generation[under].real + 1j * qmin[under]
+            fixedQ[over] = True
+            fixedQ[under] = True
+            atMax[over] = True
+            fixedQ[back] = False
+            atMax[back] = False
+            pq = numpy.setdiff1d(numpy.concatenate([pq, over, under]), back)
+            pv = numpy.union1d(numpy.setdiff1d(pv, numpy.concatenate([over, under])), back)
+            Vm[back] = vset[back]
+
+        if converged is True:
+            state.solved = 0
+        elif converged is None:
+            state.solved = 5 # singular jacobian
+        elif numpy.all(numpy.isfinite(Vm)) and numpy.max(Vm) < 10.0:
+            state.solved = 1 # iteration limit exceeded
+        else:
+            state.solved = 2 # blown up
+
+        if state.solved in (0, 1):
+            self.storeSolution(Ybus, Vm, Va, generation, constantPower, constantCurrent, ref, pv, fixedQ, state)
+        if state.solved == 0:
+            state.atMax = numpy.where(fixedQ & atMax)[0]
+            state.atMin = numpy.where(fixedQ & ~atMax)[0]
+        return state
+
+    def mismatch(self, Ybus, generation, constantPower, constantCurrent, Vm, Va):
+        V = Vm * numpy.exp(1j * Va)
+        return V * numpy.conj(Ybus * V) - (generation - constantPower - constantCurrent * Vm)
+
+    def newtonRaphson(self, Ybus, generation, constantPower, constantCurrent, Vm, Va, ref, pv, pq):
+        pvpq = numpy.concatenate([pv, pq])
+        npvpq = len(pvpq)
+        Vm = Vm.copy()
+        Va = Va.copy()
+
+        for iteration in range(self.maxIterations + 1):
+            mis = self.mismatch(Ybus, generation, constantPower, constantCurrent, Vm, Va)
+            F = numpy.concatenate([mis.real[pvpq], mis.imag[pq]])
+            if not numpy.all(numpy.isfinite(F)):
+                return False, Vm, Va, iteration
+            if len(F) == 0 or numpy.max(numpy.abs(F)) < self.tolerance:
+                return True, Vm, Va, iteration
+            if iteration == self.maxIterations:
+                break
+
+            V = Vm * numpy.exp(1j * Va)
+            Ibus = Ybus * V
+            diagV = scipy.sparse.diags(V)
+            diagVnorm = scipy.sparse.diags(V / Vm)
+            diagIbus = scipy.sparse.diags(Ibus)
+            dS_dVm = diagV * numpy.conj(Ybus * diagVnorm) + numpy.conj(diagIbus) * diagVnorm + scipy.sparse.diags(constantCurrent)
+            dS_dVa = 1j * diagV * numpy.conj(diagIbus - Ybus * diagV)
+
+            dS_dVa = dS_dVa.tocsr()
+            dS_dVm = dS_dVm.tocsr()
+            J11 = dS_dVa[pvpq, :][:, pvpq].real
+            J12 = dS_dVm[pvpq, :][:, pq].real
+            J21 = dS_dVa[pq, :][:, pvpq].imag
+            J22 = dS_dVm[pq, :][:, pq].imag
+            J = scipy.sparse.bmat([[J11, J12], [J21, J22]], format='csc')
+
+            try:
+                dx = scipy.sparse.linalg.splu(J).solve(-F)
+            except RuntimeError:
+                return None, Vm, Va, iteration
+            Va[pvpq] += dx[:npvpq]
+            Vm[pq] += dx[npvpq:]
+
+        return False, Vm, Va, self.maxIterations
+
+    def fastDecoupled(self, Ybus, generation, constantPower, constantCurrent, Vm, Va, ref, pv, pq):
+        pvpq = numpy.concatenate([pv, pq])
+        Vm = Vm.copy()
+        Va = Va.copy()
+
+        try:
+            solveP = self.compiled.factor('P', pvpq)
+            solveQ = self.compiled.factor('Q', pq) if len(pq) else None
+        except RuntimeError:
+            return None, Vm, Va, 0
+
+        return self.decoupledIterations(solveP, solveQ, Ybus, generation, constantPower, constantCurrent, Vm, Va, pvpq, pq)
+
+    def decoupledIterations(self, solveP, solveQ, Ybus, generation, constantPower, constantCurrent, Vm, Va, pvpq, pq):
+        for iteration in range(self.maxIterations + 1):
+            mis = self.mismatch(Ybus, generation, constantPower, constantCurrent, Vm, Va)
+            P = mis.real[pvpq]
+            Q = mis.imag[pq]
+            if not (numpy.all(numpy.isfinite(P)) and numpy.all(numpy.isfinite(Q))):
+                return False, Vm, Va, iteration
+            if max(numpy.max(numpy.abs(P)) if len(P) else 0.0, numpy.max(numpy.abs(Q)) if len(Q) else 0.0) < self.tolerance:
+                return True, Vm, Va, iteration
+            if iteration == self.maxIterations:
+                break
+
+            Va[pvpq] -= solveP(P / Vm[pvpq])
+
+            if solveQ is not None:
+                mis = self.mismatch(Ybus, generation, constantPower, constantCurrent, Vm, Va)
+                Vm[pq] -= solveQ(mis.imag[pq] / Vm[pq])
+
+        return False, Vm, Va, self.maxIterations
+
+    def storeSolution(self, Ybus, Vm, Va, generation, constantPower, constantCurrent, ref, pv, fixedQ, state):
+        network = self.network
+        compiled = self.compiled
+        sbase = network.sbase
+
+        for k, bus in enumerate(network.buses):
+            if bus.ide != 4:
+                bus.vm = float(Vm[k])
+                bus.va = float(numpy.degrees(Va[k]))
+
+        # the generation the solution requires at the swing and PV buses
+        V = Vm * numpy.exp(1j * Va)
+        S = V * numpy.conj(Ybus * V)
+        required = (S + constantPower + constantCurrent * Vm) * sbase
+        mis = S - (generation - constantPower - constantCurrent * Vm)
+        mis[ref] = 0j
+        mis[pv] = mis[pv].real
+        state.mismatch = complex(numpy.sum(mis[compiled.ide != 4])) * sbase
+
+        machinesAtBus = {}
+        for machine in network.machines:
+            if machine.stat == 1 and machine.bus in compiled.busIndex:
+                machinesAtBus.setdefault(compiled.busIndex[machine.bus], []).append(machine)
+
+        regulated = set(ref.tolist()) | set(pv.tolist()) | set(numpy.where(fixedQ)[0].tolist())
+        for k, machines in machinesAtBus.items():
+            if k in ref:
+                total = sum([machine.mbase for machine in machines]) or len(machines)
+                for machine in machines:
+                    machine.pg = float(required[k].real) * ((machine.mbase or 1.0) / total)
+            if k in regulated:
+                ranges = [max(machine.qt - machine.qb, 0.0) for machine in machines]
+                total = sum(ranges)
+                for machine, span in zip(machines, ranges):
+                    share = span / total if total else 1.0 / len(machines)
+                    machine.qg = float(required[k].imag) * share
+
+#endregion
+
+#region [ Session State ]
+
+class Session(object):
+    def __init__(self):
+        self.network = None
+        self.compiled = None
+        self.fileName = None
+        self.subsystems = {}
+        self.state = SolutionState()
+
+    def compile(self):
+        if self.compiled is None:
+            self.compiled = CompiledNetwork(self.network)
+        return self.compiled
+
+    def updateElement(self, element):
+        if self.compiled is not None:
+            self.compiled.updateElement(element)
+
+    def updateShunt(self, busNumber):
+        if self.compiled is not None:
+            self.compiled.updateShunt(busNumber)
+
+_session = Session()
+
+def _caseFileName(sfile):
+    root, extension = os.path.splitext(sfile)
+    if extension.lower() == '.sav':
+        return root + '.raw'
+    return sfile
+
+def _strings(string):
+    if isinstance(string, (list, tuple)):
+        return list(string)
+    return [string]
+
+def _voltages():
+    network = _session.network
+    Vm = numpy.array([bus.vm for bus in network.buses])
+    Va = numpy.radians([bus.va for bus in network.buses])
+    return Vm * numpy.exp(1j * Va)
+
+def _subsystemBuses(sid):
+    """
+    Buses of a subsystem, in case order.
+    """
+    buses = _session.network.buses
+    if sid < 0 or sid not in _session.subsystems:
+        return list(buses)
+
+    criteria = _session.subsystems[sid]
+    selected = []
+    for bus in buses:
+        if criteria['usekv'] and not (criteria['basekv'][0] <= bus.baskv <= criteria['basekv'][1]):
+            continue
+        if criteria['areas'] and bus.area not in criteria['areas']:
+            continue
+        if criteria['buses'] and bus.number not in criteria['buses']:
+            continue
+        if criteria['owners'] and bus.owner not in criteria['owners']:
+            continue
+        if criteria['zones'] and bus.zone not in criteria['zones']:
+            continue
+        selected.append(bus)
+    return selected
+
+def _busByNumber():
+    return dict((bus.number, bus) for bus in _session.network.buses)
+
+def _needsCase(ierr, values=True):
+    """
+    Return ierr (and no values for the data functions) instead of failing
+    when no case has been loaded, as PSS\E does for an empty working case.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            if _session.network is None:
+                return (ierr, None) if values else ierr
+            return function(*args, **kwargs)
+        return call
+    return decorate
+
+#endregion
+
+#region [ Case Functions ]
+
+def psseinit(buses=50000):
+    return 0
+
+def case(sfile):
+    fileName = _caseFileName(sfile)
+    if not os.path.isfile(fileName):
+        return 3
+    _session.network = Network.read(fileName)
+    _session.fileName = fileName
+    _session.compiled = None
+    _session.state = SolutionState()
+    return 0
+
+def save(sfile):
+    if _session.network is None:
+        return 1
+    _session.network.write(_caseFileName(sfile))
+    return 0
+
+def bsys(sid=0, usekv=0, basekv=None, numarea=0, areas=None, numbus=0, buses=None, numowner=0, owners=None, numzone=0, zones=None):
+    if isinstance(buses, (int, numpy.integer)):
+        buses = [buses]
+    basekv = list(basekv or [0.0, 0.0])
+    _session.subsystems[sid] = {
+        'usekv' : bool(usekv),
+        'basekv' : (min(basekv), max(basekv)) if basekv else (0.0, 0.0),
+        'areas' : set(list(areas or [])[:numarea]) if numarea else set(),
+        'buses' : set(list(buses or [])[:numbus]) if numbus else set(),
+        'owners' : set(list(owners or [])[:numowner]) if numowner else set(),
+        'zones' : set(list(zones or [])[:numzone]) if numzone else set(),
+        }
+    return 0
+
+@_needsCase(5, values=False)
+def scal(sid=0, all=0, apiopt=0, status=None, scalval=None, **kwargs):
+    """
+    Scale the load and generation of a subsystem. Only the percentage load
+    scaling (STATUS(1) = 2) and incremental/percentage/total generation
+    scaling used by the analytics are supported.
+    """
+    status = list(status or [0, 0, 0, 0, 0])
+    scalval = list(scalval or [0.0] * 7)
+    status += [0] * (5 - len(status))
+    scalval += [0.0] * (7 - len(scalval))
+    for index in range(5):
+        status[index] = kwargs.get('status%d' % (index + 1), status[index])
+    for index in range(7):
+        scalval[index] = kwargs.get('scalval%d' % (index + 1), scalval[index])
+
+    network = _session.network
+    selected = set([bus.number for bus in (network.buses if all else _subsystemBuses(sid))])
+    method = status[0]
+
+    loads = [load for load in network.loads if load.status == 1 and load.bus in selected]
+    if method and scalval[0] != _f:
+        totalLoad = sum([load.pl for load in loads])
+        if method == 1:
+            factor = scalval[0] / totalLoad if totalLoad else 1.0
+        elif method == 2:
+            factor = 1.0 + scalval[0] / 100.0
+        else:
+            factor = (totalLoad + scalval[0]) / totalLoad if totalLoad else 1.0
+        for load in loads:
+            load.pl *= factor
+            if status[2] == 1:
+                load.ql *= factor
+            if status[3] == 1:
+                load.ip *= factor
+                load.yp *= factor
+                if status[2] == 1:
+                    load.iq *= factor
+                    load.yq *= factor
+
+    busByNumber = _busByNumber()
+    machines = [machine for machine in network.machines
+                if machine.stat == 1 and machine.bus in selected and busByNumber[machine.bus].ide == 2]
+    if method and scalval[1] and scalval[1] != _f and machines:
+        totalGeneration = sum([machine.pg for machine in machines])
+        if method == 1:
+            increment = scalval[1] - totalGeneration
+        elif method == 2:
+            increment = totalGeneration * scalval[1] / 100.0
+        else:
+            increment = scalval[1]
+        for machine in machines:
+            share = machine.pg / totalGeneration if totalGeneration else 1.0 / len(machines)
+            machine.pg += increment * share
+            if status[1] == 1:
+                machine.pg = min(max(machine.pg, machine.pb), machine.pt)
+    return 0
+
+#endregion
+
+#region [ Solution Functions ]
+
+def _solve(method, options):
+    options = list(options or [])
+    options += [_i] * (8 - len(options))
+    flatStart = options[5] == 1
+    varLimits = options[6] != -1
+    flow = PowerFlow(_session.network, _session.compile())
+    _session.state = flow.solve(method=method, flatStart=flatStart, varLimits=varLimits, previous=_session.state)
+    return 0
+
+@_needsCase(5, values=False)
+def fnsl(options=None):
+    """
+    Full Newton-Raphson power flow.
+    """
+    return _solve('NR', options)
+
+@_needsCase(5, values=False)
+def fdns(options=None):
+    """
+    Fast decoupled (XB) power flow.
+    """
+    return _solve('FD', options)
+
+def solved():
+    return _session.state.solved
+
+def iterat():
+    return _session.state.iterations
+
+def sysmsm():
+    return _session.state.mismatch
+
+#endregion
+
+#region [ Bus Data ]
+
+def _busValues(buses, strings, kind):
+    compiled = _session.compile()
+    network = _session.network
+    V = _voltages()
+    values = []
+    for name in strings:
+        name = name.upper()
+        column = []
+        for bus in buses:
+            k = compiled.busIndex[bus.number]
+            if kind == 'int' and name in ('NUMBER', 'TYPE', 'AREA', 'ZONE', 'OWNER'):
+                column.append({'NUMBER' : bus.number, 'TYPE' : bus.ide, 'AREA' : bus.area, 'ZONE' : bus.zone, 'OWNER' : bus.owner}[name])
+            elif kind == 'real' and name == 'BASE':
+                column.append(bus.baskv)
+            elif kind == 'real' and name == 'PU':
+                column.append(abs(V[k]))
+            elif kind == 'real' and name == 'KV':
+                column.append(abs(V[k]) * bus.baskv)
+            elif kind == 'real' and name == 'ANGLE':
+                column.append(math.radians(bus.va))
+            elif kind == 'real' and name == 'ANGLED':
+                column.append(bus.va)
+            elif kind == 'cplx' and name == 'VOLTAGE':
+                column.append(complex(V[k]))
+            elif kind == 'cplx' and name == 'SHUNTNOM':
+                column.append(compiled.shunt[k].conjugate() * network.sbase)
+            elif kind == 'cplx' and name == 'SHUNTACT':
+                column.append(compiled.shunt[k].conjugate() * abs(V[k]) ** 2 * network.sbase)
+            elif kind == 'char' and name == 'NAME':
+                column.append(bus.name.ljust(12))
+            else:
+                return 5, None
+        values.append(column)
+    return 0, values
+
+@_needsCase(1)
+def abusint(sid=-1, flag=1, string='NUMBER'):
+    buses = [bus for bus in _subsystemBuses(sid) if flag != 1 or bus.ide != 4]
+    return _busValues(buses, _strings(string), 'int')
+
+@_needsCase(1)
+def abusreal(sid=-1, flag=1, string='PU'):
+    buses = [bus for bus in _subsystemBuses(sid) if flag != 1 or bus.ide != 4]
+    return _busValues(buses, _strings(string), 'real')
+
+@_needsCase(1)
+def abuscplx(sid=-1, flag=1, string='VOLTAGE'):
+    buses = [bus for bus in _subsystemBuses(sid) if flag != 1 or bus.ide != 4]
+    return _busValues(buses, _strings(string), 'cplx')
+
+@_needsCase(1)
+def abuschar(sid=-1, flag=1, string='NAME'):
+    buses = [bus for bus in _subsystemBuses(sid) if flag != 1 or bus.ide != 4]
+    return _busValues(buses, _strings(string), 'char')
+
+#endregion
+
+#region [ Load Data ]
+
+def _subsystemLoads(sid, flag):
+    busByNumber = _busByNumber()
+    selected = set([bus.number for bus in _subsystemBuses(sid)])
+    loadsAtBus = {}
+    for load in _session.network.loads:
+        if load.bus in selected:
+            loadsAtBus.setdefault(load.bus, []).append(load)
+    loads = []
+    for bus in _session.network.buses:
+        for load in loadsAtBus.get(bus.number, []):
+            if flag == 1 and (load.status != 1 or busByNumber[load.bus].ide == 4):
+                continue
+            loads.append(load)
+    return loads
+
+def _loadComplex(load, name, vm):
+    constantPower = complex(load.pl, load.ql)
+    constantCurrent = complex(load.ip, load.iq)
+    constantAdmittance = complex(load.yp, -load.yq)
+    values = {
+        'MVAACT' : constantPower, 'MVANOM' : constantPower,
+        'ILACT' : constantCurrent * vm, 'ILNOM' : constantCurrent,
+        'YLACT' : constantAdmittance * vm * vm, 'YLNOM' : constantAdmittance,
+        'TOTALACT' : constantPower + constantCurrent * vm + constantAdmittance * vm * vm,
+        'TOTALNOM' : constantPower + constantCurrent + constantAdmittance,
+        }
+    return values.get(name)
+
+def _loadValues(loads, strings, kind):
+    busByNumber = _busByNumber()
+    values = []
+    for name in strings:
+        name = name.upper()
+        column = []
+        for load in loads:
+            if kind == 'int' and name == 'NUMBER':
+                column.append(load.bus)
+            elif kind == 'int' and name == 'STATUS':
+                column.append(load.status)
+            elif kind == 'char' and name == 'ID':
+                column.append(load.id.ljust(2))
+            elif kind == 'char' and name == 'NAME':
+                column.append(busByNumber[load.bus].name.ljust(12))
+            else:
+                value = _loadComplex(load, name, busByNumber[load.bus].vm)
+                if value is None or kind not in ('real', 'cplx'):
+                    return 5, None
+                column.append(abs(value) if kind == 'real' else value)
+        values.append(column)
+    return 0, values
+
+@_needsCase(1)
+def aloadint(sid=-1, flag=1, string='NUMBER'):
+    return _loadValues(_subsystemLoads(sid, flag), _strings(string), 'int')
+
+@_needsCase(1)
+def aloadreal(sid=-1, flag=1, string='TOTALACT'):
+    return _loadValues(_subsystemLoads(sid, flag), _strings(string), 'real')
+
+@_needsCase(1)
+def aloadcplx(sid=-1, flag=1, string='TOTALACT'):
+    return _loadValues(_subsystemLoads(sid, flag), _strings(string), 'cplx')
+
+@_needsCase(1)
+def aloadchar(sid=-1, flag=1, string='ID'):
+    return _loadValues(_subsystemLoads(sid, flag), _strings(string), 'char')
+
+@_needsCase(1)
+def alodbusint(sid=-1, flag=1, string='NUMBER'):
+    withLoads = set([load.bus for load in _subsystemLoads(sid, flag)])
+    buses = [bus for bus in _subsystemBuses(sid) if bus.number in withLoads]
+    return _busValues(buses, _strings(string), 'int')
+
+#endregion
+
+#region [ Generator Data ]
+
+def _subsystemPlants(sid, flag):
+    selected = set([bus.number for bus in _subsystemBuses(sid)])
+    withMachines = set([machine.bus for machine in _session.network.machines])
+    return [bus for bus in _session.network.buses
+            if bus.number in selected and bus.number in withMachines and (flag != 1 or bus.ide in (2, 3))]
+
+def _subsystemMachines(sid, flag):
+    plants = _subsystemPlants(sid, 2)
+    machinesAt = _machinesByBus()
+    machines = []
+    for bus in plants:
+        for machine in machinesAt.get(bus.number, []):
+            if flag == 1 and (machine.stat != 1 or bus.ide not in (2, 3)):
+                continue
+            machines.append(machine)
+    return machines
+
+def _machinesByBus():
+    """
+    The machines of every bus number, in the order of the case.
+    """
+    machinesAt = {}
+    for machine in _session.network.machines:
+        machinesAt.setdefault(machine.bus, []).append(machine)
+    return machinesAt
+
+@_needsCase(1)
+def agenbusint(sid=-1, flag=1, string='NUMBER'):
+    return _busValues(_subsystemPlants(sid, flag), _strings(string), 'int')
+
+@_needsCase(1)
+def agenbuscplx(sid=-1, flag=1, string='PQGEN'):
+    plants = _subsystemPlants(sid, flag)
+    values = []
+    for name in _strings(string):
+        name = name.upper()
+        if name == 'PQGEN':
+            machinesAt = _machinesByBus()
+            column = []
+            for bus in plants:
+                column.append(sum([complex(machine.pg, machine.qg) for machine in machinesAt.get(bus.number, [])
+                                   if machine.stat == 1], 0j))
+            values.append(column)
+        else:
+            ierr, column = _busValues(plants, [name], 'cplx')
+            if ierr:
+                return ierr, None
+            values.append(column[0])
+    return 0, values
+
+def _machineValues(machines, strings, kind):
+    busByNumber = _busByNumber()
+    values = []
+    for name in strings:
+        name = name.upper()
+        column = []
+        for machine in machines:
+            if kind == 'int' and name == 'NUMBER':
+                column.append(machine.bus)
+            elif kind == 'int' and name == 'STATUS':
+                column.append(machine.stat)
+            elif kind == 'real' and name in ('PGEN', 'O_PGEN'):
+                column.append(machine.pg)
+            elif kind == 'real' and name in ('QGEN', 'O_QGEN'):
+                column.append(machine.qg)
+            elif kind == 'real' and name == 'MVA':
+                column.append(abs(complex(machine.pg, machine.qg)))
+            elif kind == 'real' and name in ('PMAX', 'PMIN', 'QMAX', 'QMIN', 'MBASE'):
+                column.append({'PMAX' : machine.pt, 'PMIN' : machine.pb, 'QMAX' : machine.qt, 'QMIN' : machine.qb, 'MBASE' : machine.mbase}[name])
+            elif kind == 'cplx' and name == 'PQGEN':
+                column.append(complex(machine.pg, machine.qg))
+            elif kind == 'char' and name == 'ID':
+                column.append(machine.id.ljust(2))
+            elif kind == 'char' and name == 'NAME':
+                column.append(busByNumber[machine.bus].name.ljust(12))
+            else:
+                return 5, None
+        values.append(column)
+    return 0, values
+
+@_needsCase(1)
+def amachint(sid=-1, flag=1, string='NUMBER'):
+    return _machineValues(_subsystemMachines(sid, flag), _strings(string), 'int')
+
+@_needsCase(1)
+def amachreal(sid=-1, flag=1, string='PGEN'):
+    return _machineValues(_subsystemMachines(sid, flag), _strings(string), 'real')
+
+@_needsCase(1)
+def amachcplx(sid=-1, flag=1, string='PQGEN'):
+    return _machineValues(_subsystemMachines(sid, flag), _strings(string), 'cplx')
+
+@_needsCase(1)
+def amachchar(sid=-1, flag=1, string='ID'):
+    return _machineValues(_subsystemMachines(sid, flag), _strings(string), 'char')
+
+#endregion
+
+#region [ Branch Data ]
+
+def _elementEnds(element):
+    return element.i, element.j
+
+def _elementStatus(element):
+    return element.stat if hasattr(element, 'windv1') else element.st
+
+def _subsystemBranches(sid, ties, flag, entry, transformers):
+    """
+    (element, from bus, to bus) entries in PSS\E order: by the bus they are
+    reported from, in case order, then in the order of the case records.
+    """
+    network = _session.network
+    inSubsystem = set([bus.number for bus in _subsystemBuses(sid)])
+    if transformers:
+        candidates = list(network.transformers)
+        inServiceOnly = flag in (1, 3)
+    else:
+        candidates = list(network.branches)
+        if flag in (3, 4):
+            candidates += list(network.transformers)
+        inServiceOnly = flag in (1, 3)
+
+    connected = {}
+    for element in candidates:
+        if inServiceOnly and _elementStatus(element) == 0:
+            continue
+        i, j = _elementEnds(element)
+        connected.setdefault(i, []).append((element, i, j))
+        connected.setdefault(j, []).append((element, j, i))
+
+    entries = []
+    for bus in network.buses:
+        if bus.number not in inSubsystem:
+            continue
+        for element, frombus, tobus in connected.get(bus.number, []):
+            interior = tobus in inSubsystem
+            if (ties == 1 and not interior) or (ties == 2 and interior):
+                continue
+            if entry == 1 and interior and frombus != element.i:
+                continue
+            entries.append((element, frombus, tobus))
+    return entries
+
+def _endFlow(element, frombus, V):
+    """
+    Complex power in MW/MVAr flowing into the element at frombus.
+    """
+    compiled = _session.compile()
+    k = compiled.elementIndex.get(id(element))
+    if k is None:
+        return 0j
+    f, t = compiled.f[k], compiled.t[k]
+    if element.i == frombus:
+        current = compiled.Yff[k] * V[f] + compiled.Yft[k] * V[t]
+        return complex(V[f] * numpy.conj(current)) * _session.network.sbase
+    current = compiled.Ytt[k] * V[t] + compiled.Ytf[k] * V[f]
+    return complex(V[t] * numpy.conj(current)) * _session.network.sbase
+
+def _branchValues(entries, strings, kind):
+    busByNumber = _busByNumber()
+    V = _voltages()
+    values = []
+    for name in strings:
+        name = name.upper()
+        column = []
+        for element, frombus, tobus in entries:
+            if kind == 'int' and name in ('FROMNUMBER', 'METERNUMBER'):
+                column.append(frombus)
+            elif kind == 'int' and name in ('TONUMBER', 'OTHERNUMBER'):
+                column.append(tobus)
+            elif kind == 'int' and name == 'STATUS':
+                column.append(_elementStatus(element))
+            elif kind == 'char' and name == 'ID':
+                column.append(element.ckt.ljust(2))
+            elif kind == 'char' and name == 'FROMNAME':
+                column.append(busByNumber[frombus].name.ljust(12))
+            elif kind == 'char' and name == 'TONAME':
+                column.append(busByNumber[tobus].name.ljust(12))
+            elif kind == 'char' and name == 'NAME' and hasattr(element, 'windv1'):
+                column.append(element.name.ljust(12))
+            elif kind == 'cplx' and name == 'RX':
+                column.append(complex(element.r, element.x))
+            elif kind == 'cplx' and name == 'PQ':
+                column.append(_endFlow(element, frombus, V))
+            elif kind == 'cplx' and name == 'PQLOSS':
+                column.append(_endFlow(element, frombus, V) + _endFlow(element, tobus, V))
+            elif kind == 'cplx' and name == 'YMAG' and hasattr(element, 'windv1'):
+                column.append(complex(element.mag1, element.mag2))
+            elif kind == 'real' and name in ('P', 'Q', 'MVA'):
+                flow = _endFlow(element, frombus, V)
+                column.append({'P' : flow.real, 'Q' : flow.imag, 'MVA' : abs(flow)}[name])
+            elif kind == 'real' and name in ('PLOSS', 'QLOSS'):
+                loss = _endFlow(element, frombus, V) + _endFlow(element, tobus, V)
+                column.append(loss.real if name == 'PLOSS' else loss.imag)
+            elif kind == 'real' and name in ('RATIO', 'RATIO2', 'ANGLE', 'NOMV1', 'NOMV2') and hasattr(element, 'windv1'):
+                compiled = _session.compile()
+                if name == 'RATIO':
+                    column.append(compiled.windingRatio(element.cw, element.windv1, element.nomv1, busByNumber[element.i].baskv))
+                elif name == 'RATIO2':
+                    column.append(compiled.windingRatio(element.cw, element.windv2, element.nomv2, busByNumber[element.j].baskv))
+                elif name == 'ANGLE':
+                    column.append(element.ang1)
+                else:
+                    nominal = element.nomv1 if name == 'NOMV1' else element.nomv2
+                    column.append(nominal or busByNumber[element.i if name == 'NOMV1' else element.j].baskv)
+            else:
+                return 5, None
+        values.append(column)
+    return 0, values
+
+@_needsCase(1)
+def abrnint(sid=-1, owner=1, ties=1, flag=1, entry=1, string='FROMNUMBER'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, False), _strings(string), 'int')
+
+@_needsCase(1)
+def abrnreal(sid=-1, owner=1, ties=1, flag=1, entry=1, string='P'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, False), _strings(string), 'real')
+
+@_needsCase(1)
+def abrncplx(sid=-1, owner=1, ties=1, flag=1, entry=1, string='PQ'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, False), _strings(string), 'cplx')
+
+@_needsCase(1)
+def abrnchar(sid=-1, owner=1, ties=1, flag=1, entry=1, string='ID'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, False), _strings(string), 'char')
+
+@_needsCase(1)
+def atrnint(sid=-1, owner=1, ties=1, flag=1, entry=1, string='FROMNUMBER'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, True), _strings(string), 'int')
+
+@_needsCase(1)
+def atrnreal(sid=-1, owner=1, ties=1, flag=1, entry=1, string='RATIO'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, True), _strings(string), 'real')
+
+@_needsCase(1)
+def atrncplx(sid=-1, owner=1, ties=1, flag=1, entry=1, string='PQ'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, True), _strings(string), 'cplx')
+
+@_needsCase(1)
+def atrnchar(sid=-1, owner=1, ties=1, flag=1, entry=1, string='ID'):
+    return _branchValues(_subsystemBranches(sid, ties, flag, entry, True), _strings(string), 'char')
+
+@_needsCase(1)
+def brnflo(ibus, jbus, ckt):
+    """
+    Flow in MW/MVAr at the ibus end of a branch or two-winding transformer.
+    ierr: 1 ibus not found, 2 jbus not found, 3 branch out of service,
+    4 circuit not found.
+    """
+    busByNumber = _busByNumber()
+    if ibus not in busByNumber:
+        return 1, None
+    if jbus not in busByNumber:
+        return 2, None
+    element = _session.network.findElement(ibus, jbus, ckt)
+    if element is None:
+        return 4, None
+    if _elementStatus(element) == 0:
+        return 3, None
+    return 0, _endFlow(element, ibus, _voltages())
+
+#endregion
+
+#region [ Network Changes ]
+
+@_needsCase(1, values=False)
+def bus_chng_3(ibus, intgar=None, realar=None, name=None):
+    """
+    Modify a bus. Of realar the voltage magnitude PU and angle ANGLE (in
+    degrees, indices 1 and 2) are applied, e.g. to warm-start the next
+    solution; intgar, the other entries of realar and name are accepted
+    for compatibility and ignored.
+    """
+    index = _session.compile().busIndex
+    if ibus not in index:
+        return 1
+    realar = list(realar or [])
+    realar += [_f] * (3 - len(realar))
+    bus = _session.network.buses[index[ibus]]
+    if realar[1] != _f:
+        bus.vm = float(realar[1])
+    if realar[2] != _f:
+        bus.va = float(realar[2])
+    return 0
+
+@_needsCase(1, values=False)
+def shunt_data(i, id='1', intgar=None, realar=None):
+    """
+    Add or modify a fixed shunt; intgar = [STATUS], realar = [GL, BL].
+    """
+    if i not in _busByNumber():
+        return 1
+    intgar = list(intgar if isinstance(intgar, (list, tuple)) else [intgar if intgar is not None else _i])
+    realar = list(realar or [])
+    realar += [_f] * (2 - len(realar))
+    id = str(id).strip()
+
+    network = _session.network
+    shunt = None
+    for candidate in network.shunts:
+        if candidate.bus == i and candidate.id == id:
+            shunt = candidate
+    if shunt is None:
+        shunt = Record([str(i), _formatString(id, 2), '1', '0.0', '0.0'])
+        shunt.bus, shunt.id, shunt.status, shunt.gl, shunt.bl = i, id, 1, 0.0, 0.0
+        network.shunts.append(shunt)
+
+    if intgar and intgar[0] != _i:
+        shunt.status = int(intgar[0])
+    if realar[0] != _f:
+        shunt.gl = float(realar[0])
+    if realar[1] != _f:
+        shunt.bl = float(realar[1])
+    _session.updateShunt(i)
+    return 0
+
+@_needsCase(1, values=False)
+def purgshunt(ibus, id='1'):
+    """
+    Delete a fixed shunt.
+    """
+    if ibus not in _busByNumber():
+        return 1
+    id = str(id).strip()
+    network = _session.network
+    shunts = [shunt for shunt in network.shunts if not (shunt.bus == ibus and shunt.id == id)]
+    if len(shunts) == len(network.shunts):
+        return 2
+    network.shunts[:] = shunts
+    _session.updateShunt(ibus)
+    return 0
+
+@_needsCase(3, values=False)
+def two_winding_chng_4(i, j, ckt='1', intgar=None, realar=None, chars=None):
+    """
+    Modify a two-winding transformer. Of realar the entries R1-2, X1-2,
+    SBASE1-2, WINDV1, NOMV1, ANG1, WINDV2 and NOMV2 (indices 0 to 7) are
+    applied; intgar and chars are accepted for compatibility and ignored.
+    """
+    element = _session.network.findElement(i, j, ckt)
+    if element is None or not hasattr(element, 'windv1'):
+        return 3
+    realar = list(realar or [])
+    realar += [_f] * (8 - len(realar))
+    for index, attribute in enumerate(['r', 'x', 'sbase12', 'windv1', 'nomv1', 'ang1', 'windv2', 'nomv2']):
+        if realar[index] != _f:
+            setattr(element, attribute, float(realar[index]))
+    _session.updateElement(element)
+    return 0
+
+#endregion
+
+#region [ Output Redirection ]
+
+def progress_output(islct=1, filarg='', options=None):
+    return 0
+
+def alert_output(islct=1, filarg='', options=None):
+    return 0
+
+def prompt_output(islct=1, filarg='', options=None):
+    return 0
+
+#endregion
@@ -0,0 +1,292 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import csv
+import numpy
+import scipy.sparse
+
+import psspy # the calling script puts PSS\E (or SparsePsspy registered as psspy) on the path
+
+#endregion
+
+#region [ Case Buses ]
+
+def caseBuses():
+    """
+    The load and the generator buses of the case in memory.
+    """
+    ierr, all_bus = psspy.abusint(-1, 1, ['number'])
+    bus_num = all_bus[0]
+
+    # Load Bus
+    psspy.bsys(sid=-1, numbus=len(bus_num), buses=bus_num)
+    ierr, load_bus = psspy.alodbusint(-1, 1, ['NUMBER'])
+    load_bus = load_bus[0]
+
+    # Gen Bus
+    psspy.bsys(sid=-1, numbus=len(bus_num), buses=bus_num)
+    ierr, gen_bus = psspy.agenbusint(-1, 1, ['NUMBER'])
+    gen_bus = gen_bus[0]
+    return load_bus, gen_bus
+
+#endregion
+
+#region [ Branch Index ]
+
+def busPositions(bus_number_set, numbers):
+    """
+    The positions in bus_number_set of the bus numbers numbers.
+    """
+    bus_number_set = numpy.asarray(bus_number_set)
+    order = numpy.argsort(bus_number_set, kind='mergesort')
+    return order[numpy.searchsorted(bus_number_set[order], numpy.asarray(numbers, dtype=bus_number_set.dtype))]
+
+def branchIndex(from_bus_number_set, to_bus_number_set, branch_ID_set):
+    """
+    Index the entries of a branch query (entry=2: a branch is reported from
+    each end in the subsystem) by (from bus, to bus, id). Returns the
+    position of the first entry of every branch and the position of its
+    entry from the other end, -1 for a tie reported from one end only.
+    """
+    entries = {}
+    for position, key in enumerate(zip(from_bus_number_set, to_bus_number_set, branch_ID_set)):
+        entries[key] = position
+
+    first = []
+    reverse = []
+    recorded = set()
+    for position, (from_bus, to_bus, ID) in enumerate(zip(from_bus_number_set, to_bus_number_set, branch_ID_set)):
+        if (from_bus, to_bus, ID) in recorded or (to_bus, from_bus, ID) in recorded:
+            continue
+        recorded.add((from_bus, to_bus, ID))
+        first.append(position)
+        reverse.append(entries.get((to_bus, from_bus, ID), -1))
+    return numpy.array(first, dtype=int), numpy.array(reverse, dtype=int)
+
+def _endCurrents(PQ, PQLoss, first, reverse, from_voltage, to_voltage):
+    """
+    The currents (A) into both ends of the branches first, from the power
+    (kVA) flowing into the reported end and the voltages (kV) of the ends.
+    The power into the other end of a tie is the loss minus that into the
+    reported end.
+    """
+    PQ_i = PQ[first]
+    PQ_k = PQ[numpy.maximum(reverse, 0)]
+    if PQLoss is not None:
+        ties = reverse < 0
+        PQ_k[ties] = PQLoss[first[ties]] - PQ_i[ties]
+    I_ik_i = numpy.conjugate(PQ_i / from_voltage) / numpy.sqrt(3)
+    I_ik_k = numpy.conjugate(PQ_k / to_voltage) / numpy.sqrt(3)
+    return I_ik_i, I_ik_k
+
+def _branchFlows(function, reverse):
+    """
+    The power flowing into the reported ends of a branch query and, if
+    there are ties among them, the losses, both in kVA.
+    """
+    ierr, PQ = function(sid=1, ties=3, entry=2, string='PQ')
+    PQ = numpy.array(PQ[0], dtype=complex) * 1000
+    if not numpy.any(reverse < 0):
+        return PQ, None
+    ierr, PQLoss = function(sid=1, ties=3, entry=2, string='PQLOSS')
+    return PQ, numpy.array(PQLoss[0], dtype=complex) * 1000
+
+#endregion
+
+#region [ VI Topology ]
+
+def selectSubsystem():
+    psspy.bsys(1, 1, [344, 346], 0, [], 0, [], 0, [], 0, [])
+
+def _selection(positions, columns):
+    """
+    The sparse matrix that picks the entries positions of a vector of
+    columns entries.
+    """
+    positions = numpy.asarray(positions, dtype=int)
+    return scipy.sparse.csr_matrix((numpy.ones(len(positions)), (numpy.arange(len(positions)), positions)), shape=(len(positions), columns))
+
+class VITopology(object):
+    """
+    The measured elements of the case in memory, which do not change
+    between the time stamps of a run: the 345 kV buses (the DVP system,
+    subsystem 1), the lines and the two-winding transformers connected to
+    them with the entries of their branch queries, and the generators.
+    measureVI then only queries the voltages and the flows of a time
+    stamp; the end voltages are picked from the bus voltages and the
+    currents summed into the buses by sparse matrices:
+
+        lineEnds, transformerEnds   the from and the to end voltages
+                                    (2 x branches) of all the buses
+        generatorBuses              the voltages of the generator buses
+        incidence                   345 kV buses x currents, +1 where the
+                                    current (line from, line to,
+                                    transformer from, transformer to,
+                                    generator) flows into the bus
+    """
+
+    def __init__(self):
+        # Select DVP system as the current subsystem object
+        selectSubsystem()
+        ierr, bus_number = psspy.abusint(1, 2, ['NUMBER'])
+        self.buses = bus_number[0]
+
+        ierr, bus_number_set = psspy.abusint(sid=-1, string='NUMBER')
+        self.bus_number_set = bus_number_set[0]
+        ierr, baseKV_set = psspy.abusreal(sid=-1, string='BASE')
+        self.baseKV_set = numpy.array(baseKV_set[0])
+        busCount = len(self.bus_number_set)
+
+        # All transmission lines connected to DVP system
+        ierr, (from_bus_number_set, to_bus_number_set) = psspy.abrnint(sid=1, ties=3, entry=2, string=['FROMNUMBER', 'TONUMBER'])
+        ierr, branch_ID_set = psspy.abrnchar(sid=1, ties=3, entry=2, string='ID')
+        branch_ID_set = branch_ID_set[0]
+        self.lineEntries = len(branch_ID_set)
+        self.first, self.reverse = branchIndex(from_bus_number_set, to_bus_number_set, branch_ID_set)
+        self.from_lines = numpy.array(from_bus_number_set, dtype=int)[self.first]
+        self.to_lines = numpy.array(to_bus_number_set, dtype=int)[self.first]
+        self.lines = list(zip(self.from_lines.tolist(), self.to_lines.tolist(), [branch_ID_set[position] for position in self.first]))
+        self.lineEnds = _selection(numpy.concatenate([busPositions(self.bus_number_set, self.from_lines),
+            busPositions(self.bus_number_set, self.to_lines)]), busCount)
+
+        # 2_wingding Transformers connected to DVP system
+        ierr, (from_bus_number_set_trn, to_bus_number_set_trn) = psspy.atrnint(sid=1, ties=3, entry=2, string=['FROMNUMBER', 'TONUMBER'])
+        ierr, branch_ID_set_trn = psspy.atrnchar(sid=1, ties=3, entry=2, string='ID')
+        branch_ID_set_trn = branch_ID_set_trn[0]
+        self.transformerEntries = len(branch_ID_set_trn)
+        self.first_trn, self.reverse_trn = branchIndex(from_bus_number_set_trn, to_bus_number_set_trn, branch_ID_set_trn)
+        self.from_trn = numpy.array(from_bus_number_set_trn, dtype=int)[self.first_trn]
+        self.to_trn = numpy.array(to_bus_number_set_trn, dtype=int)[self.first_trn]
+        self.transformerEnds = _selection(numpy.concatenate([busPositions(self.bus_number_set, self.from_trn),
+            busPositions(self.bus_number_set, self.to_trn)]), busCount)
+
+        # a transformer is recorded once for each end in DVP system, 1 - from bus, 0 - to bus
+        self.transformers = []
+        trn_entries = []
+        for position, (from_bus, to_bus, fromIn, toIn) in enumerate(zip(self.from_trn.tolist(), self.to_trn.tolist(),
+                numpy.isin(self.from_trn, self.buses).tolist(), numpy.isin(self.to_trn, self.buses).tolist())):
+            ID = branch_ID_set_trn[self.first_trn[position]]
+            if fromIn:
+                self.transformers.append((from_bus, to_bus, ID, 1))
+                trn_entries.append(position)
+            if toIn:
+                self.transformers.append((from_bus, to_bus, ID, 0))
+                trn_entries.append(position)
+        self.trn_entries = numpy.array(trn_entries, dtype=int)
+
+        # Plants
+        ierr, gen_bus_number_set = psspy.agenbusint(sid=1, string='NUMBER')
+        self.generators = numpy.array(gen_bus_number_set[0], dtype=int)
+        self.generatorBuses = _selection(busPositions(self.bus_number_set, self.generators), busCount)
+
+        # the buses the currents flow into, in the order of currents()
+        ends = numpy.concatenate([self.from_lines, self.to_lines, self.from_trn, self.to_trn, self.generators])
+        inSystem = numpy.isin(ends, self.buses)
+        self.incidence = scipy.sparse.csr_matrix((numpy.ones(numpy.count_nonzero(inSystem)),
+            (busPositions(self.buses, ends[inSystem]), numpy.flatnonzero(inSystem))), shape=(len(self.buses), len(ends)))
+
+    def check(self, name, entries, expected):
+        if entries != expected:
+            raise ValueError('the case has %d %s entries, not the %d of its topology; build a new VITopology' % (entries, name, expected))
+
+#endregion
+
+#region [ VI Measurement ]
+
+def measureVI(baseKV, inspected_bus_number=64, topology=None):
+    """
+    The measurements of the solved case in memory at the 345 kV buses:
+
+        buses                   the bus numbers
+        voltageMagnitude        of every bus, in V
+        voltageAngle            in radians
+        lines                   (from, to, id) of every line
+        lineCurrents            the currents (A) into the from and the to ends
+        transformers            (from, to, id, end) of every two-winding
+                                transformer end at a 345 kV bus, 1 from, 0 to
+        transformerCurrents     the currents into the from and the to ends
+        generators              the bus numbers of the generators
+        generatorCurrents       the currents out of the generators
+        busInjections           the current injected into every bus by its
+                                lines, transformers and generators
+        injections              that into the inspected bus
+
+    The elements come from topology (see VITopology), built once for all
+    the time stamps of a run; without it one is built for this time stamp.
+    """
+    if topology is None:
+        topology = VITopology()
+    else:
+        selectSubsystem()
+
+    # record bus voltage magnitudes and phase angles (in radians)
+    ierr, (bus_voltage_m, bus_voltage_a) = psspy.abusreal(1, 1, ['PU', 'ANGLE'])
+    bus_voltage_m = numpy.array(bus_voltage_m) * baseKV
+    bus_voltage_a = numpy.array(bus_voltage_a)
+
+    ierr, bus_voltage_set = psspy.abuscplx(sid=-1, string='VOLTAGE')
+    voltage_set = numpy.array(bus_voltage_set[0], dtype=complex) * topology.baseKV_set # kV
+
+    PQ, PQLoss = _branchFlows(psspy.abrncplx, topology.reverse)
+    topology.check('line', len(PQ), topology.lineEntries)
+    ends = topology.lineEnds.dot(voltage_set)
+    I_line_i, I_line_k = _endCurrents(PQ, PQLoss, topology.first, topology.reverse, ends[:len(topology.first)], ends[len(topology.first):])
+
+    PQ_trn, PQLoss_trn = _branchFlows(psspy.atrncplx, topology.reverse_trn)
+    topology.check('transformer', len(PQ_trn), topology.transformerEntries)
+    ends = topology.transformerEnds.dot(voltage_set)
+    I_trn_i, I_trn_k = _endCurrents(PQ_trn, PQLoss_trn, topology.first_trn, topology.reverse_trn, ends[:len(topology.first_trn)], ends[len(topology.first_trn):])
+
+    ierr, gen_bus_PQ_set = psspy.agenbuscplx(sid=1, string='PQGEN')
+    topology.check('generator', len(gen_bus_PQ_set[0]), len(topology.generators))
+    PQ_gen = numpy.array(gen_bus_PQ_set[0], dtype=complex) * 1000
+    I_gen = -1 * (numpy.conjugate(PQ_gen / topology.generatorBuses.dot(voltage_set)) / numpy.sqrt(3))
+
+    # the current injected into every bus, and into the inspected bus
+    busInjections = topology.incidence.dot(numpy.concatenate([I_line_i, I_line_k, I_trn_i, I_trn_k, I_gen]))
+    inspected = numpy.flatnonzero(numpy.asarray(topology.buses) == inspected_bus_number)
+
+    return {
+        'buses' : topology.buses,
+        'voltageMagnitude' : bus_voltage_m,
+        'voltageAngle' : bus_voltage_a,
+        'lines' : topology.lines,
+        'lineCurrents' : (I_line_i, I_line_k),
+        'transformers' : topology.transformers,
+        'transformerCurrents' : (I_trn_i[topology.trn_entries], I_trn_k[topology.trn_entries]),
+        'generators' : topology.generators.tolist(),
+        'generatorCurrents' : I_gen,
+        'busInjections' : busInjections,
+        'injections' : busInjections[inspected[0]] if len(inspected) else 0j,
+        }
+
+def writeMeasurement(f1, measurement, header=False):
+    """
+    Append the rows of a measurement to the VI measurement file, preceded
+    by the bus numbers if header: the voltage row (magnitude and angle of
+    every bus) and the current rows of the lines, the two-winding
+    transformers and the generators (the real and the imaginary part of
+    each current after the element).
+    """
+    writer = csv.writer(f1, delimiter=',', lineterminator='\n')
+    if header:
+        writer.writerow(measurement['buses'])
+
+    bus_voltage = []
+    for current_m, current_a in zip(measurement['voltageMagnitude'].tolist(), measurement['voltageAngle'].tolist()):
+        bus_voltage.extend([current_m, current_a])
+    writer.writerow(bus_voltage)
+
+    for info, currents in (('lines', 'lineCurrents'), ('transformers', 'transformerCurrents')):
+        row = []
+        for element, I_ik_i, I_ik_k in zip(measurement[info], measurement[currents][0].tolist(), measurement[currents][1].tolist()):
+            row.extend(element)
+            row.extend([I_ik_i.real, I_ik_i.imag, I_ik_k.real, I_ik_k.imag])
+        writer.writerow(row)
+
+    row = []
+    for bus, I in zip(measurement['generators'], measurement['generatorCurrents'].tolist()):
+        row.extend([bus, -1, I.real, I.imag])
+    writer.writerow(row)
+
+#endregion
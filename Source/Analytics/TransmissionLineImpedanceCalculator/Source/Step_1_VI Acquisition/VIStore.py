@@ -0,0 +1,183 @@
+#region [ Environmental Setup ]
+from __future__ import with_statement
+from __future__ import division
+import os,shutil
+import numpy
+
+#endregion
+
+#region [ VI Store ]
+
+StoreName = "%s.vi" # the columnar store of a VI measurement file, next to it
+
+# the topology, one entry for each column of the quantities
+LineType = [('from', '<i4'), ('to', '<i4'), ('id', '<U2')]
+TransformerType = [('from', '<i4'), ('to', '<i4'), ('id', '<U2'), ('end', '<i4')] # 1 from, 0 to end at a 345 kV bus
+Topology = {
+    'buses' : '<i4',
+    'lines' : LineType,
+    'transformers' : TransformerType,
+    'generators' : '<i4',
+    }
+
+# time stamps x elements, complex128; nan for a time stamp that collapsed
+Quantities = {
+    'voltage' : 'buses',                    # V
+    'lineCurrentFrom' : 'lines',            # A into the from end
+    'lineCurrentTo' : 'lines',              # A into the to end
+    'transformerCurrentFrom' : 'transformers',
+    'transformerCurrentTo' : 'transformers',
+    'generatorCurrent' : 'generators',      # A out of the generator
+    }
+
+def _topology(measurement):
+    """
+    The topology arrays of a measurement of VIAcquisition.measureVI.
+    """
+    return {
+        'buses' : numpy.array(measurement['buses'], dtype=Topology['buses']),
+        'lines' : numpy.array([tuple(line) for line in measurement['lines']], dtype=LineType),
+        'transformers' : numpy.array([tuple(transformer) for transformer in measurement['transformers']], dtype=TransformerType),
+        'generators' : numpy.array(measurement['generators'], dtype=Topology['generators']),
+        }
+
+def _quantities(measurement):
+    return {
+        'voltage' : measurement['voltageMagnitude'] * numpy.exp(1j * measurement['voltageAngle']),
+        'lineCurrentFrom' : measurement['lineCurrents'][0],
+        'lineCurrentTo' : measurement['lineCurrents'][1],
+        'transformerCurrentFrom' : measurement['transformerCurrents'][0],
+        'transformerCurrentTo' : measurement['transformerCurrents'][1],
+        'generatorCurrent' : measurement['generatorCurrents'],
+        }
+
+class VIStoreWriter(object):
+    """
+    Writes the measurements of count time stamps to a store folder of .npy
+    arrays, replacing the store there: the topology (the buses, the keys of
+    the lines and the transformers and the generator buses), the load
+    percentage and the solution status of every time stamp, and one
+    complex array of time stamps x elements for every quantity. The
+    quantities are created with the first solved time stamp; every other
+    one has to have the same topology.
+
+    With resume, a store of count time stamps already in folder is opened
+    to write the rest of them.
+    """
+
+    def __init__(self, folder, count, resume=False):
+        self.folder = folder
+        self.count = count
+        self.topology = None
+        self.arrays = {}
+        if resume and os.path.isfile(os.path.join(folder, 'solved.npy')):
+            for name in ['percentage', 'solved'] + list(Quantities):
+                fileName = os.path.join(folder, name + '.npy')
+                if os.path.isfile(fileName):
+                    self.arrays[name] = numpy.load(fileName, mmap_mode='r+')
+            if len(self.arrays['solved']) != count:
+                raise ValueError('the store %s has %d time stamps, not %d' % (folder, len(self.arrays['solved']), count))
+            if os.path.isfile(os.path.join(folder, 'buses.npy')):
+                self.topology = dict((name, numpy.load(os.path.join(folder, name + '.npy'))) for name in Topology)
+            return
+
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        self.arrays['percentage'] = self.create('percentage', numpy.float64, (count,), numpy.nan)
+        self.arrays['solved'] = self.create('solved', numpy.int32, (count,), -1)
+
+    def create(self, name, dtype, shape, fill):
+        array = numpy.lib.format.open_memmap(os.path.join(self.folder, name + '.npy'), mode='w+', dtype=dtype, shape=shape)
+        array[...] = fill
+        return array
+
+    def setTopology(self, topology):
+        if self.topology is not None:
+            for name in Topology:
+                if not numpy.array_equal(topology[name], self.topology[name]):
+                    raise ValueError('the %s of the measurement differ from those of the store %s' % (name, self.folder))
+            return
+        self.topology = topology
+        for name in Topology:
+            numpy.save(os.path.join(self.folder, name + '.npy'), topology[name])
+        for name, elements in Quantities.items():
+            self.arrays[name] = self.create(name, numpy.complex128, (self.count, len(topology[elements])), numpy.nan)
+
+    def write(self, row, percentage, N, measurement=None):
+        """
+        Record time stamp row: its load percentage, solution status and, if
+        solved, measurement.
+        """
+        self.arrays['percentage'][row] = percentage
+        self.arrays['solved'][row] = N
+        if measurement is None:
+            return
+        self.setTopology(_topology(measurement))
+        for name, values in _quantities(measurement).items():
+            self.arrays[name][row] = values
+
+    def copy(self, start, store, transform=None):
+        """
+        Record the time stamps of another store (a part) from row start on;
+        transform(topology, name, values), if given, gives the values
+        recorded for those of every quantity (see PmuErrorModel.measure).
+        """
+        stop = start + len(store['solved'])
+        self.arrays['percentage'][start:stop] = store['percentage']
+        self.arrays['solved'][start:stop] = store['solved']
+        if store.topology is None:
+            return
+        self.setTopology(store.topology)
+        for name in Quantities:
+            self.arrays[name][start:stop] = store[name] if transform is None else transform(store.topology, name, store[name])
+
+    def row(self, index):
+        """
+        The row of time stamp index of every quantity.
+        """
+        return dict((name, self.arrays[name][index]) for name in Quantities if name in self.arrays)
+
+    def flush(self):
+        for array in self.arrays.values():
+            if isinstance(array, numpy.memmap):
+                array.flush()
+
+    def close(self):
+        self.flush()
+        self.arrays = {}
+
+class VIStore(object):
+    """
+    A store written by VIStoreWriter, memory-mapped: store['voltage'] is
+    the time stamps x buses array of the bus voltages, store.topology
+    ['buses'] the bus numbers of its columns, and so on (see Quantities and
+    Topology). Nothing is read until indexed, e.g.
+
+        store = VIStore('VI_Measurement_All_345KV_Buses_Peak.vi')
+        solved = store['solved'] == 0
+        V = store['voltage'][solved]
+        I = store['lineCurrentFrom'][solved]
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.arrays = {}
+        for name in ['percentage', 'solved'] + list(Quantities):
+            fileName = os.path.join(folder, name + '.npy')
+            if os.path.isfile(fileName):
+                self.arrays[name] = numpy.load(fileName, mmap_mode='r')
+        self.topology = None
+        if os.path.isfile(os.path.join(folder, 'buses.npy')):
+            self.topology = dict((name, numpy.load(os.path.join(folder, name + '.npy'))) for name in Topology)
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __len__(self):
+        return len(self.arrays['solved'])
+
+    def close(self):
+        self.arrays = {}
+
+#endregion